@@ -4,13 +4,64 @@ AutoInvestAI 命令行客户端
 import os
 import sys
 import json
-import argparse
-import requests
+import operator
+from types import SimpleNamespace
 from typing import Dict, Any
 
+# 优先使用orjson编解码JSON，未安装时退回标准库
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+
+    def _json_pretty(obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+except ImportError:
+    orjson = None
+    _json_loads = json.loads
+
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+    def _json_pretty(obj: Any) -> str:
+        return json.dumps(obj, indent=2, ensure_ascii=False)
+
 # 默认服务器地址
 DEFAULT_SERVER = 'http://localhost:8000'
 
+# 代码前缀对应的货币符号，未列出的默认为美元
+_CURRENCY = {"SH": "¥", "SZ": "¥"}
+
+# 筛选结果字段的默认值及取值器，每行合并一次默认值后一次取出全部字段
+_SCREEN_DEFAULTS = {'symbol': '', 'name': '', 'latest_price': 0, 'price_change_percent': 0}
+_get_screen_fields = operator.itemgetter('symbol', 'name', 'latest_price', 'price_change_percent')
+
+# 复用HTTP连接，避免交互模式下每次查询都重新握手，首次发送查询时创建
+_SESSION = None
+
+
+def _get_session():
+    """获取共享的HTTP会话
+    
+    Returns:
+        requests.Session: HTTP会话
+    """
+    global _SESSION
+    
+    if _SESSION is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        
+        _SESSION = requests.Session()
+        _SESSION.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        _SESSION.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        _SESSION.headers.update({
+            "Content-Type": "application/json",
+            "User-Agent": "AutoInvestAI-CLI/1.0"
+        })
+    
+    return _SESSION
+
 
 def send_query(server_url: str, query: str) -> Dict[str, Any]:
     """发送查询到服务器
@@ -22,6 +73,8 @@ def send_query(server_url: str, query: str) -> Dict[str, Any]:
     Returns:
         Dict: 响应结果
     """
+    import requests
+    
     url = f"{server_url}/api/query"
     
     # 构建请求数据
@@ -33,13 +86,13 @@ def send_query(server_url: str, query: str) -> Dict[str, Any]:
     
     try:
         # 发送请求
-        response = requests.post(url, json=data)
+        response = _get_session().post(url, data=_json_dumps(data))
         response.raise_for_status()
         
-        # 解析响应
-        result = response.json()
+        # 直接解析原始字节，省去文本解码
+        result = _json_loads(response.content)
         return result
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ValueError) as e:
         print(f"请求出错: {e}")
         return {
             "success": False,
@@ -49,18 +102,33 @@ def send_query(server_url: str, query: str) -> Dict[str, Any]:
         }
 
 
+def _has_dict_values(d: Dict[str, Any]) -> bool:
+    """判断字典中是否存在字典类型的值
+    
+    Args:
+        d: 待检查的字典
+        
+    Returns:
+        bool: 是否存在字典类型的值
+    """
+    return any(type(v) is dict for v in d.values())
+
+
 def print_result(result: Dict[str, Any]):
     """打印响应结果
     
     Args:
         result: 响应结果
     """
+    # 先收集所有输出行，最后一次性写出
+    parts = []
+    
     # 打印基本信息
-    print("\n" + "=" * 50)
-    print(f"查询: {result['query']}")
-    print(f"状态: {'成功' if result['success'] else '失败'}")
-    print(f"消息: {result['message']}")
-    print("=" * 50)
+    parts.append("\n" + "=" * 50)
+    parts.append(f"查询: {result['query']}")
+    parts.append(f"状态: {'成功' if result['success'] else '失败'}")
+    parts.append(f"消息: {result['message']}")
+    parts.append("=" * 50)
     
     # 打印数据
     data = result.get('data')
@@ -69,16 +137,14 @@ def print_result(result: Dict[str, Any]):
         if 'screened_symbols' in data:
             # 筛选结果
             symbols = data['screened_symbols']
-            print(f"\n找到 {len(symbols)} 个符合条件的股票:\n")
+            parts.append(f"\n找到 {len(symbols)} 个符合条件的股票:\n")
             for i, symbol in enumerate(symbols, 1):
-                name = symbol.get('name', '')
-                price = symbol.get('latest_price', 0)
-                change = symbol.get('price_change_percent', 0)
-                print(f"{i}. {symbol['symbol']} {name}: ¥{price:.2f} ({change:+.2f}%)")
+                code, name, price, change = _get_screen_fields({**_SCREEN_DEFAULTS, **symbol})
+                parts.append(f"{i}. {code} {name}: ¥{price:.2f} ({change:+.2f}%)")
         
-        elif isinstance(data, dict) and any(isinstance(data.get(k), dict) for k in data):
+        elif isinstance(data, dict) and _has_dict_values(data):
             # 分析结果
-            print("\n分析结果:\n")
+            parts.append("\n分析结果:\n")
             for symbol, info in data.items():
                 if isinstance(info, dict) and info.get('success', False):
                     ticker_info = info.get('ticker_info', {})
@@ -86,67 +152,110 @@ def print_result(result: Dict[str, Any]):
                     price = info.get('latest_price')
                     change = info.get('price_change_percent')
                     
-                    print(f"\n{symbol} {name}:")
-                    print(f"  最新价格: {'¥' if symbol.startswith(('SH', 'SZ')) else '$'}{price:.2f}")
+                    parts.append(f"\n{symbol} {name}:")
+                    currency = _CURRENCY.get(symbol[:2], "$")
+                    parts.append(f"  最新价格: {currency}{price:.2f}")
                     if change is not None:
-                        print(f"  涨跌幅: {change:+.2f}%")
+                        parts.append(f"  涨跌幅: {change:+.2f}%")
                     
                     # 打印指标
                     indicators = info.get('indicators', {})
                     if indicators:
-                        print("  技术指标:")
+                        parts.append("  技术指标:")
                         for ind_name, ind_values in indicators.items():
-                            print(f"    {ind_name}: ", end="")
-                            for k, v in ind_values.items():
-                                print(f"{k}={v:.4f} ", end="")
-                            print()
+                            values = "".join(f"{k}={v:.4f} " for k, v in ind_values.items())
+                            parts.append(f"    {ind_name}: {values}")
         
         elif 'trade_results' in data:
             # 交易结果
             trades = data['trade_results']
-            print(f"\n交易结果:\n")
+            parts.append(f"\n交易结果:\n")
             for trade in trades:
                 symbol = trade.get('symbol', '')
                 success = trade.get('success', False)
                 message = trade.get('message', '')
                 
                 status = "成功" if success else "失败"
-                print(f"{symbol}: {status} - {message}")
+                parts.append(f"{symbol}: {status} - {message}")
         
         elif 'backtest_results' in data:
             # 回测结果
             backtest = data['backtest_results']
-            print(f"\n回测结果:\n")
+            parts.append(f"\n回测结果:\n")
             for test in backtest:
                 symbol = test.get('symbol', '')
                 strategy = test.get('strategy', '')
                 success = test.get('success', False)
                 
-                print(f"{symbol} 使用 {strategy} 策略:")
+                parts.append(f"{symbol} 使用 {strategy} 策略:")
                 if success and 'result' in test:
                     result = test['result']
-                    print(f"  初始资金: ¥{result.get('initial_capital', 0):.2f}")
-                    print(f"  最终资金: ¥{result.get('final_equity', 0):.2f}")
-                    print(f"  总收益率: {result.get('total_return_pct', 0):.2f}%")
-                    print(f"  年化收益: {result.get('annual_return_pct', 0):.2f}%")
-                    print(f"  最大回撤: {result.get('max_drawdown_pct', 0):.2f}%")
-                    print(f"  交易次数: {result.get('total_trades', 0)}")
+                    parts.append(f"  初始资金: ¥{result.get('initial_capital', 0):.2f}")
+                    parts.append(f"  最终资金: ¥{result.get('final_equity', 0):.2f}")
+                    parts.append(f"  总收益率: {result.get('total_return_pct', 0):.2f}%")
+                    parts.append(f"  年化收益: {result.get('annual_return_pct', 0):.2f}%")
+                    parts.append(f"  最大回撤: {result.get('max_drawdown_pct', 0):.2f}%")
+                    parts.append(f"  交易次数: {result.get('total_trades', 0)}")
                 else:
-                    print(f"  回测失败: {test.get('message', '')}")
+                    parts.append(f"  回测失败: {test.get('message', '')}")
         
         else:
             # 其他数据格式，直接打印
-            print("\n数据:")
-            print(json.dumps(data, indent=2, ensure_ascii=False))
+            parts.append("\n数据:")
+            parts.append(_json_pretty(data))
+    
+    sys.stdout.write("\n".join(parts) + "\n")
+
+
+USAGE = """usage: client.py [-h] [--server SERVER] [query]
+
+AutoInvestAI 命令行客户端
+
+positional arguments:
+  query            查询文本
+
+options:
+  -h, --help       显示帮助信息并退出
+  --server SERVER  服务器地址
+"""
+
+
+def parse_args(argv):
+    """解析命令行参数
+    
+    Args:
+        argv: 命令行参数列表
+        
+    Returns:
+        SimpleNamespace: 解析后的参数
+    """
+    args = SimpleNamespace(server=DEFAULT_SERVER, query=None)
+    
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg in ("-h", "--help"):
+            print(USAGE)
+            sys.exit(0)
+        elif arg == "--server":
+            i += 1
+            if i >= len(argv):
+                sys.exit(f"{USAGE}\nclient.py: error: argument --server: expected one argument")
+            args.server = argv[i]
+        elif arg.startswith("--server="):
+            args.server = arg.partition("=")[2]
+        elif args.query is None and not arg.startswith("-"):
+            args.query = arg
+        else:
+            sys.exit(f"{USAGE}\nclient.py: error: unrecognized arguments: {arg}")
+        i += 1
+    
+    return args
 
 
 def main():
     """主函数"""
-    parser = argparse.ArgumentParser(description="AutoInvestAI 命令行客户端")
-    parser.add_argument("--server", default=DEFAULT_SERVER, help="服务器地址")
-    parser.add_argument("query", nargs="?", help="查询文本")
-    
-    args = parser.parse_args()
+    args = parse_args(sys.argv[1:])
     
     # 如果没有提供查询，进入交互模式
     if not args.query:
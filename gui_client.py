@@ -5,23 +5,44 @@ AutoInvestAI 图形界面客户端 - 基于Gradio实现
 import os
 import sys
 import json
+import operator
+import asyncio
 import requests
-import argparse
-import gradio as gr
-from typing import Dict, Any, List
+from requests.adapters import HTTPAdapter
+from types import SimpleNamespace
+from typing import Dict, Any, List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import gradio as gr
+
+# 优先使用orjson序列化JSON，未安装时退回标准库
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+
+    def _json_pretty(obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+except ImportError:
+    orjson = None
+
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+    def _json_pretty(obj: Any) -> str:
+        return json.dumps(obj, indent=2, ensure_ascii=False)
 
 # 默认服务器地址
 DEFAULT_SERVER = 'http://localhost:8000'
 
-# 样式设置
-THEME = gr.themes.Soft(
-    primary_hue="blue",
-    secondary_hue="gray",
-    neutral_hue="gray",
-    spacing_size=gr.themes.sizes.spacing_md,
-    radius_size=gr.themes.sizes.radius_md,
-    text_size=gr.themes.sizes.text_md,
-)
+# 代码前缀对应的货币符号，未列出的默认为美元
+_CURRENCY = {"SH": "¥", "SZ": "¥"}
+
+# 无返回数据时的默认提示
+_NO_DATA_MSG = sys.intern("处理完成，但无返回数据")
+
+# 筛选结果字段的默认值及取值器，每行合并一次默认值后一次取出全部字段
+_SCREEN_DEFAULTS = {'symbol': '', 'name': '', 'latest_price': 0, 'price_change_percent': 0}
+_get_screen_fields = operator.itemgetter('symbol', 'name', 'latest_price', 'price_change_percent')
 
 class AutoInvestAIChat:
     """AutoInvestAI 聊天客户端类"""
@@ -34,6 +55,16 @@ class AutoInvestAIChat:
         """
         self.server_url = server_url
         self.chat_history = []
+        
+        # 复用HTTP连接，避免每轮对话都重新握手
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_maxsize=10))
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=10))
+        self.session.headers.update({"Content-Type": "application/json"})
+        
+        # 异步会话，首次在事件循环中使用时创建
+        self._aio_session = None
+        self._aio_loop = None
     
     def send_query(self, query: str) -> Dict[str, Any]:
         """发送查询到服务器
@@ -55,7 +86,7 @@ class AutoInvestAIChat:
         
         try:
             # 发送请求
-            response = requests.post(url, json=data)
+            response = self.session.post(url, data=_json_dumps(data), timeout=(3, 30))
             response.raise_for_status()
             
             # 解析响应
@@ -70,6 +101,89 @@ class AutoInvestAIChat:
                 "query": query
             }
     
+    def _get_aio_session(self):
+        """获取当前事件循环下的异步HTTP会话
+        
+        Returns:
+            aiohttp.ClientSession: 异步会话
+        """
+        import aiohttp
+        
+        loop = asyncio.get_running_loop()
+        if self._aio_session is None or self._aio_session.closed or self._aio_loop is not loop:
+            self._aio_session = aiohttp.ClientSession(
+                headers={"Content-Type": "application/json"},
+                timeout=aiohttp.ClientTimeout(sock_connect=3, total=30)
+            )
+            self._aio_loop = loop
+        return self._aio_session
+    
+    async def send_query_async(self, query: str) -> Dict[str, Any]:
+        """异步发送查询到服务器
+        
+        Args:
+            query: 查询文本
+            
+        Returns:
+            Dict: 响应结果
+        """
+        import aiohttp
+        
+        url = f"{self.server_url}/api/query"
+        
+        # 构建请求数据
+        data = {
+            "query": query,
+            "user_id": "gui_user",
+            "context": {}
+        }
+        
+        try:
+            session = self._get_aio_session()
+            async with session.post(url, data=_json_dumps(data)) as response:
+                response.raise_for_status()
+                return await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error_message = f"请求出错: {str(e)}"
+            return {
+                "success": False,
+                "message": error_message,
+                "data": None,
+                "query": query
+            }
+    
+    async def batch_query(self, queries: List[str]) -> List[Any]:
+        """并发发送多个查询
+        
+        Args:
+            queries: 查询文本列表
+            
+        Returns:
+            List: 与查询顺序一致的响应结果，出错的查询对应异常对象
+        """
+        return await asyncio.gather(
+            *[self.send_query_async(q) for q in queries],
+            return_exceptions=True
+        )
+    
+    def warmup(self):
+        """预先建立到服务器的连接，使首条消息无需等待握手"""
+        try:
+            self.session.get(f"{self.server_url}/api/health", timeout=(3, 5))
+        except requests.exceptions.RequestException:
+            pass
+    
+    def close(self):
+        """关闭HTTP会话，释放连接"""
+        self.session.close()
+    
+    async def aclose(self):
+        """关闭异步HTTP会话"""
+        if self._aio_session is not None and not self._aio_session.closed:
+            await self._aio_session.close()
+        self._aio_session = None
+        self._aio_loop = None
+    
     def format_response(self, response: Dict[str, Any]) -> str:
         """格式化响应内容为易读的文本
         
@@ -79,34 +193,33 @@ class AutoInvestAIChat:
         Returns:
             str: 格式化后的文本
         """
+        success = response.get('success', False)
+        data = response.get('data')
+        
         # 如果请求失败，直接返回错误信息
-        if not response.get('success', False):
+        if not success:
             return f"❌ {response.get('message', '未知错误')}"
         
-        # 获取数据部分
-        data = response.get('data', {})
+        # 没有数据时直接返回消息
         if not data:
-            return response.get('message', '处理完成，但无返回数据')
+            return response.get('message', _NO_DATA_MSG)
         
-        result_parts = []
-        
-        # 处理筛选结果
+        # 处理筛选结果，行数已知时预分配结果列表
         if 'screened_symbols' in data:
             symbols = data['screened_symbols']
-            result_parts.append(f"📊 找到 {len(symbols)} 个符合条件的股票:\n")
+            result_parts = [None] * (len(symbols) + 1)
+            result_parts[0] = f"📊 找到 {len(symbols)} 个符合条件的股票:\n"
             
             for i, symbol in enumerate(symbols, 1):
-                name = symbol.get('name', '')
-                price = symbol.get('latest_price', 0)
-                change = symbol.get('price_change_percent', 0)
-                result_parts.append(
-                    f"{i}. {symbol['symbol']} {name}: "
+                code, name, price, change = _get_screen_fields({**_SCREEN_DEFAULTS, **symbol})
+                result_parts[i] = (
+                    f"{i}. {code} {name}: "
                     f"¥{price:.2f} ({change:+.2f}%)"
                 )
         
         # 处理分析结果
-        # elif isinstance(data, dict) and any(isinstance(data.get(k), dict) for k in data):
-        #     result_parts.append("📈 分析结果:\n")
+        # elif isinstance(data, dict) and any(type(v) is dict for v in data.values()):
+        #     result_parts = ["📈 分析结果:\n"]
             
         #     for symbol, info in data.items():
         #         if isinstance(info, dict) and info.get('success', False):
@@ -118,7 +231,7 @@ class AutoInvestAIChat:
         #             symbol_parts = [f"\n**{symbol}** {name}:"]
                     
         #             if price is not None:
-        #                 currency = '¥' if symbol.startswith(('SH', 'SZ')) else '$'
+        #                 currency = _CURRENCY.get(symbol[:2], '$')
         #                 symbol_parts.append(f"- 最新价格: {currency}{price:.2f}")
                     
         #             if change is not None:
@@ -142,49 +255,54 @@ class AutoInvestAIChat:
         # 处理交易结果
         elif 'trade_results' in data:
             trades = data['trade_results']
-            result_parts.append("💰 交易结果:\n")
+            result_parts = [None] * (len(trades) + 1)
+            result_parts[0] = "💰 交易结果:\n"
             
-            for trade in trades:
+            for i, trade in enumerate(trades, 1):
                 symbol = trade.get('symbol', '')
                 success = trade.get('success', False)
                 message = trade.get('message', '')
                 
                 emoji = "✅" if success else "❌"
-                result_parts.append(f"{emoji} {symbol}: {message}")
+                result_parts[i] = f"{emoji} {symbol}: {message}"
         
         # 处理回测结果
         elif 'backtest_results' in data:
             backtest = data['backtest_results']
-            result_parts.append("🧪 回测结果:\n")
+            result_parts = [None] * (len(backtest) + 1)
+            result_parts[0] = "🧪 回测结果:\n"
             
-            for test in backtest:
+            for i, test in enumerate(backtest, 1):
                 symbol = test.get('symbol', '')
                 strategy = test.get('strategy', '')
                 success = test.get('success', False)
                 
-                test_parts = [f"**{symbol}** 使用 **{strategy}** 策略:"]
+                header = f"**{symbol}** 使用 **{strategy}** 策略:"
                 
                 if success and 'result' in test:
                     result = test['result']
-                    test_parts.extend([
+                    test_parts = (
+                        header,
                         f"- 初始资金: ¥{result.get('initial_capital', 0):.2f}",
                         f"- 最终资金: ¥{result.get('final_equity', 0):.2f}",
                         f"- 总收益率: {result.get('total_return_pct', 0):.2f}%",
                         f"- 年化收益: {result.get('annual_return_pct', 0):.2f}%",
                         f"- 最大回撤: {result.get('max_drawdown_pct', 0):.2f}%",
                         f"- 交易次数: {result.get('total_trades', 0)}次"
-                    ])
+                    )
                 else:
-                    test_parts.append(f"- ❌ 回测失败: {test.get('message', '')}")
+                    test_parts = (header, f"- ❌ 回测失败: {test.get('message', '')}")
                 
-                result_parts.append("\n".join(test_parts))
+                result_parts[i] = "\n".join(test_parts)
         
         # 其他类型的数据
         else:
-            result_parts.append("🔍 结果:")
-            result_parts.append("```json")
-            result_parts.append(json.dumps(data, indent=2, ensure_ascii=False))
-            result_parts.append("```")
+            result_parts = [
+                "🔍 结果:",
+                "```json",
+                _json_pretty(data),
+                "```"
+            ]
         
         # 返回格式化后的文本
         return "\n".join(result_parts)
@@ -212,7 +330,25 @@ class AutoInvestAIChat:
         ]
 
 
-def create_chat_interface(server_url: str = DEFAULT_SERVER) -> gr.Blocks:
+def _create_theme():
+    """创建界面主题
+    
+    Returns:
+        gr.themes.Soft: Gradio主题
+    """
+    import gradio as gr
+    
+    return gr.themes.Soft(
+        primary_hue="blue",
+        secondary_hue="gray",
+        neutral_hue="gray",
+        spacing_size=gr.themes.sizes.spacing_md,
+        radius_size=gr.themes.sizes.radius_md,
+        text_size=gr.themes.sizes.text_md,
+    )
+
+
+def create_chat_interface(server_url: str = DEFAULT_SERVER) -> "gr.Blocks":
     """创建聊天界面
     
     Args:
@@ -221,11 +357,14 @@ def create_chat_interface(server_url: str = DEFAULT_SERVER) -> gr.Blocks:
     Returns:
         gr.Blocks: Gradio界面
     """
+    # gradio导入较慢，仅在创建界面时加载
+    import gradio as gr
+    
     # 创建聊天客户端
     client = AutoInvestAIChat(server_url)
     
     # 创建界面
-    with gr.Blocks(theme=THEME) as interface:
+    with gr.Blocks(theme=_create_theme()) as interface:
         gr.Markdown("# 🤖 AutoInvestAI 智能投资助手")
         gr.Markdown("欢迎使用智能投资助手，您可以询问关于股票分析、筛选、回测和交易等问题。")
         
@@ -298,18 +437,68 @@ def create_chat_interface(server_url: str = DEFAULT_SERVER) -> gr.Blocks:
                 });
             }
         """)
+        
+        # 页面加载时预热连接，关闭时释放连接
+        interface.load(client.warmup, inputs=None, outputs=None)
+        interface.unload(client.close)
     
     return interface
 
 
+USAGE = """usage: gui_client.py [-h] [--server SERVER] [--share] [--port PORT]
+
+AutoInvestAI 图形界面客户端
+
+options:
+  -h, --help       显示帮助信息并退出
+  --server SERVER  服务器地址
+  --share          创建公开链接
+  --port PORT      本地端口
+"""
+
+
+def parse_args(argv):
+    """解析命令行参数
+    
+    Args:
+        argv: 命令行参数列表
+        
+    Returns:
+        SimpleNamespace: 解析后的参数
+    """
+    args = SimpleNamespace(server=DEFAULT_SERVER, share=False, port=7860)
+    
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        name, sep, value = arg.partition("=")
+        if arg in ("-h", "--help"):
+            print(USAGE)
+            sys.exit(0)
+        elif arg == "--share":
+            args.share = True
+        elif name in ("--server", "--port"):
+            if not sep:
+                i += 1
+                if i >= len(argv):
+                    sys.exit(f"{USAGE}\ngui_client.py: error: argument {name}: expected one argument")
+                value = argv[i]
+            if name == "--port":
+                try:
+                    value = int(value)
+                except ValueError:
+                    sys.exit(f"{USAGE}\ngui_client.py: error: argument --port: invalid int value: '{value}'")
+            setattr(args, name[2:], value)
+        else:
+            sys.exit(f"{USAGE}\ngui_client.py: error: unrecognized arguments: {arg}")
+        i += 1
+    
+    return args
+
+
 def main():
     """主函数"""
-    parser = argparse.ArgumentParser(description="AutoInvestAI 图形界面客户端")
-    parser.add_argument("--server", default=DEFAULT_SERVER, help="服务器地址")
-    parser.add_argument("--share", action="store_true", help="创建公开链接")
-    parser.add_argument("--port", type=int, default=7860, help="本地端口")
-    
-    args = parser.parse_args()
+    args = parse_args(sys.argv[1:])
     
     # 打印欢迎信息
     print(f"🤖 启动 AutoInvestAI 图形界面客户端")
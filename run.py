@@ -3,13 +3,44 @@
 """
 import os
 import sys
-import argparse
 import subprocess
+from types import SimpleNamespace
 
 # 获取项目根目录
 ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
 
 
+def _run_process(cmd, env=None):
+    """启动子进程并等待其结束，中断时确保子进程退出
+    
+    Args:
+        cmd: 命令及参数列表
+        env: 子进程环境变量
+    """
+    proc = subprocess.Popen(cmd, env=env, bufsize=1, text=True)
+    try:
+        proc.wait()
+    except KeyboardInterrupt:
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+        raise
+
+
+def _unbuffered_env():
+    """返回关闭输出缓冲的环境变量副本
+    
+    Returns:
+        dict: 环境变量
+    """
+    env = os.environ.copy()
+    env["PYTHONUNBUFFERED"] = "1"
+    return env
+
+
 def install_dependencies():
     """安装项目依赖"""
     print("正在安装项目依赖...")
@@ -35,7 +66,7 @@ def start_server(host="0.0.0.0", port=8000):
     print(f"正在启动AutoInvestAI服务，地址: {host}:{port}...")
     
     # 设置环境变量
-    env = os.environ.copy()
+    env = _unbuffered_env()
     env["PYTHONPATH"] = ROOT_DIR
     
     # 服务器脚本路径
@@ -43,7 +74,7 @@ def start_server(host="0.0.0.0", port=8000):
     
     try:
         # 启动服务器
-        subprocess.run([sys.executable, server_path, "--host", host, "--port", str(port)], env=env)
+        _run_process([sys.executable, server_path, "--host", host, "--port", str(port)], env=env)
     except KeyboardInterrupt:
         print("\n服务已停止。")
     except Exception as e:
@@ -76,7 +107,7 @@ def start_client():
     
     try:
         # 启动客户端
-        subprocess.run([sys.executable, client_path])
+        _run_process([sys.executable, client_path], env=_unbuffered_env())
     except KeyboardInterrupt:
         print("\n客户端已退出。")
     except Exception as e:
@@ -95,25 +126,73 @@ def start_gui_client(share=False):
         cmd = [sys.executable, client_path]
         if share:
             cmd.append("--share")
-        subprocess.run(cmd)
+        _run_process(cmd, env=_unbuffered_env())
     except KeyboardInterrupt:
         print("\n客户端已退出。")
     except Exception as e:
         print(f"启动客户端失败: {e}")
 
 
+USAGE = """usage: run.py [-h] [--install] [--test] [--client] [--gui] [--host HOST] [--port PORT] [--share]
+
+AutoInvestAI服务启动脚本
+
+options:
+  -h, --help   显示帮助信息并退出
+  --install    安装依赖
+  --test       运行测试
+  --client     启动命令行客户端
+  --gui        启动图形界面客户端
+  --host HOST  服务主机地址
+  --port PORT  服务端口
+  --share      创建公开链接(仅GUI客户端)
+"""
+
+
+def parse_args(argv):
+    """解析命令行参数
+    
+    Args:
+        argv: 命令行参数列表
+        
+    Returns:
+        SimpleNamespace: 解析后的参数
+    """
+    args = SimpleNamespace(install=False, test=False, client=False, gui=False,
+                           host="0.0.0.0", port=8000, share=False)
+    flags = {"--install", "--test", "--client", "--gui", "--share"}
+    
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        name, sep, value = arg.partition("=")
+        if arg in ("-h", "--help"):
+            print(USAGE)
+            sys.exit(0)
+        elif arg in flags:
+            setattr(args, arg[2:], True)
+        elif name in ("--host", "--port"):
+            if not sep:
+                i += 1
+                if i >= len(argv):
+                    sys.exit(f"{USAGE}\nrun.py: error: argument {name}: expected one argument")
+                value = argv[i]
+            if name == "--port":
+                try:
+                    value = int(value)
+                except ValueError:
+                    sys.exit(f"{USAGE}\nrun.py: error: argument --port: invalid int value: '{value}'")
+            setattr(args, name[2:], value)
+        else:
+            sys.exit(f"{USAGE}\nrun.py: error: unrecognized arguments: {arg}")
+        i += 1
+    
+    return args
+
+
 def main():
     """主函数"""
-    parser = argparse.ArgumentParser(description="AutoInvestAI服务启动脚本")
-    parser.add_argument("--install", action="store_true", help="安装依赖")
-    parser.add_argument("--test", action="store_true", help="运行测试")
-    parser.add_argument("--client", action="store_true", help="启动命令行客户端")
-    parser.add_argument("--gui", action="store_true", help="启动图形界面客户端")
-    parser.add_argument("--host", default="0.0.0.0", help="服务主机地址")
-    parser.add_argument("--port", type=int, default=8000, help="服务端口")
-    parser.add_argument("--share", action="store_true", help="创建公开链接(仅GUI客户端)")
-    
-    args = parser.parse_args()
+    args = parse_args(sys.argv[1:])
     
     # 安装依赖
     if args.install:
@@ -3,7 +3,11 @@ API工厂模块，用于创建和管理不同的数据API实例
 """
 import os
 import json
-from typing import Dict, Optional
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from cachetools import TTLCache
 from dotenv import load_dotenv
 
 from src.data_api.base_api import BaseAPI
@@ -11,12 +15,109 @@ from src.data_api.binance_api import BinanceAPI
 from src.data_api.futu_api import FutuAPI
 from config.constants import MARKET_TYPE_CRYPTO, MARKET_TYPE_HK, MARKET_TYPE_US, MARKET_TYPE_A_SHARE
 
-# 加载环境变量
-load_dotenv()
+# 优先使用orjson解析JSON，未安装时退回标准库
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# 已解析的配置文件缓存，键为(绝对路径, 修改时间)
+_CONFIG_CACHE: Dict[Tuple[str, int], Dict] = {}
+
+# 加密货币交易对后缀
+_CRYPTO_SUFFIXES = ('USDT', 'BTC', 'ETH')
+
+
+@lru_cache(maxsize=None)
+def _load_env():
+    """加载环境变量，只在首次创建API实例时执行一次"""
+    load_dotenv()
+
+
+def _close_api(api_key: str, api: BaseAPI):
+    """关闭API实例持有的连接
+    
+    Args:
+        api_key: API的唯一标识
+        api: API实例
+    """
+    try:
+        close = getattr(api, 'close', None)
+        if close is not None:
+            close()
+        print(f"已关闭 {api_key} 连接")
+    except Exception as e:
+        print(f"关闭 {api_key} 连接失败: {e}")
+
+
+class _APICache(TTLCache):
+    """API实例缓存，实例被淘汰或过期时不立即关闭，其他线程可能还在使用该实例，
+    先移入待关闭列表，超过宽限期后再关闭其连接"""
+    
+    # 淘汰的实例关闭前保留的秒数，足够已经取得该实例的请求处理完成
+    CLOSE_GRACE = 300
+    
+    def __init__(self, maxsize, ttl, **kwargs):
+        super().__init__(maxsize, ttl, **kwargs)
+        self._retired: List[Tuple[float, str, BaseAPI]] = []  # (淘汰时间, 键, 实例)
+    
+    def _retire(self, key, api):
+        self._retired.append((time.monotonic(), key, api))
+    
+    def __delitem__(self, key):
+        api = self[key]
+        super().__delitem__(key)
+        self._retire(key, api)
+    
+    def expire(self, time=None):
+        expired = super().expire(time)
+        for key, api in expired:
+            self._retire(key, api)
+        return expired
+    
+    def clear(self):
+        items = list(self.items())
+        super().clear()
+        for key, api in items:
+            self._retire(key, api)
+    
+    def close_retired(self, grace: float = CLOSE_GRACE):
+        """关闭淘汰时间超过宽限期的API实例
+        
+        Args:
+            grace: 宽限期秒数，为0时关闭所有已淘汰的实例
+        """
+        deadline = time.monotonic() - grace
+        while self._retired and self._retired[0][0] <= deadline:
+            _, key, api = self._retired.pop(0)
+            _close_api(key, api)
+
 
 class APIFactory:
     """API工厂类，用于创建和管理不同的数据API实例"""
     
+    # 代码前缀到市场的映射
+    _PREFIX_MAP = {
+        'HK': MARKET_TYPE_HK,
+        'HKEX': MARKET_TYPE_HK,
+        'US': MARKET_TYPE_US,
+        'NYSE': MARKET_TYPE_US,
+        'NASDAQ': MARKET_TYPE_US,
+        'SH': MARKET_TYPE_A_SHARE,
+        'SZ': MARKET_TYPE_A_SHARE,
+        'A': MARKET_TYPE_A_SHARE
+    }
+    
+    # 为几个特殊股票代码预设市场
+    _SPECIAL_SYMBOLS = {
+        '00700': MARKET_TYPE_HK,  # 腾讯
+        '09988': MARKET_TYPE_HK,  # 阿里巴巴
+        '09999': MARKET_TYPE_HK,  # 网易
+        'BABA': MARKET_TYPE_US,   # 阿里巴巴ADR
+        'BIDU': MARKET_TYPE_US    # 百度
+    }
+    
     def __init__(self, config_path: str):
         """初始化API工厂
         
@@ -24,7 +125,8 @@ class APIFactory:
             config_path: 配置文件路径
         """
         self.config_path = config_path
-        self.apis = {}  # 存储API实例的字典
+        self.apis = _APICache(maxsize=32, ttl=3600)  # 存储API实例的缓存，过期的实例延后关闭
+        self._apis_lock = threading.RLock()  # 缓存不是线程安全的，并发获取API时需要加锁
         self.config = self._load_config()
     
     def _load_config(self) -> Dict:
@@ -34,8 +136,19 @@ class APIFactory:
             Dict: 配置信息
         """
         try:
-            with open(self.config_path, 'r') as f:
-                return json.load(f)
+            key = (os.path.abspath(self.config_path), os.stat(self.config_path).st_mtime_ns)
+        except OSError:
+            key = None
+        
+        if key is not None and key in _CONFIG_CACHE:
+            return _CONFIG_CACHE[key]
+        
+        try:
+            with open(self.config_path, 'rb') as f:
+                config = _json_loads(f.read())
+            if key is not None:
+                _CONFIG_CACHE[key] = config
+            return config
         except (FileNotFoundError, json.JSONDecodeError) as e:
             print(f"加载配置文件失败: {e}")
             return {}
@@ -53,26 +166,29 @@ class APIFactory:
         # 生成API的唯一标识
         api_key = f"{api_type}_{market}" if market else api_type
         
-        # 如果已经创建了API实例，直接返回
-        if api_key in self.apis:
-            return self.apis[api_key]
-        
-        # 创建新的API实例
-        api = None
-        
-        if api_type.lower() == 'binance':
-            api = self._create_binance_api()
-        elif api_type.lower() == 'futu':
-            api = self._create_futu_api(market)
-        else:
-            print(f"不支持的API类型: {api_type}")
-            return None
-        
-        # 保存并返回API实例
-        if api:
-            self.apis[api_key] = api
+        with self._apis_lock:
+            # 关闭已过宽限期的淘汰实例
+            self.apis.close_retired()
             
-        return api
+            # 如果已经创建了API实例，直接返回
+            api = self.apis.get(api_key)
+            if api is not None:
+                return api
+            
+            # 创建新的API实例，持有锁可以避免并发请求重复创建连接
+            if api_type.lower() == 'binance':
+                api = self._create_binance_api()
+            elif api_type.lower() == 'futu':
+                api = self._create_futu_api(market)
+            else:
+                print(f"不支持的API类型: {api_type}")
+                return None
+            
+            # 保存并返回API实例
+            if api:
+                self.apis[api_key] = api
+                
+            return api
     
     def _create_binance_api(self) -> Optional[BinanceAPI]:
         """创建币安API实例
@@ -80,6 +196,8 @@ class APIFactory:
         Returns:
             BinanceAPI: 币安API实例，如果创建失败则返回None
         """
+        _load_env()
+        
         try:
             # 优先使用环境变量中的API密钥
             api_key = os.environ.get('BINANCE_API_KEY')
@@ -103,6 +221,8 @@ class APIFactory:
         Returns:
             FutuAPI: 富途API实例，如果创建失败则返回None
         """
+        _load_env()
+        
         try:
             # 如果没有指定市场，默认使用港股
             if not market:
@@ -124,64 +244,61 @@ class APIFactory:
             print(f"创建富途API实例失败: {e}")
             return None
     
-    def get_api_for_symbol(self, symbol: str) -> Optional[BaseAPI]:
-        """根据交易对/股票代码自动选择合适的API
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _resolve_market(symbol: str) -> Optional[Tuple[str, Optional[str]]]:
+        """解析交易对/股票代码对应的API类型和市场
         
         Args:
             symbol: 交易对/股票代码
             
         Returns:
-            BaseAPI: 适合处理该交易对/股票的API实例
+            Tuple: (API类型, 市场类型)，无法确定时返回None
         """
-        # 为几个特殊股票代码预设市场
-        special_symbols = {
-            '00700': MARKET_TYPE_HK,  # 腾讯
-            '09988': MARKET_TYPE_HK,  # 阿里巴巴
-            '09999': MARKET_TYPE_HK,  # 网易
-            'BABA': MARKET_TYPE_US,   # 阿里巴巴ADR
-            'BIDU': MARKET_TYPE_US    # 百度
-        }
-        
-        if symbol in special_symbols:
-            return self.get_api('futu', special_symbols[symbol])
+        if symbol in APIFactory._SPECIAL_SYMBOLS:
+            return 'futu', APIFactory._SPECIAL_SYMBOLS[symbol]
         
         # 根据代码前缀判断市场
-        if symbol.startswith(('HK.', 'HKEX.')):
-            return self.get_api('futu', MARKET_TYPE_HK)
-        elif symbol.startswith(('US.', 'NYSE.', 'NASDAQ.')):
-            return self.get_api('futu', MARKET_TYPE_US)
-        elif symbol.startswith(('SH.', 'SZ.', 'A.')):
-            return self.get_api('futu', MARKET_TYPE_A_SHARE)
-        elif '/' in symbol or symbol.endswith(('USDT', 'BTC', 'ETH')):
-            return self.get_api('binance')
-        else:
-            # 无法确定市场，根据代码规则判断
-            clean_symbol = symbol.strip()
-            if clean_symbol.isdigit():
-                if len(clean_symbol) == 5 or (len(clean_symbol) <= 5 and clean_symbol.startswith('0')):
-                    # 港股代码
-                    return self.get_api('futu', MARKET_TYPE_HK)
-                elif len(clean_symbol) == 6:
-                    # A股代码
-                    return self.get_api('futu', MARKET_TYPE_A_SHARE)
+        prefix, sep, _ = symbol.partition('.')
+        if sep and prefix in APIFactory._PREFIX_MAP:
+            return 'futu', APIFactory._PREFIX_MAP[prefix]
+        
+        if '/' in symbol or symbol.endswith(_CRYPTO_SUFFIXES):
+            return 'binance', None
+        
+        # 无法确定市场，根据代码规则判断
+        clean_symbol = symbol.strip()
+        if clean_symbol.isdigit():
+            if len(clean_symbol) == 5 or (len(clean_symbol) <= 5 and clean_symbol.startswith('0')):
+                # 港股代码
+                return 'futu', MARKET_TYPE_HK
+            elif len(clean_symbol) == 6:
+                # A股代码
+                return 'futu', MARKET_TYPE_A_SHARE
+        
+        return None
+    
+    def get_api_for_symbol(self, symbol: str) -> Optional[BaseAPI]:
+        """根据交易对/股票代码自动选择合适的API
+        
+        Args:
+            symbol: 交易对/股票代码
             
+        Returns:
+            BaseAPI: 适合处理该交易对/股票的API实例
+        """
+        route = self._resolve_market(symbol)
+        if route is None:
             # 其他情况默认为港股
             print(f"无法确定{symbol}的市场类型，尝试使用港股API")
             return self.get_api('futu', MARKET_TYPE_HK)
+        
+        api_type, market = route
+        return self.get_api(api_type, market)
             
     def close_all(self):
         """关闭所有API连接"""
-        for api_key, api in self.apis.items():
-            try:
-                # 对于富途API需要特殊处理
-                if isinstance(api, FutuAPI):
-                    if api.quote_ctx:
-                        api.quote_ctx.close()
-                    if api.trade_ctx:
-                        api.trade_ctx.close()
-                print(f"已关闭 {api_key} 连接")
-            except Exception as e:
-                print(f"关闭 {api_key} 连接失败: {e}")
-        
-        # 清空API字典
-        self.apis = {}
\ No newline at end of file
+        # 清空缓存后立即关闭所有实例，包括之前淘汰还未关闭的实例
+        with self._apis_lock:
+            self.apis.clear()
+            self.apis.close_retired(grace=0)
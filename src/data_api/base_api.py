@@ -1,14 +1,104 @@
 """
 数据API的基类，定义了所有数据源API需要实现的接口
 """
+import atexit
+import logging
+import queue
+import threading
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable, Dict, List, Any, Optional
+import numpy as np
 import pandas as pd
 
 
+# 数据API日志队列，实际输出由后台线程完成，接口方法出错时不必等待IO
+_LOG_QUEUE: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_log_listener: Optional[QueueListener] = None
+_log_lock = threading.Lock()
+
+
+class _RootForwardHandler(logging.Handler):
+    """在后台线程中把日志记录交给根日志器，沿用应用配置的输出位置"""
+    
+    def emit(self, record: logging.LogRecord):
+        logging.getLogger().handle(record)
+
+
+def get_api_logger(name: str) -> logging.Logger:
+    """获取数据API模块使用的日志器，日志经队列异步输出
+    
+    Args:
+        name: 日志器名称，通常为模块的__name__
+        
+    Returns:
+        logging.Logger: 日志器
+    """
+    global _log_listener
+    
+    logger = logging.getLogger(name)
+    with _log_lock:
+        if _log_listener is None:
+            _log_listener = QueueListener(_LOG_QUEUE, _RootForwardHandler())
+            _log_listener.start()
+            atexit.register(_log_listener.stop)
+        
+        if not any(isinstance(h, QueueHandler) for h in logger.handlers):
+            logger.addHandler(QueueHandler(_LOG_QUEUE))
+            # 已由队列转发给根日志器，不再向上传递以免重复输出
+            logger.propagate = False
+    
+    return logger
+
+
+def cache_ttu(ttl: float, negative_ttl: float = 60) -> Callable[[Any, Any, float], float]:
+    """生成TLRUCache使用的过期时间函数，空结果使用较短的过期时间
+    
+    Args:
+        ttl: 正常结果的缓存秒数
+        negative_ttl: 空结果（如请求失败）的缓存秒数
+        
+    Returns:
+        Callable: 根据(键, 值, 当前时间)返回过期时间的函数
+    """
+    def ttu(key, value, now):
+        return now + (ttl if len(value) else min(ttl, negative_ttl))
+    return ttu
+
+
+@dataclass(slots=True)
+class OHLCV:
+    """按列存储的K线数据，每个字段都是连续的NumPy数组，可直接传给数值计算"""
+    
+    timestamp: np.ndarray  # datetime64[ns]
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    
+    def __len__(self) -> int:
+        return len(self.close)
+    
+    def to_dataframe(self) -> pd.DataFrame:
+        """转换为以时间为索引的OHLCV DataFrame"""
+        return pd.DataFrame({
+            'open': self.open,
+            'high': self.high,
+            'low': self.low,
+            'close': self.close,
+            'volume': self.volume
+        }, index=pd.DatetimeIndex(self.timestamp, name='timestamp'))
+
+
 class BaseAPI(ABC):
     """所有数据API的基类，定义了标准接口方法"""
     
+    # 批量获取行情时的最大并发请求数
+    BATCH_WORKERS = 16
+    
     @abstractmethod
     def connect(self) -> bool:
         """连接到API服务
@@ -32,6 +122,33 @@ class BaseAPI(ABC):
         """
         pass
     
+    def get_market_data_batch(self, symbols: List[str], timeframe: str,
+                              limit: int = 100) -> Dict[str, pd.DataFrame]:
+        """批量获取多个交易对/股票的市场行情数据
+        
+        基本实现在线程池中并发调用get_market_data，数据源提供多代码接口时子类可覆盖为单次请求。
+        
+        Args:
+            symbols: 交易对/股票代码列表
+            timeframe: 时间周期
+            limit: 获取的K线数量
+            
+        Returns:
+            Dict[str, pandas.DataFrame]: 代码到市场数据的映射，获取失败的代码对应空DataFrame
+        """
+        if not symbols:
+            return {}
+        
+        def fetch(symbol):
+            try:
+                return self.get_market_data(symbol, timeframe, limit)
+            except Exception as e:
+                logging.error(f"获取{symbol}市场数据失败: {e}")
+                return pd.DataFrame()
+        
+        with ThreadPoolExecutor(max_workers=min(self.BATCH_WORKERS, len(symbols))) as executor:
+            return dict(zip(symbols, executor.map(fetch, symbols)))
+    
     @abstractmethod
     def get_ticker_info(self, symbol: str) -> Dict[str, Any]:
         """获取交易对/股票的基本信息
@@ -3,27 +3,51 @@
 """
 import json
 import os
+import threading
 import time
-from typing import Dict, List, Any, Optional
+from types import MappingProxyType
+from typing import Dict, List, Any, Optional, Tuple, Union
+import numpy as np
 import pandas as pd
+from cachetools import TLRUCache, cachedmethod
+from cachetools.keys import hashkey
 from binance.client import Client
 from binance.exceptions import BinanceAPIException, BinanceRequestException
 from dotenv import load_dotenv
 
-from src.data_api.base_api import BaseAPI
+from src.data_api.base_api import BaseAPI, OHLCV, cache_ttu, get_api_logger
 from config.constants import (
     TIMEFRAME_1M, TIMEFRAME_5M, TIMEFRAME_15M, TIMEFRAME_30M,
     TIMEFRAME_1H, TIMEFRAME_4H, TIMEFRAME_1D, TIMEFRAME_1W
 )
 
+# 优先使用orjson解析JSON，未安装时退回标准库
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+logger = get_api_logger(__name__)
+
 # 加载环境变量
 load_dotenv()
 
 class BinanceAPI(BaseAPI):
     """币安API实现类"""
     
+    # K线数据列名
+    KLINE_COLUMNS = [
+        'timestamp', 'open', 'high', 'low', 'close', 'volume',
+        'close_time', 'quote_asset_volume', 'number_of_trades',
+        'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
+    ]
+    
+    # 账户余额结构化数组类型
+    BALANCE_DTYPE = np.dtype([('asset', object), ('free', np.float64), ('locked', np.float64)])
+    
     # 时间周期映射
-    TIMEFRAME_MAP = {
+    TIMEFRAME_MAP = MappingProxyType({
         TIMEFRAME_1M: Client.KLINE_INTERVAL_1MINUTE,
         TIMEFRAME_5M: Client.KLINE_INTERVAL_5MINUTE,
         TIMEFRAME_15M: Client.KLINE_INTERVAL_15MINUTE,
@@ -32,7 +56,7 @@ class BinanceAPI(BaseAPI):
         TIMEFRAME_4H: Client.KLINE_INTERVAL_4HOUR,
         TIMEFRAME_1D: Client.KLINE_INTERVAL_1DAY,
         TIMEFRAME_1W: Client.KLINE_INTERVAL_1WEEK,
-    }
+    })
     
     def __init__(self, api_key: str = None, api_secret: str = None, config_path: str = None):
         """初始化币安API接口
@@ -43,6 +67,13 @@ class BinanceAPI(BaseAPI):
             config_path: 配置文件路径，如果api_key和api_secret为None则从配置文件读取
         """
         self.client = None
+        
+        # 接口结果缓存：交易规则每天更新，交易对列表每小时更新，行情每秒更新
+        self._exchange_info_cache = TLRUCache(maxsize=1, ttu=cache_ttu(86400))
+        self._trading_symbols_cache = TLRUCache(maxsize=1, ttu=cache_ttu(3600))
+        self._ticker_cache = TLRUCache(maxsize=256, ttu=cache_ttu(1))
+        # TLRUCache在读写时都会调整内部结构，多个线程共用实例时需要加锁
+        self._cache_lock = threading.Lock()
         self.api_key = api_key
         self.api_secret = api_secret
         self.config_path = config_path
@@ -65,15 +96,15 @@ class BinanceAPI(BaseAPI):
             config_path: 配置文件路径
         """
         try:
-            with open(config_path, 'r') as f:
-                config = json.load(f)
+            with open(config_path, 'rb') as f:
+                config = _json_loads(f.read())
                 # 只有在环境变量中未设置的情况下，才从配置文件加载
                 if not self.api_key:
                     self.api_key = config.get('api', {}).get('binance', {}).get('api_key')
                 if not self.api_secret:
                     self.api_secret = config.get('api', {}).get('binance', {}).get('api_secret')
         except (FileNotFoundError, json.JSONDecodeError) as e:
-            print(f"加载配置文件失败: {e}")
+            logger.error("加载配置文件失败: %s", e)
     
     def connect(self) -> bool:
         """连接到币安API
@@ -87,7 +118,7 @@ class BinanceAPI(BaseAPI):
             self.client.get_system_status()
             return True
         except (BinanceAPIException, BinanceRequestException) as e:
-            print(f"连接币安API失败: {e}")
+            logger.error("连接币安API失败: %s", e)
             return False
     
     def get_market_data(self, symbol: str, timeframe: str, limit: int = 100) -> pd.DataFrame:
@@ -106,9 +137,7 @@ class BinanceAPI(BaseAPI):
                 return pd.DataFrame()
         
         # 检查并转换时间周期格式
-        binance_timeframe = self.TIMEFRAME_MAP.get(timeframe)
-        if not binance_timeframe:
-            raise ValueError(f"不支持的时间周期: {timeframe}")
+        binance_timeframe = self._to_interval(timeframe)
         
         try:
             # 获取K线数据
@@ -118,27 +147,82 @@ class BinanceAPI(BaseAPI):
                 limit=limit
             )
             
-            # 转换为DataFrame
-            df = pd.DataFrame(klines, columns=[
-                'timestamp', 'open', 'high', 'low', 'close', 'volume',
-                'close_time', 'quote_asset_volume', 'number_of_trades',
-                'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
-            ])
+            return self._klines_to_dataframe(klines)
+        
+        except BinanceAPIException as e:
+            logger.error("获取市场数据失败: %s", e)
+            return pd.DataFrame()
+    
+    def get_market_data_soa(self, symbol: str, timeframe: str, limit: int = 100) -> Optional[OHLCV]:
+        """获取按列存储的市场行情数据，省去DataFrame的构造，适合直接做数值计算
+        
+        Args:
+            symbol: 交易对，例如 'BTCUSDT'
+            timeframe: 时间周期，例如 '1d'
+            limit: 获取的K线数量
             
-            # 转换数据类型
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            for col in ['open', 'high', 'low', 'close', 'volume']:
-                df[col] = df[col].astype(float)
+        Returns:
+            OHLCV: 各列均为连续float64数组的K线数据，失败时返回None
+        """
+        if not self.client:
+            if not self.connect():
+                return None
+        
+        binance_timeframe = self._to_interval(timeframe)
+        
+        try:
+            klines = self.client.get_klines(
+                symbol=symbol,
+                interval=binance_timeframe,
+                limit=limit
+            )
+            return self._parse_klines(klines)
+        
+        except BinanceAPIException as e:
+            logger.error("获取市场数据失败: %s", e)
+            return None
+    
+    def _to_interval(self, timeframe: str) -> str:
+        """转换为币安的K线周期
+        
+        Args:
+            timeframe: 时间周期，例如 '1d'
             
-            # 设置索引
-            df.set_index('timestamp', inplace=True)
+        Returns:
+            str: 币安K线周期
+        """
+        try:
+            return self.TIMEFRAME_MAP[timeframe]
+        except KeyError:
+            raise ValueError(f"不支持的时间周期: {timeframe}") from None
+    
+    def _parse_klines(self, klines: List[List[Any]]) -> OHLCV:
+        """将币安K线数据解析为按列存储的数组
+        
+        Args:
+            klines: 币安接口返回的K线列表
             
-            # 返回OHLCV数据
-            return df[['open', 'high', 'low', 'close', 'volume']]
+        Returns:
+            OHLCV: 各列均为连续数组的K线数据
+        """
+        # 一次性转换为二维数组，再按列批量转换类型
+        arr = np.array(klines, dtype=object).reshape(-1, len(self.KLINE_COLUMNS))
+        ohlcv = arr[:, 1:6].astype(np.float64).T.copy()
+        ts = arr[:, 0].astype(np.int64)
         
-        except BinanceAPIException as e:
-            print(f"获取市场数据失败: {e}")
-            return pd.DataFrame()
+        # 毫秒时间戳直接转换为datetime64，避免逐元素解析
+        return OHLCV((ts * 1_000_000).view('datetime64[ns]'), *ohlcv)
+    
+    def _klines_to_dataframe(self, klines: List[List[Any]]) -> pd.DataFrame:
+        """将币安K线数据转换为OHLCV格式的DataFrame
+        
+        Args:
+            klines: 币安接口返回的K线列表
+            
+        Returns:
+            pandas.DataFrame: 包含OHLCV的DataFrame
+        """
+        return self._parse_klines(klines).to_dataframe()
     
     def get_ticker_info(self, symbol: str) -> Dict[str, Any]:
         """获取交易对的基本信息
@@ -149,13 +233,43 @@ class BinanceAPI(BaseAPI):
         Returns:
             Dict: 包含交易对基本信息的字典
         """
+        return self.get_tickers_info([symbol]).get(symbol, {})
+    
+    def get_tickers_info(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """批量获取多个交易对的基本信息，未命中缓存的交易对合并为一次请求
+        
+        Args:
+            symbols: 交易对列表，例如 ['BTCUSDT', 'ETHUSDT']
+            
+        Returns:
+            Dict: 以交易对为键的基本信息字典，获取失败的交易对不包含在内
+        """
+        result = {}
+        missing = []
+        with self._cache_lock:
+            for symbol in symbols:
+                info = self._ticker_cache.get(hashkey(symbol))
+                if info is None:
+                    missing.append(symbol)
+                else:
+                    result[symbol] = info
+        
+        if not missing:
+            return result
+        
         if not self.client:
             if not self.connect():
-                return {}
+                return result
                 
         try:
-            ticker = self.client.get_ticker(symbol=symbol)
-            return {
+            # 24小时行情接口的symbols参数为JSON数组，一次返回所有交易对
+            tickers = self.client.get_ticker(symbols=json.dumps(missing, separators=(',', ':')))
+        except BinanceAPIException as e:
+            logger.error("获取交易对信息失败: %s", e)
+            return result
+        
+        for ticker in tickers:
+            info = {
                 'symbol': ticker['symbol'],
                 'price': float(ticker['lastPrice']),
                 'volume': float(ticker['volume']),
@@ -163,35 +277,62 @@ class BinanceAPI(BaseAPI):
                 'high_24h': float(ticker['highPrice']),
                 'low_24h': float(ticker['lowPrice']),
             }
+            with self._cache_lock:
+                self._ticker_cache[hashkey(info['symbol'])] = info
+            result[info['symbol']] = info
+        
+        return result
+    
+    @cachedmethod(lambda self: self._exchange_info_cache, lock=lambda self: self._cache_lock)
+    def get_exchange_info(self) -> Dict[str, Any]:
+        """获取交易所交易规则和交易对信息
+        
+        Returns:
+            Dict: 交易所信息，失败时返回空字典
+        """
+        if not self.client:
+            if not self.connect():
+                return {}
+        
+        try:
+            return self.client.get_exchange_info()
         except BinanceAPIException as e:
-            print(f"获取交易对信息失败: {e}")
+            logger.error("获取交易所信息失败: %s", e)
             return {}
     
-    def get_symbols(self, market: Optional[str] = None) -> List[str]:
+    @cachedmethod(lambda self: self._trading_symbols_cache, lock=lambda self: self._cache_lock)
+    def _get_trading_symbols(self) -> np.ndarray:
+        """获取处于交易状态的交易对数组，供按市场筛选时复用
+        
+        Returns:
+            np.ndarray: 交易对代码的定长字符串数组
+        """
+        exchange_info = self.get_exchange_info()
+        if not exchange_info:
+            return np.array([], dtype=str)
+        
+        return np.array([s['symbol'] for s in exchange_info['symbols'] if s['status'] == 'TRADING'], dtype=str)
+    
+    def get_symbols(self, market: Optional[Union[str, Tuple[str, ...]]] = None) -> List[str]:
         """获取可交易的所有交易对
         
         Args:
-            market: 可选，指定市场，如 'USDT'
+            market: 可选，指定市场，如 'USDT'，也可传入多个市场如 ('USDT', 'BUSD')
             
         Returns:
             List[str]: 交易对代码列表
         """
-        if not self.client:
-            if not self.connect():
-                return []
-                
-        try:
-            exchange_info = self.client.get_exchange_info()
-            symbols = [s['symbol'] for s in exchange_info['symbols'] if s['status'] == 'TRADING']
+        symbols = self._get_trading_symbols()
+        
+        # 如果指定了市场，用NumPy字符串运算批量过滤交易对
+        if market:
+            suffixes = (market,) if isinstance(market, str) else market
+            mask = np.zeros(len(symbols), dtype=bool)
+            for suffix in suffixes:
+                mask |= np.char.endswith(symbols, suffix)
+            symbols = symbols[mask]
             
-            # 如果指定了市场，过滤交易对
-            if market:
-                symbols = [s for s in symbols if s.endswith(market)]
-                
-            return symbols
-        except BinanceAPIException as e:
-            print(f"获取交易对列表失败: {e}")
-            return []
+        return symbols.tolist()
     
     def place_order(self, symbol: str, order_type: str, side: str, 
                     amount: float, price: Optional[float] = None) -> Dict[str, Any]:
@@ -244,7 +385,7 @@ class BinanceAPI(BaseAPI):
             }
             
         except BinanceAPIException as e:
-            print(f"下单失败: {e}")
+            logger.error("下单失败: %s", e)
             return {}
     
     def get_order_status(self, order_id: str, symbol: str) -> Dict[str, Any]:
@@ -274,7 +415,7 @@ class BinanceAPI(BaseAPI):
                 'cummulative_quote_qty': float(order['cummulativeQuoteQty']),
             }
         except BinanceAPIException as e:
-            print(f"获取订单状态失败: {e}")
+            logger.error("获取订单状态失败: %s", e)
             return {}
     
     def cancel_order(self, order_id: str, symbol: str) -> bool:
@@ -295,7 +436,7 @@ class BinanceAPI(BaseAPI):
             result = self.client.cancel_order(symbol=symbol, orderId=order_id)
             return result['status'] == 'CANCELED'
         except BinanceAPIException as e:
-            print(f"取消订单失败: {e}")
+            logger.error("取消订单失败: %s", e)
             return False
     
     def get_account_info(self) -> Dict[str, Any]:
@@ -311,13 +452,22 @@ class BinanceAPI(BaseAPI):
         try:
             account = self.client.get_account()
             
-            # 筛选有余额的资产
+            # 按已知长度直接写入结构化数组，不生成中间列表，再用掩码筛选有余额的资产
+            raw_balances = account['balances']
+            raw = np.fromiter(
+                ((b['asset'], b['free'], b['locked']) for b in raw_balances),
+                dtype=self.BALANCE_DTYPE,
+                count=len(raw_balances)
+            )
+            held = raw[(raw['free'] > 0) | (raw['locked'] > 0)]
+            totals = held['free'] + held['locked']
+            
             balances = [{
-                'asset': b['asset'],
-                'free': float(b['free']),
-                'locked': float(b['locked']),
-                'total': float(b['free']) + float(b['locked'])
-            } for b in account['balances'] if float(b['free']) > 0 or float(b['locked']) > 0]
+                'asset': asset,
+                'free': free,
+                'locked': locked,
+                'total': total
+            } for (asset, free, locked), total in zip(held.tolist(), totals.tolist())]
             
             return {
                 'account_type': account['accountType'],
@@ -326,5 +476,5 @@ class BinanceAPI(BaseAPI):
                 'balances': balances
             }
         except BinanceAPIException as e:
-            print(f"获取账户信息失败: {e}")
+            logger.error("获取账户信息失败: %s", e)
             return {}
\ No newline at end of file
@@ -1,25 +1,33 @@
 """
 富途API接口，用于获取港股、美股和A股数据
 """
-import logging
+import atexit
+import threading
+import time
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Any, Optional, Tuple
-from datetime import datetime, timedelta
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from cachetools import TLRUCache
+from cachetools.keys import hashkey
 
-from src.data_api.base_api import BaseDataAPI
+from src.data_api.base_api import BaseDataAPI, cache_ttu, get_api_logger
 from config.constants import (
     MARKET_TYPE_A_SHARE, MARKET_TYPE_US, MARKET_TYPE_HK,
     ORDER_TYPE_MARKET, ORDER_TYPE_LIMIT,
     ORDER_SIDE_BUY, ORDER_SIDE_SELL
 )
 
+logger = get_api_logger(__name__)
+
 # 尝试导入富途API，如果失败则使用模拟模式
 try:
     import futu as ft
     FUTU_AVAILABLE = True
 except ImportError:
-    logging.warning("未安装富途API(futu-api)，将使用模拟模式")
+    logger.warning("未安装富途API(futu-api)，将使用模拟模式")
     FUTU_AVAILABLE = False
     
     # 创建模拟的富途API类，用于测试
@@ -34,7 +42,7 @@ except ImportError:
             K_60M = "60m"
             K_DAY = "1d"
             K_WEEK = "1w"
-            K_MONTH = "1M"
+            K_MON = "1M"
         
         class TrdEnv:
             SIMULATE = 0
@@ -66,23 +74,26 @@ except ImportError:
             self.host = host
             self.port = port
             self.connected = True
+            # 每个上下文独立的随机数生成器，连接池保证同一上下文不会被并发使用
+            self._rng = np.random.default_rng()
             
         def close(self):
             self.connected = False
             
         def get_market_snapshot(self, code_list):
             """获取市场快照"""
+            n = len(code_list)
             data = {
                 'code': code_list,
                 'name': [f"模拟股票{code}" for code in code_list],
-                'last_price': [np.random.uniform(10, 1000) for _ in code_list],
-                'open_price': [np.random.uniform(10, 1000) for _ in code_list],
-                'high_price': [np.random.uniform(10, 1000) for _ in code_list],
-                'low_price': [np.random.uniform(10, 1000) for _ in code_list],
-                'volume': [np.random.randint(1000, 10000000) for _ in code_list],
-                'turnover': [np.random.randint(1000000, 1000000000) for _ in code_list],
-                'pe_ratio': [np.random.uniform(5, 50) for _ in code_list],
-                'lot_size': [100 for _ in code_list]
+                'last_price': self._rng.uniform(10, 1000, size=n),
+                'open_price': self._rng.uniform(10, 1000, size=n),
+                'high_price': self._rng.uniform(10, 1000, size=n),
+                'low_price': self._rng.uniform(10, 1000, size=n),
+                'volume': self._rng.integers(1000, 10000000, size=n),
+                'turnover': self._rng.integers(1000000, 1000000000, size=n),
+                'pe_ratio': self._rng.uniform(5, 50, size=n),
+                'lot_size': [100] * n
             }
             
             df = pd.DataFrame(data)
@@ -91,30 +102,24 @@ except ImportError:
         def request_history_kline(self, code, start=None, end=None, ktype=None, max_count=1000):
             """获取历史K线数据"""
             # 生成模拟的K线数据
-            now = datetime.now()
-            dates = [now - timedelta(days=i) for i in range(max_count)]
-            dates.reverse()
-            
-            # 生成随机价格
-            last_price = np.random.uniform(50, 200)
-            prices = []
-            volumes = []
+            dates = pd.date_range(end=datetime.now(), periods=max_count, freq='D')
             
-            for i in range(max_count):
-                change = np.random.normal(0, 1)
-                last_price = max(last_price + change, 1)  # 确保价格为正
-                prices.append(last_price)
-                volumes.append(np.random.randint(1000, 10000000))
+            # 生成随机价格：每步价格不低于1的随机游走，
+            # 等价于对累计和做一次下界反射，无需逐步循环
+            walk = self._rng.uniform(50, 200) - 1 + np.cumsum(self._rng.normal(0, 1, size=max_count))
+            prices = 1 + walk - np.minimum(np.minimum.accumulate(walk), 0)
+            volumes = self._rng.integers(1000, 10000000, size=max_count)
             
             data = {
-                'code': [code] * max_count,
+                # 代码列取值唯一，直接构造分类列，避免pandas逐个推断字符串列表的类型
+                'code': pd.Categorical.from_codes(np.zeros(max_count, dtype=np.int8), categories=[code]),
                 'time_key': dates,
                 'open': prices,
-                'high': [p + np.random.uniform(0, 2) for p in prices],
-                'low': [p - np.random.uniform(0, 2) for p in prices],
+                'high': prices + self._rng.uniform(0, 2, size=max_count),
+                'low': prices - self._rng.uniform(0, 2, size=max_count),
                 'close': prices,
                 'volume': volumes,
-                'turnover': [v * p for v, p in zip(volumes, prices)]
+                'turnover': volumes * prices
             }
             
             df = pd.DataFrame(data)
@@ -130,6 +135,7 @@ except ImportError:
             self.trd_env = trd_env
             self.acc_id = acc_id
             self.connected = True
+            self._rng = np.random.default_rng()
             
         def close(self):
             self.connected = False
@@ -137,38 +143,35 @@ except ImportError:
         def place_order(self, code, qty, trd_side, order_type=None, price=None, trd_mkt=None):
             """下单"""
             data = {
-                'code': [code],
-                'order_id': [f"mock-order-{np.random.randint(10000, 99999)}"],
-                'qty': [qty],
-                'price': [price if price is not None else 0],
-                'trd_side': [trd_side],
-                'order_status': ['已提交']
+                'code': code,
+                'order_id': f"mock-order-{self._rng.integers(10000, 99999)}",
+                'qty': qty,
+                'price': price if price is not None else 0,
+                'trd_side': trd_side,
+                'order_status': '已提交'
             }
             
-            df = pd.DataFrame(data)
-            return MockFutuAPI.RET_OK, df
+            return MockFutuAPI.RET_OK, data
             
         def modify_order(self, order_id, qty=None, price=None):
             """修改订单"""
             data = {
-                'order_id': [order_id],
-                'qty': [qty if qty is not None else 0],
-                'price': [price if price is not None else 0],
-                'order_status': ['已修改']
+                'order_id': order_id,
+                'qty': qty if qty is not None else 0,
+                'price': price if price is not None else 0,
+                'order_status': '已修改'
             }
             
-            df = pd.DataFrame(data)
-            return MockFutuAPI.RET_OK, df
+            return MockFutuAPI.RET_OK, data
             
         def cancel_order(self, order_id):
             """取消订单"""
             data = {
-                'order_id': [order_id],
-                'order_status': ['已取消']
+                'order_id': order_id,
+                'order_status': '已取消'
             }
             
-            df = pd.DataFrame(data)
-            return MockFutuAPI.RET_OK, df
+            return MockFutuAPI.RET_OK, data
             
         def get_order_list(self, status_filter_list=None):
             """获取订单列表"""
@@ -200,14 +203,13 @@ except ImportError:
         def get_account_info(self):
             """获取账户信息"""
             data = {
-                'power': [100000],  # 购买力
-                'total_assets': [500000],  # 总资产
-                'cash': [200000],  # 现金
-                'market_value': [300000]  # 持仓市值
+                'power': 100000,  # 购买力
+                'total_assets': 500000,  # 总资产
+                'cash': 200000,  # 现金
+                'market_value': 300000  # 持仓市值
             }
             
-            df = pd.DataFrame(data)
-            return MockFutuAPI.RET_OK, df
+            return MockFutuAPI.RET_OK, data
     
     # 替换富途API的主要类
     ft = MockFutuAPI()
@@ -217,9 +219,238 @@ except ImportError:
     ft.OpenCNTradeContext = MockTradingContext
 
 
+def _first_row(data) -> Dict[str, Any]:
+    """取单行结果的第一行为字典，模拟模式下已是字典时直接返回
+    
+    Args:
+        data: 富途接口返回的DataFrame或字典
+        
+    Returns:
+        Dict: 第一行数据，没有数据时返回空字典
+    """
+    if isinstance(data, dict):
+        return data
+    if isinstance(data, pd.DataFrame) and not data.empty:
+        return data.iloc[0].to_dict()
+    return {}
+
+
+# 取值重复度高的列，转为分类类型以节省内存并加速groupby/merge
+_CATEGORY_COLUMNS = ('code', 'trd_side', 'order_status')
+
+
+def _to_category(data: pd.DataFrame) -> pd.DataFrame:
+    """将代码、买卖方向和订单状态列转为分类类型
+    
+    Args:
+        data: 富途接口返回的DataFrame
+        
+    Returns:
+        pd.DataFrame: 原地转换后的DataFrame
+    """
+    for col in _CATEGORY_COLUMNS:
+        if col in data.columns:
+            data[col] = data[col].astype('category')
+    return data
+
+
+# 时间周期对应的富途K线类型
+_KTYPE_MAP = {
+    '1m': ft.KLType.K_1M,
+    '5m': ft.KLType.K_5M,
+    '15m': ft.KLType.K_15M,
+    '30m': ft.KLType.K_30M,
+    '1h': ft.KLType.K_60M,
+    '1d': ft.KLType.K_DAY,
+    '1w': ft.KLType.K_WEEK,
+    '1M': ft.KLType.K_MON
+}
+
+# 代码前缀对应的市场类型
+_PREFIX_MARKETS = {
+    'HK': MARKET_TYPE_HK,
+    'US': MARKET_TYPE_US,
+    'SH': MARKET_TYPE_A_SHARE,
+    'SZ': MARKET_TYPE_A_SHARE
+}
+
+# 6位A股代码的首位数字：沪市6/5/9，深市0/1/2/3
+_A_SHARE_LEADING_DIGITS = frozenset('6590123')
+
+# 进程内共享的富途连接池，键为(上下文类型, host, port, ...)，所有FutuAPI实例复用同一组连接
+_CTX_POOLS: Dict[Tuple, '_ContextPool'] = {}
+_CTX_LOCK = threading.Lock()
+
+# 连接健康检查的最小间隔（秒），避免每次调用都探测
+_HEALTH_CHECK_INTERVAL = 30
+
+# 连接全部借出时等待归还的最长时间（秒）
+_CHECKOUT_TIMEOUT = 30
+
+
+def _is_ctx_alive(ctx) -> bool:
+    """探测连接是否可用
+    
+    Args:
+        ctx: 富途行情或交易上下文
+        
+    Returns:
+        bool: 连接是否可用
+    """
+    if getattr(ctx, 'connected', True) is False:
+        return False
+    
+    # 只有行情上下文提供全局状态查询，交易上下文按连接标志判断
+    get_global_state = getattr(ctx, 'get_global_state', None)
+    if get_global_state is None:
+        return True
+    
+    try:
+        ret, _ = get_global_state()
+        return ret == ft.RET_OK
+    except Exception:
+        return False
+
+
+class _ContextPool:
+    """同一连接键下的一组富途上下文
+    
+    调用方借出上下文、用完归还，同一条连接同时只被一个线程使用。
+    连接按需创建，最多size条，全部借出时后来的调用方阻塞等待归还。
+    """
+    
+    def __init__(self, key: Tuple, factory, size: int):
+        """初始化连接池
+        
+        Args:
+            key: 连接池键，用于日志
+            factory: 创建上下文的函数
+            size: 最大连接数
+        """
+        self.key = key
+        self.factory = factory
+        self.size = max(1, size)
+        
+        # 空闲连接及其上次健康检查时间，后进先出以优先复用最近用过的连接
+        self._idle: List[Tuple[Any, float]] = []
+        self._opened = 0
+        # 连接归还或新建失败让出名额时通知等待的线程
+        self._cond = threading.Condition()
+    
+    def _open(self):
+        """新建一条连接，失败时归还名额并唤醒一个等待的线程，由它重新尝试"""
+        try:
+            return self.factory(), time.monotonic()
+        except Exception:
+            with self._cond:
+                self._opened -= 1
+                self._cond.notify()
+            raise
+    
+    def _checkout(self) -> Tuple[Any, float]:
+        """借出一条连接，必要时新建或等待其他线程归还
+        
+        Raises:
+            TimeoutError: 等待超过_CHECKOUT_TIMEOUT秒仍没有可用连接
+        """
+        deadline = time.monotonic() + _CHECKOUT_TIMEOUT
+        with self._cond:
+            while not self._idle and self._opened >= self.size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"等待富途连接超时: {self.key}")
+                self._cond.wait(remaining)
+            
+            if not self._idle:
+                self._opened += 1
+                idle = None
+            else:
+                idle = self._idle.pop()
+        
+        if idle is None:
+            return self._open()
+        
+        ctx, checked_at = idle
+        now = time.monotonic()
+        if now - checked_at < _HEALTH_CHECK_INTERVAL:
+            return ctx, checked_at
+        
+        if _is_ctx_alive(ctx):
+            return ctx, now
+        
+        logger.warning("富途连接已断开，重新连接: %s", self.key)
+        _close_ctx(ctx)
+        return self._open()
+    
+    @contextmanager
+    def borrow(self):
+        """借出连接，退出with块时自动归还
+        
+        Yields:
+            富途行情或交易上下文
+        """
+        ctx, checked_at = self._checkout()
+        try:
+            yield ctx
+        finally:
+            with self._cond:
+                self._idle.append((ctx, checked_at))
+                self._cond.notify()
+    
+    def close(self):
+        """关闭所有空闲连接"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._opened -= len(idle)
+            self._cond.notify_all()
+        for ctx, _ in idle:
+            _close_ctx(ctx)
+
+
+def _get_ctx_pool(key: Tuple, factory, size: int = 1) -> _ContextPool:
+    """获取连接池，不存在时创建
+    
+    Args:
+        key: 连接池键
+        factory: 创建上下文的函数
+        size: 最大连接数，仅在首次创建连接池时生效
+        
+    Returns:
+        _ContextPool: 连接池
+    """
+    with _CTX_LOCK:
+        pool = _CTX_POOLS.get(key)
+        if pool is None:
+            pool = _CTX_POOLS[key] = _ContextPool(key, factory, size)
+        return pool
+
+
+def _close_ctx(ctx):
+    """关闭单个上下文，忽略关闭时的异常"""
+    try:
+        ctx.close()
+    except Exception as e:
+        logger.error("关闭连接异常: %s", e)
+
+
+@atexit.register
+def _close_pooled_ctxs():
+    """进程退出时关闭连接池中的所有连接"""
+    with _CTX_LOCK:
+        for pool in _CTX_POOLS.values():
+            pool.close()
+        _CTX_POOLS.clear()
+
+
 class FutuAPI(BaseDataAPI):
     """富途API封装"""
     
+    # 快照接口单次请求的最大代码数
+    SNAPSHOT_MAX_CODES = 400
+    
+    # K线时间列的格式
+    TIME_KEY_FORMAT = '%Y-%m-%d %H:%M:%S'
+    
     def __init__(self, config: Dict[str, Any]):
         """初始化富途API
         
@@ -233,45 +464,60 @@ class FutuAPI(BaseDataAPI):
         self.port = config.get('port', 11111)
         self.trd_env = config.get('trd_env', ft.TrdEnv.SIMULATE)  # 默认使用模拟环境
         self.acc_id = config.get('acc_id')
+        self.quote_pool_size = config.get('quote_pool', 4)  # 行情连接数，并发请求时各自占用一条连接
+        
+        # 行情快照缓存，1秒内的重复查询直接返回
+        self._ticker_cache = TLRUCache(maxsize=256, ttu=cache_ttu(1))
+        # TLRUCache在读写时都会调整内部结构，多个线程共用实例时需要加锁
+        self._cache_lock = threading.Lock()
         
-        # 初始化行情和交易API
-        self.quote_ctx = None
-        self.trade_ctx_hk = None
-        self.trade_ctx_us = None
-        self.trade_ctx_cn = None
+        # 连接池键，同一网关和账户的实例共享连接
+        self._quote_key = ('quote', self.host, self.port)
+        self._trade_key = (self.host, self.port, self.trd_env, self.acc_id)
         
         # 市场与交易上下文的映射
         self.market_trade_ctx = {
-            MARKET_TYPE_HK: lambda: self._get_hk_trade_ctx(),
-            MARKET_TYPE_US: lambda: self._get_us_trade_ctx(),
-            MARKET_TYPE_A_SHARE: lambda: self._get_cn_trade_ctx()
+            MARKET_TYPE_HK: self._borrow_hk_trade_ctx,
+            MARKET_TYPE_US: self._borrow_us_trade_ctx,
+            MARKET_TYPE_A_SHARE: self._borrow_cn_trade_ctx
         }
         
-    def _get_quote_ctx(self):
-        """获取行情上下文"""
-        if self.quote_ctx is None:
-            self.quote_ctx = ft.OpenQuoteContext(host=self.host, port=self.port)
-        return self.quote_ctx
-    
-    def _get_hk_trade_ctx(self):
-        """获取港股交易上下文"""
-        if self.trade_ctx_hk is None:
-            self.trade_ctx_hk = ft.OpenHKTradeContext(host=self.host, port=self.port, trd_env=self.trd_env, acc_id=self.acc_id)
-        return self.trade_ctx_hk
-    
-    def _get_us_trade_ctx(self):
-        """获取美股交易上下文"""
-        if self.trade_ctx_us is None:
-            self.trade_ctx_us = ft.OpenUSTradeContext(host=self.host, port=self.port, trd_env=self.trd_env, acc_id=self.acc_id)
-        return self.trade_ctx_us
-    
-    def _get_cn_trade_ctx(self):
-        """获取A股交易上下文"""
-        if self.trade_ctx_cn is None:
-            self.trade_ctx_cn = ft.OpenCNTradeContext(host=self.host, port=self.port, trd_env=self.trd_env, acc_id=self.acc_id)
-        return self.trade_ctx_cn
-    
-    def _convert_ktype(self, timeframe: str) -> str:
+    def _borrow_quote_ctx(self):
+        """借出行情上下文，需配合with使用"""
+        return _get_ctx_pool(
+            self._quote_key,
+            lambda: ft.OpenQuoteContext(host=self.host, port=self.port),
+            self.quote_pool_size
+        ).borrow()
+    
+    def _borrow_trade_ctx(self, name: str, factory):
+        """借出交易上下文，需配合with使用
+        
+        交易连接保存解锁状态且下单需要保持顺序，每个市场只保留一条连接。
+        
+        Args:
+            name: 交易市场名称
+            factory: 富途交易上下文类
+        """
+        return _get_ctx_pool(
+            (name,) + self._trade_key,
+            lambda: factory(host=self.host, port=self.port, trd_env=self.trd_env, acc_id=self.acc_id)
+        ).borrow()
+    
+    def _borrow_hk_trade_ctx(self):
+        """借出港股交易上下文"""
+        return self._borrow_trade_ctx('trade_hk', ft.OpenHKTradeContext)
+    
+    def _borrow_us_trade_ctx(self):
+        """借出美股交易上下文"""
+        return self._borrow_trade_ctx('trade_us', ft.OpenUSTradeContext)
+    
+    def _borrow_cn_trade_ctx(self):
+        """借出A股交易上下文"""
+        return self._borrow_trade_ctx('trade_cn', ft.OpenCNTradeContext)
+    
+    @staticmethod
+    def _convert_ktype(timeframe: str) -> str:
         """转换时间周期格式
         
         Args:
@@ -280,19 +526,10 @@ class FutuAPI(BaseDataAPI):
         Returns:
             str: 富途API中的K线类型
         """
-        ktype_map = {
-            '1m': ft.KLType.K_1M,
-            '5m': ft.KLType.K_5M,
-            '15m': ft.KLType.K_15M,
-            '30m': ft.KLType.K_30M,
-            '1h': ft.KLType.K_60M,
-            '1d': ft.KLType.K_DAY,
-            '1w': ft.KLType.K_WEEK,
-            '1M': ft.KLType.K_MON  # 修改这里，使用正确的月线枚举值
-        }
-        return ktype_map.get(timeframe, ft.KLType.K_DAY)
+        return _KTYPE_MAP.get(timeframe, ft.KLType.K_DAY)
     
-    def _convert_order_type(self, order_type: str) -> int:
+    @staticmethod
+    def _convert_order_type(order_type: str) -> int:
         """转换订单类型
         
         Args:
@@ -306,7 +543,8 @@ class FutuAPI(BaseDataAPI):
         else:
             return ft.OrderType.NORMAL
     
-    def _convert_order_side(self, side: str) -> int:
+    @staticmethod
+    def _convert_order_side(side: str) -> int:
         """转换交易方向
         
         Args:
@@ -320,8 +558,10 @@ class FutuAPI(BaseDataAPI):
         else:
             return ft.TrdSide.SELL
     
-    def _get_market_from_symbol(self, symbol: str) -> str:
-        """从代码中识别市场类型
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _get_market_from_symbol(symbol: str) -> str:
+        """从代码中识别市场类型，结果按代码缓存
         
         Args:
             symbol: 股票代码
@@ -329,22 +569,19 @@ class FutuAPI(BaseDataAPI):
         Returns:
             str: 市场类型
         """
-        # 移除可能存在的前缀
-        clean_symbol = symbol.split('.')[-1].strip()
-        
-        if symbol.startswith(('HK.', 'hk.')):
-            return MARKET_TYPE_HK
-        elif symbol.startswith(('US.', 'us.')):
-            return MARKET_TYPE_US
-        elif symbol.startswith(('SH.', 'sh.', 'SZ.', 'sz.')):
-            return MARKET_TYPE_A_SHARE
-        # 尝试根据代码格式猜测市场
-        elif clean_symbol.isdigit():
+        prefix, dot, _ = symbol.partition('.')
+        
+        # 带前缀的代码直接查表
+        market = _PREFIX_MARKETS.get(prefix.upper()) if dot else None
+        if market:
+            return market
+        
+        # 移除可能存在的前缀后，尝试根据代码格式猜测市场
+        clean_symbol = symbol.rpartition('.')[2].strip()
+        if clean_symbol.isdigit():
             if len(clean_symbol) == 6:
                 # 假设是A股代码
-                if clean_symbol.startswith(('6', '5', '9')):
-                    return MARKET_TYPE_A_SHARE
-                elif clean_symbol.startswith(('0', '1', '2', '3')):
+                if clean_symbol[0] in _A_SHARE_LEADING_DIGITS:
                     return MARKET_TYPE_A_SHARE
             elif len(clean_symbol) == 5 or (len(clean_symbol) == 4 and clean_symbol.startswith('0')):
                 # 港股代码：5位数字，或者4位数字前导0
@@ -352,8 +589,10 @@ class FutuAPI(BaseDataAPI):
         # 默认归为港股（因为腾讯是港股）
         return MARKET_TYPE_HK
     
-    def _format_symbol(self, symbol: str, market: Optional[str] = None) -> str:
-        """格式化代码为富途API需要的格式
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _format_symbol(symbol: str, market: Optional[str] = None) -> str:
+        """格式化代码为富途API需要的格式，结果按代码缓存
         
         Args:
             symbol: 原始代码
@@ -363,15 +602,16 @@ class FutuAPI(BaseDataAPI):
             str: 格式化后的代码
         """
         # 如果已经是标准格式，则直接返回
-        if '.' in symbol and symbol.split('.')[0] in ['HK', 'US', 'SH', 'SZ']:
+        prefix, dot, _ = symbol.partition('.')
+        if dot and prefix in _PREFIX_MARKETS:
             return symbol
         
+        # 移除可能存在的前缀
+        clean_symbol = symbol.rpartition('.')[2]
+        
         # 获取市场类型
         if market is None:
-            market = self._get_market_from_symbol(symbol)
-        
-        # 移除可能存在的前缀
-        clean_symbol = symbol.split('.')[-1]
+            market = FutuAPI._get_market_from_symbol(symbol)
         
         # 根据市场类型添加前缀
         if market == MARKET_TYPE_HK:
@@ -399,17 +639,17 @@ class FutuAPI(BaseDataAPI):
             limit: 返回的K线数量
             
         Returns:
-            pd.DataFrame: K线数据
+            pd.DataFrame: K线数据，失败时返回共享的空DataFrame，不可修改
         """
         try:
             formatted_symbol = self._format_symbol(symbol)
-            logging.info(f"请求K线数据，格式化后的代码: {formatted_symbol}, 时间周期: {timeframe}")
+            logger.info("请求K线数据，格式化后的代码: %s, 时间周期: %s", formatted_symbol, timeframe)
             
-            quote_ctx = self._get_quote_ctx()
             ktype = self._convert_ktype(timeframe)
             
             # 获取历史K线，富途API返回的是 (ret_code, data, if_req_data_forward)
-            result = quote_ctx.request_history_kline(formatted_symbol, ktype=ktype, max_count=limit)
+            with self._borrow_quote_ctx() as quote_ctx:
+                result = quote_ctx.request_history_kline(formatted_symbol, ktype=ktype, max_count=limit)
             
             # 根据返回值的个数解包
             if len(result) == 2:
@@ -417,33 +657,34 @@ class FutuAPI(BaseDataAPI):
             elif len(result) == 3:
                 ret, data, _ = result
             else:
-                logging.error(f"富途API返回值格式异常: {result}")
+                logger.error("富途API返回值格式异常: %s", result)
                 return pd.DataFrame()
             
             if ret == ft.RET_OK:
-                data = data.rename(columns={
-                    'time_key': 'timestamp',
-                    'open': 'open',
-                    'high': 'high',
-                    'low': 'low',
-                    'close': 'close',
-                    'volume': 'volume',
-                    'turnover': 'turnover'
-                })
+                # 其余列名与富途一致，只需重命名时间列
+                data = data.rename(columns={'time_key': 'timestamp'})
+                
+                # 单只股票的K线代码列取值唯一，直接构造分类列，无需逐行处理字符串
+                if 'code' in data.columns:
+                    data['code'] = pd.Categorical.from_codes(
+                        np.zeros(len(data), dtype=np.int8), categories=[formatted_symbol]
+                    )
                 
                 if 'timestamp' in data.columns:
-                    data['timestamp'] = pd.to_datetime(data['timestamp'])
-                    data = data.set_index('timestamp')
+                    # 富途返回固定格式的时间字符串，指定格式走快速解析路径
+                    if not pd.api.types.is_datetime64_any_dtype(data['timestamp']):
+                        data['timestamp'] = pd.to_datetime(
+                            data['timestamp'], format=self.TIME_KEY_FORMAT, cache=True
+                        )
+                    data.set_index('timestamp', inplace=True)
                 
                 return data
             else:
-                logging.error(f"获取K线数据失败: {data}")
+                logger.error("获取K线数据失败: %s", data)
                 return pd.DataFrame()
             
         except Exception as e:
-            logging.error(f"获取K线数据异常: {e}")
-            import traceback
-            logging.error(traceback.format_exc())
+            logger.exception("获取K线数据异常: %s", e)
             return pd.DataFrame()
     
     def get_ticker_info(self, symbol: str) -> Dict[str, Any]:
@@ -455,27 +696,55 @@ class FutuAPI(BaseDataAPI):
         Returns:
             Dict: 股票信息
         """
-        try:
-            # 格式化代码
-            formatted_symbol = self._format_symbol(symbol)
-            
-            # 获取行情上下文
-            quote_ctx = self._get_quote_ctx()
+        return self.get_tickers_info([symbol]).get(symbol, {})
+    
+    def get_tickers_info(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """批量获取股票信息，未命中缓存的代码合并为一次快照请求
+        
+        富途快照接口每次最多查询400个代码，超出时分批请求。
+        
+        Args:
+            symbols: 股票代码列表
             
-            # 获取快照数据
-            ret, data = quote_ctx.get_market_snapshot([formatted_symbol])
+        Returns:
+            Dict: 以传入代码为键的股票信息字典，获取失败的代码不包含在内
+        """
+        result = {}
+        missing = {}  # 格式化后的代码 -> 传入的代码
+        with self._cache_lock:
+            for symbol in symbols:
+                info = self._ticker_cache.get(hashkey(symbol))
+                if info is None:
+                    missing[self._format_symbol(symbol)] = symbol
+                else:
+                    result[symbol] = info
+        
+        if not missing:
+            return result
+        
+        try:
+            codes = list(missing)
             
-            if ret == ft.RET_OK and not data.empty:
+            for i in range(0, len(codes), self.SNAPSHOT_MAX_CODES):
+                # 获取快照数据，每批单独借出连接，便于其他线程穿插请求
+                with self._borrow_quote_ctx() as quote_ctx:
+                    ret, data = quote_ctx.get_market_snapshot(codes[i:i + self.SNAPSHOT_MAX_CODES])
+                
+                if ret != ft.RET_OK or data.empty:
+                    logger.error("获取股票信息失败: %s", data)
+                    continue
+                
                 # 转换为字典
-                info = data.iloc[0].to_dict()
-                return info
-            else:
-                logging.error(f"获取股票信息失败: {data}")
-                return {}
+                for info in data.to_dict(orient='records'):
+                    symbol = missing.get(info['code'], info['code'])
+                    with self._cache_lock:
+                        self._ticker_cache[hashkey(symbol)] = info
+                    result[symbol] = info
             
         except Exception as e:
-            logging.error(f"获取股票信息异常: {e}")
-            return {}
+            logger.error("获取股票信息异常: %s", e)
+        
+        return result
     
     def place_order(self, symbol: str, quantity: float, side: str, 
                    order_type: str = ORDER_TYPE_MARKET, price: Optional[float] = None) -> Dict[str, Any]:
@@ -498,33 +767,30 @@ class FutuAPI(BaseDataAPI):
             # 获取市场类型
             market = self._get_market_from_symbol(formatted_symbol)
             
-            # 获取对应的交易上下文
-            trade_ctx = self.market_trade_ctx.get(market, self._get_hk_trade_ctx)()
-            
             # 转换订单类型和方向
             ft_order_type = self._convert_order_type(order_type)
             ft_side = self._convert_order_side(side)
             
-            # 下单
-            ret, data = trade_ctx.place_order(
-                code=formatted_symbol,
-                qty=quantity,
-                trd_side=ft_side,
-                order_type=ft_order_type,
-                price=price,
-                trd_mkt=market
-            )
-            
-            if ret and not data.empty:
-                # 转换为字典
-                order_info = data.iloc[0].to_dict()
+            # 借出对应的交易上下文并下单
+            with self.market_trade_ctx.get(market, self._borrow_hk_trade_ctx)() as trade_ctx:
+                ret, data = trade_ctx.place_order(
+                    code=formatted_symbol,
+                    qty=quantity,
+                    trd_side=ft_side,
+                    order_type=ft_order_type,
+                    price=price,
+                    trd_mkt=market
+                )
+            
+            order_info = _first_row(data) if ret == ft.RET_OK else {}
+            if order_info:
                 return order_info
             else:
-                logging.error(f"下单失败: {data}")
+                logger.error("下单失败: %s", data)
                 return {}
             
         except Exception as e:
-            logging.error(f"下单异常: {e}")
+            logger.error("下单异常: %s", e)
             return {}
     
     def get_account_info(self, market: str = MARKET_TYPE_HK) -> Dict[str, Any]:
@@ -537,22 +803,19 @@ class FutuAPI(BaseDataAPI):
             Dict: 账户信息
         """
         try:
-            # 获取对应的交易上下文
-            trade_ctx = self.market_trade_ctx.get(market, self._get_hk_trade_ctx)()
-            
-            # 获取账户信息
-            ret, data = trade_ctx.get_account_info()
+            # 借出对应的交易上下文
+            with self.market_trade_ctx.get(market, self._borrow_hk_trade_ctx)() as trade_ctx:
+                ret, data = trade_ctx.get_account_info()
             
-            if ret and not data.empty:
-                # 转换为字典
-                account_info = data.iloc[0].to_dict()
+            account_info = _first_row(data) if ret == ft.RET_OK else {}
+            if account_info:
                 return account_info
             else:
-                logging.error(f"获取账户信息失败: {data}")
+                logger.error("获取账户信息失败: %s", data)
                 return {}
             
         except Exception as e:
-            logging.error(f"获取账户信息异常: {e}")
+            logger.error("获取账户信息异常: %s", e)
             return {}
     
     def get_positions(self, market: str = MARKET_TYPE_HK) -> pd.DataFrame:
@@ -562,23 +825,21 @@ class FutuAPI(BaseDataAPI):
             market: 市场类型
             
         Returns:
-            pd.DataFrame: 持仓信息
+            pd.DataFrame: 持仓信息，失败时返回共享的空DataFrame，不可修改
         """
         try:
-            # 获取对应的交易上下文
-            trade_ctx = self.market_trade_ctx.get(market, self._get_hk_trade_ctx)()
-            
-            # 获取持仓列表
-            ret, data = trade_ctx.get_position_list()
+            # 借出对应的交易上下文
+            with self.market_trade_ctx.get(market, self._borrow_hk_trade_ctx)() as trade_ctx:
+                ret, data = trade_ctx.get_position_list()
             
-            if ret:
-                return data
+            if ret == ft.RET_OK:
+                return _to_category(data)
             else:
-                logging.error(f"获取持仓信息失败: {data}")
+                logger.error("获取持仓信息失败: %s", data)
                 return pd.DataFrame()
             
         except Exception as e:
-            logging.error(f"获取持仓信息异常: {e}")
+            logger.error("获取持仓信息异常: %s", e)
             return pd.DataFrame()
     
     def get_orders(self, market: str = MARKET_TYPE_HK) -> pd.DataFrame:
@@ -588,39 +849,28 @@ class FutuAPI(BaseDataAPI):
             market: 市场类型
             
         Returns:
-            pd.DataFrame: 订单信息
+            pd.DataFrame: 订单信息，失败时返回共享的空DataFrame，不可修改
         """
         try:
-            # 获取对应的交易上下文
-            trade_ctx = self.market_trade_ctx.get(market, self._get_hk_trade_ctx)()
+            # 借出对应的交易上下文
+            with self.market_trade_ctx.get(market, self._borrow_hk_trade_ctx)() as trade_ctx:
+                ret, data = trade_ctx.get_order_list()
             
-            # 获取订单列表
-            ret, data = trade_ctx.get_order_list()
-            
-            if ret:
-                return data
+            if ret == ft.RET_OK:
+                return _to_category(data)
             else:
-                logging.error(f"获取订单信息失败: {data}")
+                logger.error("获取订单信息失败: %s", data)
                 return pd.DataFrame()
             
         except Exception as e:
-            logging.error(f"获取订单信息异常: {e}")
+            logger.error("获取订单信息异常: %s", e)
             return pd.DataFrame()
     
     def close(self):
-        """关闭所有连接"""
-        try:
-            if self.quote_ctx and self.quote_ctx.connected:
-                self.quote_ctx.close()
-            
-            if self.trade_ctx_hk and self.trade_ctx_hk.connected:
-                self.trade_ctx_hk.close()
-                
-            if self.trade_ctx_us and self.trade_ctx_us.connected:
-                self.trade_ctx_us.close()
-                
-            if self.trade_ctx_cn and self.trade_ctx_cn.connected:
-                self.trade_ctx_cn.close()
-                
-        except Exception as e:
-            logging.error(f"关闭连接异常: {e}")
\ No newline at end of file
+        """释放连接
+        
+        连接由进程内所有FutuAPI实例共享，会在进程退出时统一关闭，
+        这里只清理本实例的缓存。
+        """
+        with self._cache_lock:
+            self._ticker_cache.clear()
@@ -0,0 +1,89 @@
+"""
+技术指标滚动窗口计算的后端，默认使用pandas，安装了cuDF时可切换到GPU执行
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+from src.indicators._kernels import NUMBA_AVAILABLE, rolling_mean_kernel
+
+# 尝试导入cuDF，如果失败则只能使用pandas后端
+try:
+    import cudf
+    CUDF_AVAILABLE = True
+except ImportError:
+    logging.debug("未安装cuDF，技术指标将使用pandas后端")
+    cudf = None
+    CUDF_AVAILABLE = False
+
+BACKENDS = ('pandas', 'cudf')
+
+# pandas后端下可以用编译内核计算的统计方法
+_ROLLING_KERNELS = {
+    'mean': rolling_mean_kernel
+}
+
+_backend = 'pandas'
+
+
+def set_backend(name: str):
+    """设置滚动窗口计算使用的后端
+
+    数据量较小（几万行以内）时主机与显存之间的拷贝开销大于计算本身，应使用pandas。
+
+    Args:
+        name: 后端名称，'pandas'或'cudf'
+    """
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"不支持的后端: {name}")
+    if name == 'cudf' and not CUDF_AVAILABLE:
+        raise ImportError("未安装cuDF，无法使用cudf后端")
+    _backend = name
+
+
+def get_backend() -> str:
+    """获取当前后端名称
+
+    Returns:
+        str: 后端名称
+    """
+    return _backend
+
+
+def get_xp():
+    """获取当前后端对应的DataFrame库
+
+    Returns:
+        module: pandas或cudf模块
+    """
+    return cudf if _backend == 'cudf' else pd
+
+
+def rolling(values: np.ndarray, window: int, method: str) -> np.ndarray:
+    """在当前后端上计算滚动窗口统计量
+
+    Args:
+        values: float64数组
+        window: 窗口大小
+        method: 统计方法，如'mean'、'std'、'sum'、'min'、'max'
+
+    Returns:
+        np.ndarray: float64数组，窗口不足的位置为NaN
+    """
+    xp = get_xp()
+    kernel = _ROLLING_KERNELS.get(method)
+    if (xp is pd and kernel is not None and NUMBA_AVAILABLE
+            and isinstance(window, (int, np.integer)) and window > 0):
+        # 单次遍历计算，不经过pandas的Series和Rolling对象
+        values = np.ascontiguousarray(values, dtype=np.float64)
+        out = np.empty_like(values)
+        kernel(values, window, out)
+        return out
+    
+    result = getattr(xp.Series(values).rolling(window=window), method)()
+    if xp is pd:
+        return result.to_numpy()
+    # cuDF用空值表示窗口不足，取回主机时换成NaN
+    return result.to_numpy(dtype=np.float64, na_value=np.nan)
@@ -0,0 +1,546 @@
+"""
+技术指标的数值计算内核，安装了numba时编译为机器码执行
+"""
+import logging
+
+import numpy as np
+
+# 尝试导入numba，如果失败则内核以普通Python函数存在，调用方改用NumPy实现
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    logging.debug("未安装numba，技术指标将使用NumPy实现")
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """numba不可用时的空装饰器"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True)
+def cross_kernel(fast: np.ndarray, slow: np.ndarray, out: np.ndarray):
+    """单次遍历计算交叉信号，结果写入out
+
+    Args:
+        fast: 快线（或价格）的float64数组
+        slow: 慢线的float64数组
+        out: 长度相同的int8输出数组，上穿为1，下穿为-1，其余为0
+    """
+    out[0] = 0
+    for i in range(1, fast.shape[0]):
+        cur_fast, cur_slow = fast[i], slow[i]
+        prev_fast, prev_slow = fast[i - 1], slow[i - 1]
+
+        # 含NaN的比较结果均为False，与NumPy实现一致
+        if cur_fast > cur_slow and prev_fast <= prev_slow:
+            out[i] = 1
+        elif cur_fast < cur_slow and prev_fast >= prev_slow:
+            out[i] = -1
+        else:
+            out[i] = 0
+
+
+@njit(cache=True)
+def ewm_update(weighted, old_wt, new_wt, cur, alpha, com):
+    """adjust=False的指数加权均值加入一个新值，计算过程与pandas一致
+
+    Args:
+        weighted: 当前加权均值
+        old_wt: 历史权重
+        new_wt: 新值权重
+        cur: 新值
+        alpha: 平滑系数
+        com: 质心参数
+
+    Returns:
+        tuple: 更新后的(weighted, old_wt, new_wt)
+    """
+    if weighted == weighted:
+        old_wt *= 1.0 - alpha
+        if com == 1:
+            # pandas在com为1时按剩余权重更新新值的权重
+            new_wt = 1.0 - old_wt
+        if cur == cur:
+            if weighted != cur:
+                weighted = (old_wt * weighted + new_wt * cur) / (old_wt + new_wt)
+            old_wt = 1.0
+    elif cur == cur:
+        weighted = cur
+    return weighted, old_wt, new_wt
+
+
+@njit(cache=True)
+def ewm_kernel(values: np.ndarray, com: float, out: np.ndarray):
+    """adjust=False的指数加权均值，结果写入out
+
+    平滑系数和NaN的处理与pandas的ewm(adjust=False).mean()一致：首个有效值之前输出NaN，
+    缺失值处沿用上一个均值，并在下一个有效值处按间隔的衰减权重更新。
+
+    Args:
+        values: float64数组
+        com: 质心参数，平滑系数为1/(1+com)
+        out: 长度相同的float64输出数组
+    """
+    n = values.shape[0]
+    if n == 0:
+        return
+    alpha = 1.0 / (1.0 + com)
+    weighted, old_wt, new_wt = values[0], 1.0, alpha
+    out[0] = weighted
+    for i in range(1, n):
+        weighted, old_wt, new_wt = ewm_update(weighted, old_wt, new_wt, values[i], alpha, com)
+        out[i] = weighted
+
+
+@njit(cache=True)
+def macd_kernel(price: np.ndarray, fast_com: float, slow_com: float, signal_com: float,
+                macd_out: np.ndarray, signal_out: np.ndarray):
+    """单次遍历计算MACD线和信号线
+
+    快线、慢线和信号线三个递推在同一个循环中更新，价格只读取一次，
+    每条线的结果与分别调用ewm_kernel一致。
+
+    Args:
+        price: float64价格数组
+        fast_com: 快线的质心参数
+        slow_com: 慢线的质心参数
+        signal_com: 信号线的质心参数
+        macd_out: MACD线输出数组
+        signal_out: 信号线输出数组
+    """
+    n = price.shape[0]
+    if n == 0:
+        return
+    fast_alpha = 1.0 / (1.0 + fast_com)
+    slow_alpha = 1.0 / (1.0 + slow_com)
+    signal_alpha = 1.0 / (1.0 + signal_com)
+
+    fast, fast_old, fast_new = price[0], 1.0, fast_alpha
+    slow, slow_old, slow_new = price[0], 1.0, slow_alpha
+    macd = fast - slow
+    signal, signal_old, signal_new = macd, 1.0, signal_alpha
+    macd_out[0] = macd
+    signal_out[0] = signal
+
+    for i in range(1, n):
+        x = price[i]
+        fast, fast_old, fast_new = ewm_update(fast, fast_old, fast_new, x, fast_alpha, fast_com)
+        slow, slow_old, slow_new = ewm_update(slow, slow_old, slow_new, x, slow_alpha, slow_com)
+        macd = fast - slow
+        signal, signal_old, signal_new = ewm_update(signal, signal_old, signal_new, macd, signal_alpha, signal_com)
+        macd_out[i] = macd
+        signal_out[i] = signal
+
+
+@njit(cache=True)
+def add_mean(val, nobs, sum_x, neg_ct, compensation, same_ct, prev_value):
+    """滑动均值窗口加入一个值，使用Kahan求和，与pandas的rolling mean一致
+
+    与pandas相同，NaN和inf都视为缺失值，不计入窗口。
+    """
+    if np.isfinite(val):
+        nobs += 1
+        y = val - compensation
+        t = sum_x + y
+        compensation = t - sum_x - y
+        sum_x = t
+        if val < 0:
+            neg_ct += 1
+        if val == prev_value:
+            same_ct += 1
+        else:
+            same_ct = 1
+        prev_value = val
+    return nobs, sum_x, neg_ct, compensation, same_ct, prev_value
+
+
+@njit(cache=True)
+def remove_mean(val, nobs, sum_x, neg_ct, compensation):
+    """滑动均值窗口移出一个值"""
+    if np.isfinite(val):
+        nobs -= 1
+        y = -val - compensation
+        t = sum_x + y
+        compensation = t - sum_x - y
+        sum_x = t
+        if val < 0:
+            neg_ct -= 1
+    return nobs, sum_x, neg_ct, compensation
+
+
+@njit(cache=True)
+def mean_result(nobs, sum_x, neg_ct, same_ct, prev_value, min_periods):
+    """由滑动均值的状态得到结果，窗口内数据相同时直接取该值以消除累计误差"""
+    if nobs < min_periods or nobs == 0:
+        return np.nan
+    result = sum_x / nobs
+    if same_ct >= nobs:
+        result = prev_value
+    elif neg_ct == 0 and result < 0:
+        result = 0.0
+    elif neg_ct == nobs and result > 0:
+        result = 0.0
+    return result
+
+
+@njit(cache=True)
+def add_var(val, nobs, mean_x, ssqdm_x, compensation, same_ct, prev_value):
+    """滑动方差窗口加入一个值，使用Welford算法，与pandas的rolling var一致"""
+    if np.isfinite(val):
+        if val == prev_value:
+            same_ct += 1
+        else:
+            same_ct = 1
+        prev_value = val
+
+        nobs += 1
+        prev_mean = mean_x - compensation
+        y = val - compensation
+        t = y - mean_x
+        compensation = t + mean_x - y
+        mean_x += t / nobs
+        ssqdm_x += (val - prev_mean) * (val - mean_x)
+    return nobs, mean_x, ssqdm_x, compensation, same_ct, prev_value
+
+
+@njit(cache=True)
+def remove_var(val, nobs, mean_x, ssqdm_x, compensation):
+    """滑动方差窗口移出一个值"""
+    if np.isfinite(val):
+        nobs -= 1
+        if nobs:
+            prev_mean = mean_x - compensation
+            y = val - compensation
+            t = y - mean_x
+            compensation = t + mean_x - y
+            mean_x -= t / nobs
+            ssqdm_x -= (val - prev_mean) * (val - mean_x)
+        else:
+            mean_x = 0.0
+            ssqdm_x = 0.0
+    return nobs, mean_x, ssqdm_x, compensation
+
+
+@njit(cache=True)
+def std_result(nobs, ssqdm_x, same_ct, min_periods):
+    """由滑动方差的状态得到样本标准差(ddof=1)"""
+    if nobs < max(min_periods, 1) or nobs <= 1:
+        return np.nan
+    if same_ct >= nobs:
+        return 0.0
+    var = ssqdm_x / (nobs - 1)
+    return np.sqrt(var) if var > 0 else 0.0
+
+
+@njit(cache=True)
+def rolling_mean_kernel(values, window, out):
+    """滑动均值，结果与pandas的rolling(window).mean()一致
+
+    Args:
+        values: float64数组
+        window: 窗口大小，必须为正整数
+        out: 长度相同的float64输出数组
+    """
+    n = values.shape[0]
+    if n == 0:
+        return
+    nobs, sum_x, neg_ct, comp_add, comp_rm, same_ct, prev = 0, 0.0, 0, 0.0, 0.0, 0, values[0]
+    for i in range(n):
+        if i >= window:
+            nobs, sum_x, neg_ct, comp_rm = remove_mean(values[i - window], nobs, sum_x, neg_ct, comp_rm)
+        nobs, sum_x, neg_ct, comp_add, same_ct, prev = add_mean(
+            values[i], nobs, sum_x, neg_ct, comp_add, same_ct, prev)
+        out[i] = mean_result(nobs, sum_x, neg_ct, same_ct, prev, window)
+
+
+@njit(cache=True, error_model='numpy')
+def bollinger_kernel(price, window, std_dev, ma_out, std_out, upper_out, lower_out,
+                     bandwidth_out, pct_b_out):
+    """单次遍历计算布林带的全部列
+
+    滑动均值和标准差的增量更新与pandas的rolling(window).mean()/std()一致，
+    上下轨、带宽和百分比B在同一个循环中由它们得到。
+
+    Args:
+        price: float64价格数组
+        window: 窗口大小
+        std_dev: 标准差乘数
+        ma_out: 中轨输出数组
+        std_out: 标准差输出数组
+        upper_out: 上轨输出数组
+        lower_out: 下轨输出数组
+        bandwidth_out: 带宽输出数组
+        pct_b_out: 百分比B输出数组
+    """
+    n = price.shape[0]
+    if n == 0:
+        return
+    m_nobs, m_sum, m_neg, m_comp_add, m_comp_rm, m_same, m_prev = 0, 0.0, 0, 0.0, 0.0, 0, price[0]
+    v_nobs, v_mean, v_ssq, v_comp_add, v_comp_rm, v_same, v_prev = 0, 0.0, 0.0, 0.0, 0.0, 0, price[0]
+
+    for i in range(n):
+        x = price[i]
+        if i >= window:
+            old_x = price[i - window]
+            m_nobs, m_sum, m_neg, m_comp_rm = remove_mean(old_x, m_nobs, m_sum, m_neg, m_comp_rm)
+            v_nobs, v_mean, v_ssq, v_comp_rm = remove_var(old_x, v_nobs, v_mean, v_ssq, v_comp_rm)
+        m_nobs, m_sum, m_neg, m_comp_add, m_same, m_prev = add_mean(
+            x, m_nobs, m_sum, m_neg, m_comp_add, m_same, m_prev)
+        v_nobs, v_mean, v_ssq, v_comp_add, v_same, v_prev = add_var(
+            x, v_nobs, v_mean, v_ssq, v_comp_add, v_same, v_prev)
+
+        ma = mean_result(m_nobs, m_sum, m_neg, m_same, m_prev, window)
+        std = std_result(v_nobs, v_ssq, v_same, window)
+        upper = ma + (std * std_dev)
+        lower = ma - (std * std_dev)
+
+        ma_out[i] = ma
+        std_out[i] = std
+        upper_out[i] = upper
+        lower_out[i] = lower
+        # 价格没有波动时上下轨重合，带宽和百分比B记为0而不是inf/NaN
+        width = upper - lower
+        bandwidth_out[i] = width / ma if ma != 0 else 0.0
+        pct_b_out[i] = (x - lower) / width if width != 0 else 0.0
+
+
+@njit(cache=True)
+def rsi_update(delta, window, count, avg_gain, avg_loss):
+    """按Wilder平滑法加入一个价格变化，返回更新后的状态和当前RSI
+
+    前window个变化取简单平均作为初始值，之后按avg = (avg * (window - 1) + cur) / window递推。
+    价格变化为NaN时状态清零，重新积累window个变化后再输出。
+
+    Args:
+        delta: 价格变化
+        window: RSI窗口
+        count: 已积累的变化个数
+        avg_gain: 平均涨幅（初始阶段为涨幅之和）
+        avg_loss: 平均跌幅（初始阶段为跌幅之和）
+
+    Returns:
+        tuple: (count, avg_gain, avg_loss, rsi)
+    """
+    if delta != delta:
+        return 0, 0.0, 0.0, np.nan
+
+    gain = delta if delta > 0 else 0.0
+    loss = -delta if delta < 0 else 0.0
+    count += 1
+    if count <= window:
+        avg_gain += gain
+        avg_loss += loss
+        if count < window:
+            return count, avg_gain, avg_loss, np.nan
+        avg_gain /= window
+        avg_loss /= window
+    else:
+        avg_gain = (avg_gain * (window - 1) + gain) / window
+        avg_loss = (avg_loss * (window - 1) + loss) / window
+
+    if avg_loss == 0.0:
+        # 只涨不跌时RS为无穷大，RSI为100；不涨不跌时为NaN
+        rsi = 100.0 if avg_gain > 0 else np.nan
+    else:
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return count, avg_gain, avg_loss, rsi
+
+
+@njit(cache=True)
+def rsi_kernel(price: np.ndarray, window: int, out: np.ndarray):
+    """单次遍历计算Wilder平滑的RSI，结果写入out
+
+    未安装numba时以普通Python函数执行，结果相同。
+
+    Args:
+        price: float64价格数组
+        window: RSI窗口
+        out: 长度相同的float64输出数组
+    """
+    n = price.shape[0]
+    if n == 0:
+        return
+    count, avg_gain, avg_loss = 0, 0.0, 0.0
+    out[0] = np.nan
+    for i in range(1, n):
+        count, avg_gain, avg_loss, out[i] = rsi_update(
+            price[i] - price[i - 1], window, count, avg_gain, avg_loss)
+
+
+@njit(cache=True)
+def rolling_minmax_kernel(low, high, window, min_out, max_out):
+    """单次遍历计算最低价的滚动最小值和最高价的滚动最大值
+
+    用单调队列保存窗口内的候选下标，每个元素只入队出队一次。与pandas的
+    rolling(window).min()/max()一致：NaN和inf不参与比较，窗口内有效值不足window个时输出NaN。
+
+    Args:
+        low: float64最低价数组
+        high: float64最高价数组
+        window: 窗口大小，必须为正整数
+        min_out: 滚动最小值输出数组
+        max_out: 滚动最大值输出数组
+    """
+    n = low.shape[0]
+    # 队列按下标递增存放，队首是窗口内的最小（最大）值
+    min_queue = np.empty(n, dtype=np.int64)
+    max_queue = np.empty(n, dtype=np.int64)
+    min_head = min_tail = max_head = max_tail = 0
+    min_nobs = max_nobs = 0
+
+    for i in range(n):
+        start = i - window
+        if start >= 0:
+            # 移出窗口的元素
+            if np.isfinite(low[start]):
+                min_nobs -= 1
+            if np.isfinite(high[start]):
+                max_nobs -= 1
+            if min_head < min_tail and min_queue[min_head] == start:
+                min_head += 1
+            if max_head < max_tail and max_queue[max_head] == start:
+                max_head += 1
+
+        x = low[i]
+        if np.isfinite(x):
+            min_nobs += 1
+            while min_head < min_tail and low[min_queue[min_tail - 1]] >= x:
+                min_tail -= 1
+            min_queue[min_tail] = i
+            min_tail += 1
+
+        x = high[i]
+        if np.isfinite(x):
+            max_nobs += 1
+            while max_head < max_tail and high[max_queue[max_tail - 1]] <= x:
+                max_tail -= 1
+            max_queue[max_tail] = i
+            max_tail += 1
+
+        min_out[i] = low[min_queue[min_head]] if min_nobs >= window else np.nan
+        max_out[i] = high[max_queue[max_head]] if max_nobs >= window else np.nan
+
+
+@njit(cache=True)
+def close_bundle_kernel(price, fast_span, slow_span, signal_span, rsi_window, bb_window,
+                        macd_out, macd_signal_out, rsi_out, bb_ma_out, bb_std_out):
+    """单次遍历价格序列，同时计算MACD、RSI和布林带的基础序列
+
+    各指标共享同一次价格读取，结果与对应指标类的calculate一致（浮点误差范围内）。
+    价格序列不能包含NaN。
+
+    Args:
+        price: float64价格数组
+        fast_span: MACD快线周期，为0时不计算MACD
+        slow_span: MACD慢线周期
+        signal_span: MACD信号线周期
+        rsi_window: RSI窗口，为0时不计算RSI
+        bb_window: 布林带窗口，为0时不计算布林带
+        macd_out: MACD线输出数组
+        macd_signal_out: MACD信号线输出数组
+        rsi_out: RSI输出数组
+        bb_ma_out: 布林带中轨输出数组
+        bb_std_out: 布林带标准差输出数组
+    """
+    n = price.shape[0]
+    # 按pandas的方式由周期换算质心参数再得到平滑系数，保证结果逐位一致
+    fast_com = (fast_span - 1.0) / 2.0
+    slow_com = (slow_span - 1.0) / 2.0
+    signal_com = (signal_span - 1.0) / 2.0
+    fast_alpha = 1.0 / (1.0 + fast_com)
+    slow_alpha = 1.0 / (1.0 + slow_com)
+    signal_alpha = 1.0 / (1.0 + signal_com)
+    # MACD三条线的递推状态，与macd_kernel共用ewm_update
+    fast_ema, fast_old, fast_new = 0.0, 1.0, fast_alpha
+    slow_ema, slow_old, slow_new = 0.0, 1.0, slow_alpha
+    macd_ema, macd_old, macd_new = 0.0, 1.0, signal_alpha
+
+    # RSI的Wilder平滑状态
+    rsi_count, avg_gain, avg_loss = 0, 0.0, 0.0
+
+    # 布林带中轨的滑动均值状态和标准差的滑动方差状态
+    m_nobs, m_sum, m_neg, m_comp_add, m_comp_rm, m_same, m_prev = 0, 0.0, 0, 0.0, 0.0, 0, price[0]
+    v_nobs, v_mean, v_ssq, v_comp_add, v_comp_rm, v_same, v_prev = 0, 0.0, 0.0, 0.0, 0.0, 0, price[0]
+
+    for i in range(n):
+        x = price[i]
+
+        if fast_span > 0:
+            if i == 0:
+                fast_ema = slow_ema = x
+                macd = fast_ema - slow_ema
+                macd_ema = macd
+            else:
+                fast_ema, fast_old, fast_new = ewm_update(fast_ema, fast_old, fast_new, x, fast_alpha, fast_com)
+                slow_ema, slow_old, slow_new = ewm_update(slow_ema, slow_old, slow_new, x, slow_alpha, slow_com)
+                macd = fast_ema - slow_ema
+                macd_ema, macd_old, macd_new = ewm_update(
+                    macd_ema, macd_old, macd_new, macd, signal_alpha, signal_com)
+            macd_out[i] = macd
+            macd_signal_out[i] = macd_ema
+
+        if rsi_window > 0:
+            if i == 0:
+                rsi_out[i] = np.nan
+            else:
+                rsi_count, avg_gain, avg_loss, rsi_out[i] = rsi_update(
+                    x - price[i - 1], rsi_window, rsi_count, avg_gain, avg_loss)
+
+        if bb_window > 0:
+            if i >= bb_window:
+                old_x = price[i - bb_window]
+                m_nobs, m_sum, m_neg, m_comp_rm = remove_mean(old_x, m_nobs, m_sum, m_neg, m_comp_rm)
+                v_nobs, v_mean, v_ssq, v_comp_rm = remove_var(old_x, v_nobs, v_mean, v_ssq, v_comp_rm)
+            m_nobs, m_sum, m_neg, m_comp_add, m_same, m_prev = add_mean(
+                x, m_nobs, m_sum, m_neg, m_comp_add, m_same, m_prev)
+            v_nobs, v_mean, v_ssq, v_comp_add, v_same, v_prev = add_var(
+                x, v_nobs, v_mean, v_ssq, v_comp_add, v_same, v_prev)
+
+            bb_ma_out[i] = mean_result(m_nobs, m_sum, m_neg, m_same, m_prev, bb_window)
+            bb_std_out[i] = std_result(v_nobs, v_ssq, v_same, bb_window)
+
+
+@njit(cache=True, parallel=True)
+def rolling_mean_panel_kernel(values, window, out):
+    """按行并行计算多个标的的滑动均值
+
+    Args:
+        values: 形状为(标的数, K线数)的float64数组
+        window: 窗口大小，必须为正整数
+        out: 形状相同的float64输出数组
+    """
+    for s in prange(values.shape[0]):
+        rolling_mean_kernel(values[s], window, out[s])
+
+
+@njit(cache=True, parallel=True)
+def ewm_panel_kernel(values, com, out):
+    """按行并行计算多个标的的adjust=False指数加权均值
+
+    Args:
+        values: 形状为(标的数, K线数)的float64数组
+        com: 质心参数
+        out: 形状相同的float64输出数组
+    """
+    for s in prange(values.shape[0]):
+        ewm_kernel(values[s], com, out[s])
+
+
+@njit(cache=True, parallel=True)
+def macd_panel_kernel(price, fast_com, slow_com, signal_com, macd_out, signal_out):
+    """按行并行计算多个标的的MACD线和信号线
+
+    Args:
+        price: 形状为(标的数, K线数)的float64价格数组
+        fast_com: 快线的质心参数
+        slow_com: 慢线的质心参数
+        signal_com: 信号线的质心参数
+        macd_out: MACD线输出数组
+        signal_out: 信号线输出数组
+    """
+    for s in prange(price.shape[0]):
+        macd_kernel(price[s], fast_com, slow_com, signal_com, macd_out[s], signal_out[s])
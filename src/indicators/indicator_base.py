@@ -2,10 +2,229 @@
 技术指标基类，定义所有技术指标的通用接口
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, Optional, Tuple
 import pandas as pd
 import numpy as np
 
+from src.indicators._kernels import NUMBA_AVAILABLE, cross_kernel, ewm_kernel
+
+# 尝试导入numexpr，如果失败则用NumPy逐步计算复合条件
+try:
+    import numexpr
+    NUMEXPR_AVAILABLE = True
+except ImportError:
+    NUMEXPR_AVAILABLE = False
+
+
+def ewm_com(span: Optional[float] = None, alpha: Optional[float] = None) -> float:
+    """与pandas相同，把周期或平滑系数换算为质心参数
+    
+    Args:
+        span: 周期，与alpha二选一
+        alpha: 平滑系数，与span二选一
+        
+    Returns:
+        float: 质心参数com
+    """
+    return (span - 1) / 2.0 if span is not None else (1.0 - alpha) / alpha
+
+
+def ewm_mean(values: np.ndarray, span: Optional[float] = None, alpha: Optional[float] = None,
+             com: Optional[float] = None) -> np.ndarray:
+    """计算adjust=False的指数加权均值，结果与pandas的ewm(span=..., adjust=False).mean()一致
+    
+    Args:
+        values: 数值数组
+        span: 周期，与alpha、com三选一
+        alpha: 平滑系数，与span、com三选一
+        com: 预先用ewm_com换算好的质心参数，与span、alpha三选一
+        
+    Returns:
+        np.ndarray: float64数组
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    if com is None:
+        com = ewm_com(span, alpha)
+    if not NUMBA_AVAILABLE:
+        return pd.Series(values).ewm(com=com, adjust=False).mean().to_numpy()
+    
+    out = np.empty_like(values)
+    ewm_kernel(values, com, out)
+    return out
+
+
+def add_columns(data: pd.DataFrame, columns: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """把新计算的指标列一次性添加到DataFrame
+    
+    新列先组成一个DataFrame再与原数据按列拼接，只修改一次列结构。数组直接作为新列使用，
+    调用方不能再修改它们。返回的DataFrame与原数据共享已有的列，原数据不受影响。
+    
+    Args:
+        data: 原始数据DataFrame
+        columns: 列名到数组的映射
+        
+    Returns:
+        pd.DataFrame: 添加了新列的DataFrame
+    """
+    if not columns or any(col in data.columns for col in columns):
+        # 需要覆盖已有的列时逐列赋值
+        return data.assign(**columns)
+    
+    result = pd.concat([data, pd.DataFrame(columns, index=data.index, copy=False)], axis=1)
+    # 拼接时新DataFrame没有attrs，需要沿用原数据的
+    result.attrs = data.attrs
+    return result
+
+
+def cross_signal(fast: np.ndarray, slow) -> np.ndarray:
+    """计算两条序列的交叉信号
+    
+    Args:
+        fast: 快线（或价格）数组
+        slow: 慢线数组，也可以是固定的阈值
+        
+    Returns:
+        np.ndarray: int8信号数组，上穿为1，下穿为-1，其余为0
+    """
+    slow = np.broadcast_to(slow, np.shape(fast))
+    
+    if NUMBA_AVAILABLE and len(fast) > 0:
+        signal = np.empty(len(fast), dtype=np.int8)
+        cross_kernel(
+            np.ascontiguousarray(fast, dtype=np.float64),
+            np.ascontiguousarray(slow, dtype=np.float64),
+            signal
+        )
+        return signal
+    
+    signal = np.zeros(len(fast), dtype=np.int8)
+    
+    # 用错位切片比较当前值与前一个值，不生成shift后的临时序列
+    cur_fast, cur_slow = fast[1:], slow[1:]
+    prev_fast, prev_slow = fast[:-1], slow[:-1]
+    
+    signal[1:][(cur_fast > cur_slow) & (prev_fast <= prev_slow)] = 1
+    signal[1:][(cur_fast < cur_slow) & (prev_fast >= prev_slow)] = -1
+    return signal
+
+
+def latest_cross(fast: np.ndarray, slow) -> int:
+    """只计算最后一根K线的交叉信号，结果与cross_signal的最后一个值相同
+    
+    Args:
+        fast: 快线（或价格）数组
+        slow: 慢线数组，也可以是固定的阈值
+        
+    Returns:
+        int: 上穿为1，下穿为-1，其余为0
+    """
+    if len(fast) < 2:
+        return 0
+    
+    slow = np.broadcast_to(slow, np.shape(fast))
+    cur_fast, cur_slow = fast[-1], slow[-1]
+    prev_fast, prev_slow = fast[-2], slow[-2]
+    
+    # 含NaN的比较结果均为False，与cross_signal一致
+    if cur_fast > cur_slow and prev_fast <= prev_slow:
+        return 1
+    if cur_fast < cur_slow and prev_fast >= prev_slow:
+        return -1
+    return 0
+
+
+def level_cross_signal(values: np.ndarray, buy_level, sell_level) -> np.ndarray:
+    """计算穿越买入线、卖出线的信号
+    
+    Args:
+        values: 指标或价格数组
+        buy_level: 买入线数组或阈值，上穿时为买入信号
+        sell_level: 卖出线数组或阈值，下穿时为卖出信号
+        
+    Returns:
+        np.ndarray: int8信号数组，上穿买入线为1，下穿卖出线为-1，其余为0
+    """
+    signal = (cross_signal(values, buy_level) == 1).view(np.int8)
+    signal[cross_signal(values, sell_level) == -1] = -1
+    return signal
+
+
+def latest_level_cross(values: np.ndarray, buy_level, sell_level) -> int:
+    """只计算最后一根K线穿越买入线、卖出线的信号，结果与level_cross_signal的最后一个值相同
+    
+    Args:
+        values: 指标或价格数组
+        buy_level: 买入线数组或阈值
+        sell_level: 卖出线数组或阈值
+        
+    Returns:
+        int: 上穿买入线为1，下穿卖出线为-1，其余为0
+    """
+    if latest_cross(values, sell_level) == -1:
+        return -1
+    return 1 if latest_cross(values, buy_level) == 1 else 0
+
+
+def evaluate_mask(expression: str, fallback: Callable[..., np.ndarray], **arrays) -> np.ndarray:
+    """计算由比较和逻辑运算组成的复合条件
+    
+    安装了numexpr时在一次分块遍历中完成全部运算，不生成中间的布尔数组；
+    未安装时调用fallback按NumPy逐步计算，表达式字符串不会被直接执行。
+    
+    Args:
+        expression: numexpr条件表达式，只使用比较运算和&、|、~，如"(a > b) & (c < d)"
+        fallback: 与表达式等价的NumPy计算函数，以arrays作为关键字参数调用
+        **arrays: 表达式中用到的数组或标量
+        
+    Returns:
+        np.ndarray: 布尔数组
+    """
+    if NUMEXPR_AVAILABLE:
+        return numexpr.evaluate(expression, local_dict=arrays)
+    return fallback(**arrays)
+
+
+def divergence_signal(price: np.ndarray, oscillator: np.ndarray, margin: int, lookback: int,
+                      confirm_price: bool = False) -> np.ndarray:
+    """计算价格与指标的背离信号
+    
+    价格出现局部高点（高于前后相邻值）而指标低于lookback之前的值为顶背离，
+    局部低点而指标高于lookback之前的值为底背离。首尾各margin个位置不判断。
+    
+    Args:
+        price: 价格数组
+        oscillator: 指标数组
+        margin: 首尾不参与判断的长度，不小于lookback
+        lookback: 与多少个周期之前的值比较
+        confirm_price: 是否要求价格也高于（低于）lookback之前的值
+        
+    Returns:
+        np.ndarray: int8信号数组，底背离为1，顶背离为-1，其余为0
+    """
+    n = len(price)
+    signal = np.zeros(n, dtype=np.int8)
+    if n <= 2 * margin:
+        return signal
+    
+    # 各错位切片与当前位置一一对应
+    cur = price[margin:n - margin]
+    prev = price[margin - 1:n - margin - 1]
+    nxt = price[margin + 1:n - margin + 1]
+    osc_cur = oscillator[margin:n - margin]
+    osc_back = oscillator[margin - lookback:n - margin - lookback]
+    
+    top = (cur > prev) & (cur > nxt) & (osc_cur < osc_back)
+    bottom = (cur < prev) & (cur < nxt) & (osc_cur > osc_back)
+    
+    if confirm_price:
+        price_back = price[margin - lookback:n - margin - lookback]
+        top &= cur > price_back
+        bottom &= cur < price_back
+    
+    signal[margin:n - margin][top] = -1
+    signal[margin:n - margin][bottom] = 1
+    return signal
+
 
 class IndicatorBase(ABC):
     """技术指标基类"""
@@ -18,7 +237,27 @@ class IndicatorBase(ABC):
         """
         self.name = name
     
+    @property
+    def input_columns(self) -> Tuple[str, ...]:
+        """calculate_arr依次需要的输入列，默认为指标使用的价格列
+        
+        Returns:
+            Tuple[str, ...]: 列名元组
+        """
+        return (self.price_key,)
+    
     @abstractmethod
+    def calculate_arr(self, *arrays: np.ndarray) -> Dict[str, np.ndarray]:
+        """基于numpy数组计算指标
+        
+        Args:
+            *arrays: 按input_columns顺序排列的float64数组
+            
+        Returns:
+            Dict[str, np.ndarray]: 指标列名到数组的映射
+        """
+        pass
+    
     def calculate(self, data: pd.DataFrame, **kwargs) -> pd.DataFrame:
         """计算指标
         
@@ -29,7 +268,33 @@ class IndicatorBase(ABC):
         Returns:
             pd.DataFrame: 添加了指标列的DataFrame
         """
-        pass
+        # 输入列只转换一次，之后全部在numpy数组上计算
+        arrays = [np.ascontiguousarray(data[col].to_numpy(), dtype=np.float64) for col in self.input_columns]
+        
+        # 指标只新增列，返回共享原有列的新DataFrame，不复制OHLCV数据
+        return add_columns(data, self.calculate_arr(*arrays))
+    
+    def calculate_panel(self, *panels: np.ndarray) -> Dict[str, np.ndarray]:
+        """对多个标的的数据矩阵计算指标
+        
+        默认逐行调用calculate_arr，有并行内核的指标会重写此方法。
+        
+        Args:
+            *panels: 按input_columns顺序排列、形状为(标的数, K线数)的二维数组
+            
+        Returns:
+            Dict[str, np.ndarray]: 指标列名到同形状二维数组的映射，没有标的时为空字典
+        """
+        panels = [np.ascontiguousarray(panel, dtype=np.float64) for panel in panels]
+        columns: Dict[str, np.ndarray] = {}
+        
+        for s in range(panels[0].shape[0]):
+            for col, values in self.calculate_arr(*(panel[s] for panel in panels)).items():
+                if col not in columns:
+                    columns[col] = np.empty(panels[0].shape)
+                columns[col][s] = values
+        
+        return columns
     
     @abstractmethod
     def get_signal(self, data: pd.DataFrame, **kwargs) -> pd.DataFrame:
@@ -99,25 +364,17 @@ class MovingAverageBase(IndicatorBase):
                 temp_indicator = self.__class__(window=short_window, price_key=self.price_key)
                 data = temp_indicator.calculate(data)
             
-            # 计算交叉信号
-            data[signal_column] = 0  # 默认无信号
-            # 金叉：短期均线上穿长期均线
-            data.loc[(data[short_column] > data[self.column_name]) & 
-                     (data[short_column].shift(1) <= data[self.column_name].shift(1)), signal_column] = 1
-            # 死叉：短期均线下穿长期均线
-            data.loc[(data[short_column] < data[self.column_name]) & 
-                     (data[short_column].shift(1) >= data[self.column_name].shift(1)), signal_column] = -1
+            # 计算交叉信号：金叉为1，死叉为-1
+            data[signal_column] = cross_signal(
+                data[short_column].to_numpy(),
+                data[self.column_name].to_numpy()
+            )
         
         elif signal_type == 'trend':
-            # 趋势信号
-            data[signal_column] = 0  # 默认无信号
-            
-            # 价格上穿均线：买入信号
-            data.loc[(data[self.price_key] > data[self.column_name]) & 
-                     (data[self.price_key].shift(1) <= data[self.column_name].shift(1)), signal_column] = 1
-            
-            # 价格下穿均线：卖出信号
-            data.loc[(data[self.price_key] < data[self.column_name]) & 
-                     (data[self.price_key].shift(1) >= data[self.column_name].shift(1)), signal_column] = -1
+            # 趋势信号：价格上穿均线为1，下穿为-1
+            data[signal_column] = cross_signal(
+                data[self.price_key].to_numpy(),
+                data[self.column_name].to_numpy()
+            )
         
-        return data
\ No newline at end of file
+        return data
@@ -1,11 +1,14 @@
 """
 指标工厂，用于创建和管理各种技术指标
 """
-from typing import Dict, List, Any, Optional, Union, Type
+import logging
+from typing import Callable, Dict, Iterable, List, Any, Optional, Union, Type
 
+import numpy as np
 import pandas as pd
 
-from src.indicators.indicator_base import IndicatorBase
+from src.indicators._kernels import NUMBA_AVAILABLE, close_bundle_kernel
+from src.indicators.indicator_base import IndicatorBase, add_columns
 from src.indicators.moving_averages import SimpleMovingAverage, ExponentialMovingAverage, MACD, BollingerBands
 from src.indicators.oscillators import RSI, KDJ, VolumeProfile
 from config.constants import (
@@ -13,10 +16,18 @@ from config.constants import (
     INDICATOR_BOLLINGER, INDICATOR_KDJ, INDICATOR_VOLUME
 )
 
+logger = logging.getLogger(__name__)
+
 
 class IndicatorFactory:
     """指标工厂，用于创建和管理各种技术指标"""
     
+    # 可以在一次价格遍历中合并计算的指标
+    FUSED_INDICATORS = (INDICATOR_MACD, INDICATOR_RSI, INDICATOR_BOLLINGER)
+    
+    # DataFrame.attrs中记录已计算指标的键
+    COMPUTED_ATTR = '_computed_indicators'
+    
     # 指标类型映射
     INDICATOR_MAP = {
         INDICATOR_MA: SimpleMovingAverage,
@@ -54,6 +65,18 @@ class IndicatorFactory:
         """
         return list(cls.INDICATOR_MAP.keys())
     
+    @staticmethod
+    def _computed_key(indicator: IndicatorBase) -> str:
+        """已计算指标集合中使用的键，有窗口参数的指标按列名区分
+        
+        Args:
+            indicator: 指标实例
+            
+        Returns:
+            str: 指标键
+        """
+        return getattr(indicator, 'column_name', indicator.name)
+    
     @classmethod
     def calculate_indicators(cls, data: pd.DataFrame, indicators: List[Dict[str, Any]]) -> pd.DataFrame:
         """计算多个指标
@@ -67,20 +90,137 @@ class IndicatorFactory:
         Returns:
             pd.DataFrame: 添加了指标列的DataFrame
         """
-        result = data.copy()
+        # 浅拷贝即可：指标只会新增列，不会改写原始数据的列
+        result = data.copy(deep=False)
+        computed = set(data.attrs.get(cls.COMPUTED_ATTR, ()))
+        fused = cls._calculate_fused(data, indicators)
         
-        for indicator_config in indicators:
+        for i, indicator_config in enumerate(indicators):
             indicator_type = indicator_config.get('type')
             params = indicator_config.get('params', {})
             
             try:
                 indicator = cls.create_indicator(indicator_type, **params)
-                result = indicator.calculate(result)
+                if i in fused:
+                    result = add_columns(result, fused[i])
+                else:
+                    result = indicator.calculate(result)
+                computed.add(cls._computed_key(indicator))
             except Exception as e:
-                print(f"计算指标 {indicator_type} 失败: {e}")
-                
+                logger.exception("计算指标 %s 失败: %s", indicator_type, e)
+        
+        # 记录已计算的指标，后续获取信号时无需重复计算
+        result.attrs[cls.COMPUTED_ATTR] = computed
         return result
     
+    @classmethod
+    def _calculate_fused(cls, data: pd.DataFrame, indicators: List[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+        """请求中包含两个及以上MACD、RSI、布林带时，用一次价格遍历计算它们的列
+        
+        每种指标只合并第一个配置，其余配置和不满足条件的情况仍逐个计算。
+        
+        Args:
+            data: 原始数据DataFrame
+            indicators: 指标配置列表
+            
+        Returns:
+            Dict: 以指标配置下标为键、列字典为值的计算结果，无法合并时返回空字典
+        """
+        if not NUMBA_AVAILABLE or data.empty:
+            return {}
+        
+        selected = {}
+        for i, indicator_config in enumerate(indicators):
+            indicator_type = indicator_config.get('type')
+            if indicator_type not in cls.FUSED_INDICATORS or indicator_type in selected:
+                continue
+            try:
+                selected[indicator_type] = (i, cls.create_indicator(indicator_type, **indicator_config.get('params', {})))
+            except Exception:
+                # 参数错误留给逐个计算时报告
+                continue
+        
+        if len(selected) < 2:
+            return {}
+        
+        # 合并计算要求各指标使用同一价格列，且窗口参数是正整数
+        price_keys = {indicator.price_key for _, indicator in selected.values()}
+        if len(price_keys) != 1 or not price_keys <= set(data.columns):
+            return {}
+        
+        _, macd = selected.get(INDICATOR_MACD, (None, None))
+        _, rsi = selected.get(INDICATOR_RSI, (None, None))
+        _, bollinger = selected.get(INDICATOR_BOLLINGER, (None, None))
+        
+        periods = []
+        if macd is not None:
+            periods += [macd.fast_period, macd.slow_period, macd.signal_period]
+        if rsi is not None:
+            periods.append(rsi.window)
+        if bollinger is not None:
+            periods.append(bollinger.window)
+        if not all(isinstance(p, (int, np.integer)) and p > 0 for p in periods):
+            return {}
+        
+        try:
+            price = np.ascontiguousarray(data[price_keys.pop()].to_numpy(dtype=np.float64))
+        except (TypeError, ValueError):
+            return {}
+        if np.isnan(price).any():
+            return {}
+        
+        n = len(price)
+        macd_line, macd_signal, rsi_values, bb_ma, bb_std = (np.empty(n) for _ in range(5))
+        close_bundle_kernel(
+            price,
+            macd.fast_period if macd else 0, macd.slow_period if macd else 0, macd.signal_period if macd else 0,
+            rsi.window if rsi else 0,
+            bollinger.window if bollinger else 0,
+            macd_line, macd_signal, rsi_values, bb_ma, bb_std
+        )
+        
+        fused = {}
+        if macd is not None:
+            fused[selected[INDICATOR_MACD][0]] = macd.build_columns(macd_line, macd_signal)
+        if rsi is not None:
+            fused[selected[INDICATOR_RSI][0]] = {rsi.column_name: rsi_values}
+        if bollinger is not None:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                fused[selected[INDICATOR_BOLLINGER][0]] = bollinger.build_columns(price, bb_ma, bb_std)
+        return fused
+    
+    @classmethod
+    def stream_indicators(cls, chunks: Iterable[pd.DataFrame], indicators: List[Dict[str, Any]],
+                          sink: Callable[[pd.DataFrame], None], warmup: int = 250) -> int:
+        """分块计算指标，适合无法一次载入内存的长周期数据
+        
+        每个数据块会带上前一块末尾的warmup行一起计算，使滚动窗口类指标在块边界处
+        与整体计算一致；EMA、MACD等递推指标在warmup足够长时收敛到整体计算的结果。
+        
+        Args:
+            chunks: 按时间顺序排列的OHLCV数据块，例如pd.read_csv(..., chunksize=100000)
+            indicators: 指标配置列表，格式与calculate_indicators相同
+            sink: 接收每个数据块计算结果的回调函数
+            warmup: 从上一块带入的行数，应不小于最长的指标窗口
+            
+        Returns:
+            int: 处理的总行数
+        """
+        tail = None
+        total = 0
+        
+        for chunk in chunks:
+            frame = chunk if tail is None else pd.concat([tail, chunk])
+            result = cls.calculate_indicators(frame, indicators)
+            
+            # 只输出本块的数据，带入的warmup行已在上一块输出过
+            sink(result.iloc[len(frame) - len(chunk):])
+            
+            tail = frame.iloc[-warmup:] if warmup > 0 else None
+            total += len(chunk)
+        
+        return total
+    
     @classmethod
     def get_indicator_signals(cls, data: pd.DataFrame, indicators: List[Dict[str, Any]]) -> pd.DataFrame:
         """获取多个指标的信号
@@ -95,7 +235,9 @@ class IndicatorFactory:
         Returns:
             pd.DataFrame: 添加了信号列的DataFrame
         """
-        result = data.copy()
+        # 浅拷贝即可：信号列写入副本，不影响调用方的DataFrame
+        result = data.copy(deep=False)
+        computed = set(data.attrs.get(cls.COMPUTED_ATTR, ()))
         
         for indicator_config in indicators:
             indicator_type = indicator_config.get('type')
@@ -105,13 +247,114 @@ class IndicatorFactory:
             try:
                 indicator = cls.create_indicator(indicator_type, **params)
                 
-                # 确保指标已计算
-                if not any(col.startswith(indicator.name) for col in result.columns):
+                # 确保指标已计算，已计算的指标记录在集合中，按键查找即可
+                key = cls._computed_key(indicator)
+                if key not in computed:
                     result = indicator.calculate(result)
+                    computed.add(key)
                 
                 # 计算信号
                 result = indicator.get_signal(result, **signal_params)
             except Exception as e:
-                print(f"获取指标 {indicator_type} 的信号失败: {e}")
+                logger.exception("获取指标 %s 的信号失败: %s", indicator_type, e)
+        
+        result.attrs[cls.COMPUTED_ATTR] = computed
+        return result
+
+class LazyIndicatorPlan:
+    """延迟执行的指标计划
+    
+    先收集需要的指标和信号，执行时每个指标只基于原始数据计算一次，
+    所有新增的指标列一次性拼接到结果中，再依次生成信号，
+    避免逐个指标插入列时反复整理DataFrame的内部数据块。
+    """
+    
+    def __init__(self):
+        """初始化空的指标计划"""
+        self.steps: List[Dict[str, Any]] = []
+    
+    @classmethod
+    def from_configs(cls, indicators: List[Dict[str, Any]]) -> 'LazyIndicatorPlan':
+        """从指标配置列表创建计划
+        
+        Args:
+            indicators: 指标配置列表，格式与IndicatorFactory.get_indicator_signals相同
+            
+        Returns:
+            LazyIndicatorPlan: 指标计划
+        """
+        plan = cls()
+        for indicator_config in indicators:
+            plan.add(
+                indicator_config.get('type'),
+                signal_params=indicator_config.get('signal_params', {}),
+                **indicator_config.get('params', {})
+            )
+        return plan
+    
+    def add(self, indicator_type: str, signal_params: Optional[Dict[str, Any]] = None, **params) -> 'LazyIndicatorPlan':
+        """添加指标
+        
+        Args:
+            indicator_type: 指标类型
+            signal_params: 信号参数，为None时不生成该指标的信号
+            **params: 指标参数
+            
+        Returns:
+            LazyIndicatorPlan: 计划本身，便于链式调用
+        """
+        self.steps.append({
+            'type': indicator_type,
+            'params': params,
+            'signal_params': signal_params
+        })
+        return self
+    
+    def execute(self, data: pd.DataFrame) -> pd.DataFrame:
+        """执行计划
+        
+        Args:
+            data: 原始数据DataFrame
+            
+        Returns:
+            pd.DataFrame: 添加了指标列和信号列的DataFrame
+        """
+        indicators = []
+        new_columns = {}
+        calculated = set()
+        # 输入列只转换为numpy数组一次，在各指标之间共享
+        arrays: Dict[str, np.ndarray] = {}
+        
+        for step in self.steps:
+            indicator_type = step['type']
+            try:
+                indicator = IndicatorFactory.create_indicator(indicator_type, **step['params'])
+                indicators.append((indicator, step['signal_params']))
                 
-        return result
\ No newline at end of file
+                # 相同参数的指标只计算一次
+                key = (indicator_type, repr(sorted(step['params'].items())))
+                if key in calculated:
+                    continue
+                calculated.add(key)
+                
+                for col in indicator.input_columns:
+                    if col not in arrays:
+                        arrays[col] = np.ascontiguousarray(data[col].to_numpy(), dtype=np.float64)
+                
+                # 只收集指标计算出的列，原始数据中已有的同名列会被新值覆盖
+                new_columns.update(indicator.calculate_arr(*(arrays[col] for col in indicator.input_columns)))
+            except Exception as e:
+                logger.exception("计算指标 %s 失败: %s", indicator_type, e)
+        
+        # 所有指标列一次性拼接，不覆盖已有列时只修改一次列结构
+        result = add_columns(data, new_columns) if new_columns else data.copy(deep=False)
+        
+        for indicator, signal_params in indicators:
+            if signal_params is None:
+                continue
+            try:
+                result = indicator.get_signal(result, **signal_params)
+            except Exception as e:
+                logger.exception("获取指标 %s 的信号失败: %s", indicator.name, e)
+        
+        return result
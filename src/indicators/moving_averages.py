@@ -5,7 +5,13 @@ import pandas as pd
 import numpy as np
 from typing import Dict, Any, Optional, List
 
-from src.indicators.indicator_base import MovingAverageBase, IndicatorBase
+from src.indicators._backend import rolling
+from src.indicators._kernels import (
+    NUMBA_AVAILABLE, bollinger_kernel, ewm_panel_kernel, macd_kernel, macd_panel_kernel, rolling_mean_panel_kernel
+)
+from src.indicators.indicator_base import (
+    MovingAverageBase, IndicatorBase, cross_signal, level_cross_signal, divergence_signal, ewm_com, ewm_mean
+)
 
 
 class SimpleMovingAverage(MovingAverageBase):
@@ -20,19 +26,33 @@ class SimpleMovingAverage(MovingAverageBase):
         """
         super().__init__('ma', window, price_key)
     
-    def calculate(self, data: pd.DataFrame, **kwargs) -> pd.DataFrame:
+    def calculate_arr(self, price: np.ndarray) -> Dict[str, np.ndarray]:
         """计算简单移动平均线
         
         Args:
-            data: 包含OHLCV数据的DataFrame
-            **kwargs: 其他参数
+            price: 价格数组
             
         Returns:
-            pd.DataFrame: 添加了MA指标列的DataFrame
+            Dict[str, np.ndarray]: MA指标列
         """
-        data = data.copy()
-        data[self.column_name] = data[self.price_key].rolling(window=self.window).mean()
-        return data
+        return {self.column_name: rolling(price, self.window, 'mean')}
+    
+    def calculate_panel(self, price: np.ndarray) -> Dict[str, np.ndarray]:
+        """按标的并行计算简单移动平均线
+        
+        Args:
+            price: 形状为(标的数, K线数)的价格数组
+            
+        Returns:
+            Dict[str, np.ndarray]: MA指标列
+        """
+        if not (NUMBA_AVAILABLE and isinstance(self.window, (int, np.integer)) and self.window > 0):
+            return super().calculate_panel(price)
+        
+        price = np.ascontiguousarray(price, dtype=np.float64)
+        ma = np.empty_like(price)
+        rolling_mean_panel_kernel(price, self.window, ma)
+        return {self.column_name: ma}
     
     def get_description(self) -> str:
         """获取指标的描述
@@ -54,20 +74,35 @@ class ExponentialMovingAverage(MovingAverageBase):
             price_key: 使用的价格列名，默认为收盘价
         """
         super().__init__('ema', window, price_key)
+        self._com = ewm_com(span=window)
     
-    def calculate(self, data: pd.DataFrame, **kwargs) -> pd.DataFrame:
+    def calculate_arr(self, price: np.ndarray) -> Dict[str, np.ndarray]:
         """计算指数移动平均线
         
         Args:
-            data: 包含OHLCV数据的DataFrame
-            **kwargs: 其他参数
+            price: 价格数组
             
         Returns:
-            pd.DataFrame: 添加了EMA指标列的DataFrame
+            Dict[str, np.ndarray]: EMA指标列
         """
-        data = data.copy()
-        data[self.column_name] = data[self.price_key].ewm(span=self.window, adjust=False).mean()
-        return data
+        return {self.column_name: ewm_mean(price, com=self._com)}
+    
+    def calculate_panel(self, price: np.ndarray) -> Dict[str, np.ndarray]:
+        """按标的并行计算指数移动平均线
+        
+        Args:
+            price: 形状为(标的数, K线数)的价格数组
+            
+        Returns:
+            Dict[str, np.ndarray]: EMA指标列
+        """
+        if not NUMBA_AVAILABLE:
+            return super().calculate_panel(price)
+        
+        price = np.ascontiguousarray(price, dtype=np.float64)
+        ema = np.empty_like(price)
+        ewm_panel_kernel(price, self._com, ema)
+        return {self.column_name: ema}
     
     def get_description(self) -> str:
         """获取指标的描述
@@ -95,35 +130,69 @@ class MACD(IndicatorBase):
         self.slow_period = slow_period
         self.signal_period = signal_period
         self.price_key = price_key
+        
+        # 参数在构造后不再变化，预先换算好各条EMA的质心参数
+        self._fast_com = ewm_com(span=fast_period)
+        self._slow_com = ewm_com(span=slow_period)
+        self._signal_com = ewm_com(span=signal_period)
     
-    def calculate(self, data: pd.DataFrame, **kwargs) -> pd.DataFrame:
+    def calculate_arr(self, price: np.ndarray) -> Dict[str, np.ndarray]:
         """计算MACD指标
         
         Args:
-            data: 包含OHLCV数据的DataFrame
-            **kwargs: 其他参数
+            price: 价格数组
             
         Returns:
-            pd.DataFrame: 添加了MACD指标列的DataFrame
+            Dict[str, np.ndarray]: MACD指标列
         """
-        data = data.copy()
-        
-        # 计算快线EMA
-        fast_ema = data[self.price_key].ewm(span=self.fast_period, adjust=False).mean()
-        
-        # 计算慢线EMA
-        slow_ema = data[self.price_key].ewm(span=self.slow_period, adjust=False).mean()
-        
-        # 计算MACD线
-        data['macd'] = fast_ema - slow_ema
+        if NUMBA_AVAILABLE:
+            # 快线、慢线和信号线在一次遍历中计算
+            macd = np.empty_like(price)
+            macd_signal = np.empty_like(price)
+            macd_kernel(price, self._fast_com, self._slow_com, self._signal_com, macd, macd_signal)
+        else:
+            # 计算快线、慢线EMA和MACD线
+            macd = ewm_mean(price, com=self._fast_com) - ewm_mean(price, com=self._slow_com)
+            
+            # 计算信号线
+            macd_signal = ewm_mean(macd, com=self._signal_com)
         
-        # 计算信号线
-        data['macd_signal'] = data['macd'].ewm(span=self.signal_period, adjust=False).mean()
+        return self.build_columns(macd, macd_signal)
+    
+    def calculate_panel(self, price: np.ndarray) -> Dict[str, np.ndarray]:
+        """按标的并行计算MACD指标
         
-        # 计算柱状图
-        data['macd_hist'] = data['macd'] - data['macd_signal']
+        Args:
+            price: 形状为(标的数, K线数)的价格数组
+            
+        Returns:
+            Dict[str, np.ndarray]: MACD指标列
+        """
+        if not NUMBA_AVAILABLE:
+            return super().calculate_panel(price)
+        
+        price = np.ascontiguousarray(price, dtype=np.float64)
+        macd = np.empty_like(price)
+        macd_signal = np.empty_like(price)
+        macd_panel_kernel(price, self._fast_com, self._slow_com, self._signal_com, macd, macd_signal)
+        return self.build_columns(macd, macd_signal)
+    
+    @staticmethod
+    def build_columns(macd, macd_signal) -> Dict[str, Any]:
+        """由MACD线和信号线生成全部MACD列
         
-        return data
+        Args:
+            macd: MACD线
+            macd_signal: 信号线
+            
+        Returns:
+            Dict: 列名到数据的映射
+        """
+        return {
+            'macd': macd,
+            'macd_signal': macd_signal,
+            'macd_hist': macd - macd_signal  # 柱状图
+        }
     
     def get_signal(self, data: pd.DataFrame, **kwargs) -> pd.DataFrame:
         """生成基于MACD的交易信号
@@ -143,35 +212,22 @@ class MACD(IndicatorBase):
         signal_type = kwargs.get('signal_type', 'cross')
         
         if signal_type == 'cross':
-            # 计算MACD交叉信号
-            data['macd_cross_signal'] = 0  # 默认无信号
-            
-            # 金叉：MACD线上穿信号线
-            data.loc[(data['macd'] > data['macd_signal']) & 
-                     (data['macd'].shift(1) <= data['macd_signal'].shift(1)), 'macd_cross_signal'] = 1
-            
-            # 死叉：MACD线下穿信号线
-            data.loc[(data['macd'] < data['macd_signal']) & 
-                     (data['macd'].shift(1) >= data['macd_signal'].shift(1)), 'macd_cross_signal'] = -1
+            # 计算MACD交叉信号：MACD线上穿信号线为金叉1，下穿为死叉-1
+            data['macd_cross_signal'] = cross_signal(
+                data['macd'].to_numpy(),
+                data['macd_signal'].to_numpy()
+            )
         
         elif signal_type == 'divergence':
             # 背离信号需要更复杂的计算
             # 这里提供一个简化版本
-            data['macd_divergence_signal'] = 0  # 默认无信号
-            
-            # 查找局部极值
-            for i in range(2, len(data) - 2):
-                # 价格出现高点但MACD没有创新高 -> 顶背离
-                if (data[self.price_key].iloc[i] > data[self.price_key].iloc[i-1] and 
-                    data[self.price_key].iloc[i] > data[self.price_key].iloc[i+1] and
-                    data['macd'].iloc[i] < data['macd'].iloc[i-2]):
-                    data['macd_divergence_signal'].iloc[i] = -1
-                
-                # 价格出现低点但MACD没有创新低 -> 底背离
-                elif (data[self.price_key].iloc[i] < data[self.price_key].iloc[i-1] and 
-                      data[self.price_key].iloc[i] < data[self.price_key].iloc[i+1] and
-                      data['macd'].iloc[i] > data['macd'].iloc[i-2]):
-                    data['macd_divergence_signal'].iloc[i] = 1
+            # 价格出现局部高点但MACD低于两个周期前 -> 顶背离，局部低点反之 -> 底背离
+            data['macd_divergence_signal'] = divergence_signal(
+                data[self.price_key].to_numpy(),
+                data['macd'].to_numpy(),
+                margin=2,
+                lookback=2
+            )
         
         return data
     
@@ -200,35 +256,58 @@ class BollingerBands(IndicatorBase):
         self.std_dev = std_dev
         self.price_key = price_key
     
-    def calculate(self, data: pd.DataFrame, **kwargs) -> pd.DataFrame:
+    def calculate_arr(self, price: np.ndarray) -> Dict[str, np.ndarray]:
         """计算布林带指标
         
         Args:
-            data: 包含OHLCV数据的DataFrame
-            **kwargs: 其他参数
+            price: 价格数组
             
         Returns:
-            pd.DataFrame: 添加了布林带指标列的DataFrame
+            Dict[str, np.ndarray]: 布林带指标列
         """
-        data = data.copy()
-        
-        # 计算移动平均线
-        data['bollinger_ma'] = data[self.price_key].rolling(window=self.window).mean()
-        
-        # 计算标准差
-        data['bollinger_std'] = data[self.price_key].rolling(window=self.window).std()
+        if NUMBA_AVAILABLE and isinstance(self.window, (int, np.integer)) and self.window > 0:
+            # 中轨、标准差和由它们派生的各列在一次遍历中计算
+            columns = ['bollinger_ma', 'bollinger_std', 'bollinger_upper', 'bollinger_lower',
+                       'bollinger_bandwidth', 'bollinger_b']
+            outputs = [np.empty_like(price) for _ in columns]
+            bollinger_kernel(price, self.window, float(self.std_dev), *outputs)
+            return dict(zip(columns, outputs))
+        
+        # 计算移动平均线和标准差
+        ma = rolling(price, self.window, 'mean')
+        std = rolling(price, self.window, 'std')
+        
+        return self.build_columns(price, ma, std)
+    
+    def build_columns(self, price, ma, std) -> Dict[str, Any]:
+        """由价格、中轨和标准差生成全部布林带列
         
+        Args:
+            price: 价格序列
+            ma: 移动平均线（中轨）
+            std: 滚动标准差
+            
+        Returns:
+            Dict: 列名到数据的映射
+        """
         # 计算上轨和下轨
-        data['bollinger_upper'] = data['bollinger_ma'] + (data['bollinger_std'] * self.std_dev)
-        data['bollinger_lower'] = data['bollinger_ma'] - (data['bollinger_std'] * self.std_dev)
-        
-        # 计算带宽
-        data['bollinger_bandwidth'] = (data['bollinger_upper'] - data['bollinger_lower']) / data['bollinger_ma']
-        
-        # 计算百分比B
-        data['bollinger_b'] = (data[self.price_key] - data['bollinger_lower']) / (data['bollinger_upper'] - data['bollinger_lower'])
-        
-        return data
+        upper = ma + (std * self.std_dev)
+        lower = ma - (std * self.std_dev)
+        
+        # 价格没有波动时上下轨重合，带宽和百分比B记为0而不是inf/NaN
+        width = upper - lower
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bandwidth = np.where(ma != 0, width / ma, 0.0)
+            pct_b = np.where(width != 0, (price - lower) / width, 0.0)
+        
+        return {
+            'bollinger_ma': ma,
+            'bollinger_std': std,
+            'bollinger_upper': upper,
+            'bollinger_lower': lower,
+            'bollinger_bandwidth': bandwidth,  # 带宽
+            'bollinger_b': pct_b  # 百分比B
+        }
     
     def get_signal(self, data: pd.DataFrame, **kwargs) -> pd.DataFrame:
         """生成基于布林带的交易信号
@@ -248,26 +327,25 @@ class BollingerBands(IndicatorBase):
         signal_type = kwargs.get('signal_type', 'breakout')
         
         if signal_type == 'breakout':
-            # 计算突破信号
-            data['bollinger_breakout_signal'] = 0  # 默认无信号
-            
-            # 价格上穿上轨：买入信号
-            data.loc[(data[self.price_key] > data['bollinger_upper']) & 
-                     (data[self.price_key].shift(1) <= data['bollinger_upper'].shift(1)), 'bollinger_breakout_signal'] = 1
-            
-            # 价格下穿下轨：卖出信号
-            data.loc[(data[self.price_key] < data['bollinger_lower']) & 
-                     (data[self.price_key].shift(1) >= data['bollinger_lower'].shift(1)), 'bollinger_breakout_signal'] = -1
+            # 计算突破信号：价格上穿上轨为买入信号，下穿下轨为卖出信号
+            data['bollinger_breakout_signal'] = level_cross_signal(
+                data[self.price_key].to_numpy(),
+                data['bollinger_upper'].to_numpy(),
+                data['bollinger_lower'].to_numpy()
+            )
         
         elif signal_type == 'mean_reversion':
             # 计算均值回归信号
-            data['bollinger_mean_reversion_signal'] = 0  # 默认无信号
+            price = data[self.price_key].to_numpy()
+            signal = np.zeros(len(data), dtype=np.int8)  # 默认无信号
             
             # 价格触及上轨：卖出信号
-            data.loc[data[self.price_key] >= data['bollinger_upper'], 'bollinger_mean_reversion_signal'] = -1
+            signal[price >= data['bollinger_upper'].to_numpy()] = -1
             
             # 价格触及下轨：买入信号
-            data.loc[data[self.price_key] <= data['bollinger_lower'], 'bollinger_mean_reversion_signal'] = 1
+            signal[price <= data['bollinger_lower'].to_numpy()] = 1
+            
+            data['bollinger_mean_reversion_signal'] = signal
         
         return data
     
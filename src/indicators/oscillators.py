@@ -5,11 +5,15 @@ import pandas as pd
 import numpy as np
 from typing import Dict, Any, Optional, List
 
-from src.indicators.indicator_base import IndicatorBase
+from src.indicators._backend import rolling
+from src.indicators._kernels import NUMBA_AVAILABLE, rolling_minmax_kernel, rsi_kernel
+from src.indicators.indicator_base import (
+    IndicatorBase, cross_signal, level_cross_signal, divergence_signal, evaluate_mask, ewm_com, ewm_mean
+)
 
 
 class RSI(IndicatorBase):
-    """相对强弱指数(RSI)"""
+    """相对强弱指数(RSI)，平均涨跌幅采用Wilder平滑"""
     
     def __init__(self, window: int = 14, price_key: str = 'close'):
         """初始化RSI指标
@@ -23,39 +27,20 @@ class RSI(IndicatorBase):
         self.price_key = price_key
         self.column_name = f"rsi_{window}"
     
-    def calculate(self, data: pd.DataFrame, **kwargs) -> pd.DataFrame:
+    def calculate_arr(self, price: np.ndarray) -> Dict[str, np.ndarray]:
         """计算RSI指标
         
         Args:
-            data: 包含OHLCV数据的DataFrame
-            **kwargs: 其他参数
+            price: 价格数组
             
         Returns:
-            pd.DataFrame: 添加了RSI指标列的DataFrame
+            Dict[str, np.ndarray]: RSI指标列
         """
-        data = data.copy()
-        
-        # 计算价格变化
-        delta = data[self.price_key].diff()
-        
-        # 分离上涨和下跌
-        gain = delta.copy()
-        loss = delta.copy()
-        gain[gain < 0] = 0
-        loss[loss > 0] = 0
-        loss = -loss  # 转为正值
-        
-        # 计算平均涨跌幅
-        avg_gain = gain.rolling(window=self.window).mean()
-        avg_loss = loss.rolling(window=self.window).mean()
+        # 单次遍历计算价格变化和Wilder平滑的平均涨跌幅
+        rsi = np.empty_like(price)
+        rsi_kernel(price, self.window, rsi)
         
-        # 计算相对强度
-        rs = avg_gain / avg_loss
-        
-        # 计算RSI
-        data[self.column_name] = 100 - (100 / (1 + rs))
-        
-        return data
+        return {self.column_name: rsi}
     
     def get_signal(self, data: pd.DataFrame, **kwargs) -> pd.DataFrame:
         """生成基于RSI的交易信号
@@ -81,36 +66,24 @@ class RSI(IndicatorBase):
         if signal_type == 'level':
             # 基于价位的信号
             signal_column = f"{self.column_name}_level_signal"
-            data[signal_column] = 0  # 默认无信号
-            
-            # 超卖区域反弹：买入信号
-            data.loc[(data[self.column_name] > oversold) & 
-                     (data[self.column_name].shift(1) <= oversold), signal_column] = 1
             
-            # 超买区域回落：卖出信号
-            data.loc[(data[self.column_name] < overbought) & 
-                     (data[self.column_name].shift(1) >= overbought), signal_column] = -1
+            # 超卖区域反弹为买入信号，超买区域回落为卖出信号
+            data[signal_column] = level_cross_signal(
+                data[self.column_name].to_numpy(), oversold, overbought
+            )
         
         elif signal_type == 'divergence':
             # 背离信号
             signal_column = f"{self.column_name}_divergence_signal"
-            data[signal_column] = 0  # 默认无信号
             
-            # 查找局部极值
-            for i in range(5, len(data) - 5):
-                # 价格出现高点但RSI没有创新高 -> 顶背离
-                if (data[self.price_key].iloc[i] > data[self.price_key].iloc[i-1] and 
-                    data[self.price_key].iloc[i] > data[self.price_key].iloc[i+1] and
-                    data[self.price_key].iloc[i] > data[self.price_key].iloc[i-5] and
-                    data[self.column_name].iloc[i] < data[self.column_name].iloc[i-5]):
-                    data[signal_column].iloc[i] = -1
-                
-                # 价格出现低点但RSI没有创新低 -> 底背离
-                elif (data[self.price_key].iloc[i] < data[self.price_key].iloc[i-1] and 
-                      data[self.price_key].iloc[i] < data[self.price_key].iloc[i+1] and
-                      data[self.price_key].iloc[i] < data[self.price_key].iloc[i-5] and
-                      data[self.column_name].iloc[i] > data[self.column_name].iloc[i-5]):
-                    data[signal_column].iloc[i] = 1
+            # 价格创出局部新高但RSI低于五个周期前 -> 顶背离，新低反之 -> 底背离
+            data[signal_column] = divergence_signal(
+                data[self.price_key].to_numpy(),
+                data[self.column_name].to_numpy(),
+                margin=5,
+                lookback=5,
+                confirm_price=True
+            )
         
         return data
     
@@ -138,41 +111,49 @@ class KDJ(IndicatorBase):
         self.k_window = k_window
         self.d_window = d_window
         self.j_window = j_window
+        self._k_com = ewm_com(alpha=1 / d_window)
+        self._d_com = ewm_com(alpha=1 / j_window)
+    
+    input_columns = ('high', 'low', 'close')
     
-    def calculate(self, data: pd.DataFrame, **kwargs) -> pd.DataFrame:
+    def calculate_arr(self, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> Dict[str, np.ndarray]:
         """计算KDJ指标
         
         Args:
-            data: 包含OHLCV数据的DataFrame
-            **kwargs: 其他参数
+            high: 最高价数组
+            low: 最低价数组
+            close: 收盘价数组
             
         Returns:
-            pd.DataFrame: 添加了KDJ指标列的DataFrame
+            Dict[str, np.ndarray]: KDJ指标列
         """
-        data = data.copy()
-        
-        # 获取最高价和最低价
-        high_prices = data['high']
-        low_prices = data['low']
-        close_prices = data['close']
-        
         # 计算最近k_window周期内的最高价和最低价
-        lowest_low = low_prices.rolling(window=self.k_window).min()
-        highest_high = high_prices.rolling(window=self.k_window).max()
-        
-        # 计算RSV值
-        rsv = 100 * ((close_prices - lowest_low) / (highest_high - lowest_low))
+        if NUMBA_AVAILABLE and isinstance(self.k_window, (int, np.integer)) and self.k_window > 0:
+            # 最低价和最高价在一次遍历中计算
+            lowest_low = np.empty_like(low)
+            highest_high = np.empty_like(high)
+            rolling_minmax_kernel(low, high, self.k_window, lowest_low, highest_high)
+        else:
+            lowest_low = rolling(low, self.k_window, 'min')
+            highest_high = rolling(high, self.k_window, 'max')
+        
+        # 计算RSV值，区间内价格没有波动时记为NaN，K值和D值沿用上一个值。
+        # 记为0会让K值和D值向0衰减，在横盘后产生虚假的超卖和交叉信号
+        price_range = highest_high - lowest_low
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsv = np.where(price_range != 0, 100 * ((close - lowest_low) / price_range), np.nan)
         
         # 计算K值
-        data['kdj_k'] = rsv.ewm(alpha=1/self.d_window, adjust=False).mean()
+        k = ewm_mean(rsv, com=self._k_com)
         
         # 计算D值
-        data['kdj_d'] = data['kdj_k'].ewm(alpha=1/self.j_window, adjust=False).mean()
+        d = ewm_mean(k, com=self._d_com)
         
-        # 计算J值
-        data['kdj_j'] = 3 * data['kdj_k'] - 2 * data['kdj_d']
-        
-        return data
+        return {
+            'kdj_k': k,
+            'kdj_d': d,
+            'kdj_j': 3 * k - 2 * d  # J值
+        }
     
     def get_signal(self, data: pd.DataFrame, **kwargs) -> pd.DataFrame:
         """生成基于KDJ的交易信号
@@ -196,28 +177,17 @@ class KDJ(IndicatorBase):
         signal_type = kwargs.get('signal_type', 'cross')
         
         if signal_type == 'cross':
-            # 基于KD线交叉的信号
-            data['kdj_cross_signal'] = 0  # 默认无信号
-            
-            # K线上穿D线：买入信号
-            data.loc[(data['kdj_k'] > data['kdj_d']) & 
-                     (data['kdj_k'].shift(1) <= data['kdj_d'].shift(1)), 'kdj_cross_signal'] = 1
-            
-            # K线下穿D线：卖出信号
-            data.loc[(data['kdj_k'] < data['kdj_d']) & 
-                     (data['kdj_k'].shift(1) >= data['kdj_d'].shift(1)), 'kdj_cross_signal'] = -1
+            # 基于KD线交叉的信号：K线上穿D线为买入信号，下穿为卖出信号
+            data['kdj_cross_signal'] = cross_signal(
+                data['kdj_k'].to_numpy(),
+                data['kdj_d'].to_numpy()
+            )
         
         elif signal_type == 'level':
-            # 基于超买超卖水平的信号
-            data['kdj_level_signal'] = 0  # 默认无信号
-            
-            # 超卖区域的K值反弹：买入信号
-            data.loc[(data['kdj_k'] > oversold) & 
-                     (data['kdj_k'].shift(1) <= oversold), 'kdj_level_signal'] = 1
-            
-            # 超买区域的K值回落：卖出信号
-            data.loc[(data['kdj_k'] < overbought) & 
-                     (data['kdj_k'].shift(1) >= overbought), 'kdj_level_signal'] = -1
+            # 基于超买超卖水平的信号：超卖区域的K值反弹为买入信号，超买区域的K值回落为卖出信号
+            data['kdj_level_signal'] = level_cross_signal(
+                data['kdj_k'].to_numpy(), oversold, overbought
+            )
         
         return data
     
@@ -242,37 +212,45 @@ class VolumeProfile(IndicatorBase):
         super().__init__('volume')
         self.window = window
     
-    def calculate(self, data: pd.DataFrame, **kwargs) -> pd.DataFrame:
+    input_columns = ('open', 'close', 'volume')
+    
+    def calculate_arr(self, open_: np.ndarray, close: np.ndarray, volume: np.ndarray) -> Dict[str, np.ndarray]:
         """计算成交量指标
         
         Args:
-            data: 包含OHLCV数据的DataFrame
-            **kwargs: 其他参数
+            open_: 开盘价数组
+            close: 收盘价数组
+            volume: 成交量数组
             
         Returns:
-            pd.DataFrame: 添加了成交量指标列的DataFrame
+            Dict[str, np.ndarray]: 成交量指标列
         """
-        data = data.copy()
-        
         # 计算成交量移动平均
-        data['volume_ma'] = data['volume'].rolling(window=self.window).mean()
-        
-        # 计算成交量变化率
-        data['volume_change'] = data['volume'].pct_change() * 100
-        
-        # 计算成交量相对强度
-        data['volume_ratio'] = data['volume'] / data['volume_ma']
+        volume_ma = rolling(volume, self.window, 'mean')
         
         # 识别主动买入/卖出成交量
         # 如果当前价格上涨，则视为主动买入，否则视为主动卖出
-        data['buying_volume'] = data['volume'] * (data['close'] >= data['open']).astype(int)
-        data['selling_volume'] = data['volume'] * (data['close'] < data['open']).astype(int)
-        
-        # 计算主动买入/卖出比率
-        data['buy_sell_ratio'] = data['buying_volume'].rolling(window=self.window).sum() / \
-                                data['selling_volume'].rolling(window=self.window).sum()
-        
-        return data
+        buying_volume = np.where(close >= open_, volume, 0.0)
+        selling_volume = np.where(close < open_, volume, 0.0)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # 计算成交量变化率，直接用错位切片相除，第一根K线没有前值为NaN
+            volume_change = np.empty_like(volume)
+            volume_change[:1] = np.nan
+            np.divide(volume[1:], volume[:-1], out=volume_change[1:])
+            volume_change[1:] -= 1
+            volume_change *= 100
+            
+            return {
+                'volume_ma': volume_ma,
+                'volume_change': volume_change,
+                'volume_ratio': volume / volume_ma,  # 成交量相对强度
+                'buying_volume': buying_volume,
+                'selling_volume': selling_volume,
+                # 计算主动买入/卖出比率
+                'buy_sell_ratio': rolling(buying_volume, self.window, 'sum') /
+                                  rolling(selling_volume, self.window, 'sum')
+            }
     
     def get_signal(self, data: pd.DataFrame, **kwargs) -> pd.DataFrame:
         """生成基于成交量的交易信号
@@ -295,29 +273,63 @@ class VolumeProfile(IndicatorBase):
         
         if signal_type == 'surge':
             # 基于成交量突增的信号
-            data['volume_surge_signal'] = 0  # 默认无信号
+            arrays = {
+                'ratio': data['volume_ratio'].to_numpy(),
+                'close': data['close'].to_numpy(),
+                'open_': data['open'].to_numpy(),
+                'surge': volume_surge
+            }
+            signal = np.zeros(len(data), dtype=np.int8)  # 默认无信号
             
             # 成交量突增且价格上涨：买入信号
-            data.loc[(data['volume_ratio'] > volume_surge) & 
-                     (data['close'] > data['open']), 'volume_surge_signal'] = 1
+            signal[evaluate_mask(
+                "(ratio > surge) & (close > open_)",
+                lambda ratio, surge, close, open_: (ratio > surge) & (close > open_),
+                **arrays
+            )] = 1
             
             # 成交量突增且价格下跌：卖出信号
-            data.loc[(data['volume_ratio'] > volume_surge) & 
-                     (data['close'] < data['open']), 'volume_surge_signal'] = -1
+            signal[evaluate_mask(
+                "(ratio > surge) & (close < open_)",
+                lambda ratio, surge, close, open_: (ratio > surge) & (close < open_),
+                **arrays
+            )] = -1
+            
+            data['volume_surge_signal'] = signal
         
         elif signal_type == 'divergence':
             # 价量背离信号
-            data['volume_divergence_signal'] = 0  # 默认无信号
+            signal = np.zeros(len(data), dtype=np.int8)  # 默认无信号
             
-            # 价格上涨但成交量下降：卖出信号（顶部警示）
-            data.loc[(data['close'] > data['close'].shift(1)) & 
-                     (data['volume'] < data['volume'].shift(1)) &
-                     (data['volume'].shift(1) < data['volume'].shift(2)), 'volume_divergence_signal'] = -1
+            if len(data) > 2:
+                # 用错位切片代替shift，前两根K线没有足够的历史数据，不产生信号
+                close = data['close'].to_numpy()
+                volume = data['volume'].to_numpy()
+                arrays = {
+                    'close': close[2:],
+                    'prev_close': close[1:-1],
+                    'volume': volume[2:],
+                    'prev_volume': volume[1:-1],
+                    'prev2_volume': volume[:-2]
+                }
+                
+                # 价格上涨但成交量下降：卖出信号（顶部警示）
+                signal[2:][evaluate_mask(
+                    "(close > prev_close) & (volume < prev_volume) & (prev_volume < prev2_volume)",
+                    lambda close, prev_close, volume, prev_volume, prev2_volume:
+                        (close > prev_close) & (volume < prev_volume) & (prev_volume < prev2_volume),
+                    **arrays
+                )] = -1
+                
+                # 价格下跌但成交量下降：买入信号（底部警示）
+                signal[2:][evaluate_mask(
+                    "(close < prev_close) & (volume < prev_volume) & (prev_volume < prev2_volume)",
+                    lambda close, prev_close, volume, prev_volume, prev2_volume:
+                        (close < prev_close) & (volume < prev_volume) & (prev_volume < prev2_volume),
+                    **arrays
+                )] = 1
             
-            # 价格下跌但成交量下降：买入信号（底部警示）
-            data.loc[(data['close'] < data['close'].shift(1)) & 
-                     (data['volume'] < data['volume'].shift(1)) &
-                     (data['volume'].shift(1) < data['volume'].shift(2)), 'volume_divergence_signal'] = 1
+            data['volume_divergence_signal'] = signal
         
         return data
     
@@ -2,12 +2,20 @@
 MCP处理器，负责处理用户自然语言请求并调用相应的功能模块
 """
 import os
+import copy
 import json
 import logging
-from typing import Dict, List, Any, Optional, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Any, Optional, Tuple
+
+import pandas as pd
+from cachetools import TLRUCache, TTLCache
+from cachetools.keys import hashkey
 
 from src.nlp.intent_parser import IntentParser
 from src.data_api.api_factory import APIFactory
+from src.data_api.base_api import cache_ttu
 from src.indicators.indicator_factory import IndicatorFactory
 from src.strategy.strategy_factory import StrategyFactory
 from src.trade.trade_executor import TradeExecutor
@@ -20,6 +28,15 @@ from config.constants import (
 class MCPHandler:
     """MCP处理器，处理自然语言请求并调用相应功能"""
     
+    # 并发处理多个股票时的最大线程数
+    MAX_WORKERS = 16
+    
+    # 缓存解析结果的查询文本最大长度，过长的输入很少重复
+    MAX_CACHED_QUERY_LEN = 512
+    
+    # 解析结果的缓存秒数
+    INTENT_CACHE_TTL = 600
+    
     def __init__(self, config_path: str):
         """初始化MCP处理器
         
@@ -34,6 +51,14 @@ class MCPHandler:
         self.trade_executor = TradeExecutor(self.api_factory)
         self.trade_decision = TradeDecision(self.api_factory, self.trade_executor)
         
+        # 市场股票列表每天变化很少，股票信息在短时间内可以复用，多个请求之间共享缓存
+        self._symbols_cache = TLRUCache(maxsize=32, ttu=cache_ttu(3600))
+        self._ticker_cache = TLRUCache(maxsize=4096, ttu=cache_ttu(30))
+        self._cache_lock = threading.Lock()
+        
+        # 看板刷新、客户端重试等相同的查询直接复用解析结果，不再调用LLM
+        self._intent_cache = TTLCache(maxsize=1024, ttl=self.INTENT_CACHE_TTL)
+        
         logging.info("MCP处理器初始化完成")
     
     def process_request(self, user_input: str) -> Dict[str, Any]:
@@ -49,45 +74,102 @@ class MCPHandler:
         
         try:
             # 解析用户意图
-            parsed_intent = self.intent_parser.parse(user_input)
+            parsed_intent = self._parse_intent(user_input)
             logging.info(f"解析结果: {parsed_intent}")
             
             # 根据命令类型调用相应处理方法
-            command_type = parsed_intent.get('command_type', '')
-            
-            if command_type == CMD_ANALYZE:
-                result = self._handle_analyze(parsed_intent)
-            elif command_type == CMD_SCREEN:
-                result = self._handle_screen(parsed_intent)
-            elif command_type == CMD_TRADE:
-                result = self._handle_trade(parsed_intent)
-            elif command_type == CMD_BACKTEST:
-                result = self._handle_backtest(parsed_intent)
-            elif command_type == CMD_MONITOR:
-                result = self._handle_monitor(parsed_intent)
-            else:
-                result = {
-                    'success': False,
-                    'message': f"不支持的命令类型: {command_type}",
-                    'data': None
-                }
-
-            result = {
-                'success': True,
-                'message': "处理完成",
-                'data': parsed_intent
+            return self._dispatch(parsed_intent)
+        
+        except Exception as e:
+            logging.error(f"处理请求出错: {e}")
+            return {
+                'success': False,
+                'message': f"处理请求出错: {str(e)}",
+                'data': None
             }
+    
+    def process_request_stream(self, user_input: str) -> Iterator[Dict[str, Any]]:
+        """处理用户请求，逐步返回结果
+        
+        分析请求每完成一个股票就返回一条{'symbol', 'result'}，全部完成后返回一条不含数据的汇总；
+        其他请求只返回一条与process_request相同的完整结果。
+        
+        Args:
+            user_input: 用户输入的自然语言文本
+            
+        Yields:
+            Dict: 结果片段
+        """
+        logging.info(f"接收到流式用户请求: {user_input}")
+        
+        try:
+            parsed_intent = self._parse_intent(user_input)
+            logging.info(f"解析结果: {parsed_intent}")
             
-            return result
+            if parsed_intent.get('command_type', '') == CMD_ANALYZE:
+                yield from self._stream_analyze(parsed_intent)
+            else:
+                yield self._dispatch(parsed_intent)
         
         except Exception as e:
             logging.error(f"处理请求出错: {e}")
-            return {
+            yield {
                 'success': False,
                 'message': f"处理请求出错: {str(e)}",
                 'data': None
             }
     
+    def _parse_intent(self, user_input: str) -> Dict[str, Any]:
+        """解析用户意图，较短的查询使用缓存的解析结果
+        
+        Args:
+            user_input: 用户输入的自然语言文本
+            
+        Returns:
+            Dict: 解析后的意图，可以自由修改，不影响缓存
+        """
+        if len(user_input) >= self.MAX_CACHED_QUERY_LEN:
+            return self.intent_parser.parse(user_input)
+        
+        key = hashkey(user_input)
+        with self._cache_lock:
+            intent = self._intent_cache.get(key)
+        if intent is None:
+            intent = self.intent_parser.parse(user_input)
+            # LLM出错时只有规则解析的结果，不缓存，下次请求重新调用LLM
+            if 'llm_error' not in intent:
+                with self._cache_lock:
+                    self._intent_cache[key] = intent
+        return copy.deepcopy(intent)
+    
+    def _dispatch(self, intent: Dict[str, Any]) -> Dict[str, Any]:
+        """根据命令类型调用相应处理方法
+        
+        Args:
+            intent: 解析后的意图
+            
+        Returns:
+            Dict: 处理结果
+        """
+        command_type = intent.get('command_type', '')
+        
+        if command_type == CMD_ANALYZE:
+            return self._handle_analyze(intent)
+        elif command_type == CMD_SCREEN:
+            return self._handle_screen(intent)
+        elif command_type == CMD_TRADE:
+            return self._handle_trade(intent)
+        elif command_type == CMD_BACKTEST:
+            return self._handle_backtest(intent)
+        elif command_type == CMD_MONITOR:
+            return self._handle_monitor(intent)
+        
+        return {
+            'success': False,
+            'message': f"不支持的命令类型: {command_type}",
+            'data': None
+        }
+    
     def _handle_analyze(self, intent: Dict[str, Any]) -> Dict[str, Any]:
         """处理分析请求
         
@@ -97,21 +179,9 @@ class MCPHandler:
         Returns:
             Dict: 处理结果
         """
-        symbols = intent.get('symbols', [])
-        market = intent.get('market', '')
         timeframe = intent.get('timeframe', '1d')
         indicators = intent.get('indicators', [])
-        
-        # 如果没有指定股票但指定了市场，获取该市场的热门股票
-        if not symbols and market:
-            try:
-                api = self.api_factory.get_api('futu', market)
-                if api:
-                    # 简化实现，获取前10个股票
-                    symbol_list = api.get_symbols(market)[:10]
-                    symbols = symbol_list
-            except Exception as e:
-                logging.error(f"获取市场股票列表失败: {e}")
+        symbols = self._analyze_symbols(intent)
         
         # 如果没有有效的股票代码，返回错误
         if not symbols:
@@ -121,74 +191,14 @@ class MCPHandler:
                 'data': None
             }
         
-        # 获取股票数据并添加指标
-        results = {}
+        # 各股票使用相同的指标配置，只构建一次
+        indicator_configs = self._build_indicator_configs(indicators)
         
-        for symbol in symbols:
-            try:
-                # 获取API
-                api = self.api_factory.get_api_for_symbol(symbol)
-                if not api:
-                    results[symbol] = {
-                        'success': False,
-                        'message': f"找不到适合{symbol}的API"
-                    }
-                    continue
-                
-                # 获取市场数据
-                market_data = api.get_market_data(symbol, timeframe, 100)
-                if market_data.empty:
-                    results[symbol] = {
-                        'success': False,
-                        'message': f"获取{symbol}市场数据失败"
-                    }
-                    continue
-                
-                # 获取股票基本信息
-                ticker_info = api.get_ticker_info(symbol)
-                
-                # 计算技术指标
-                indicator_configs = []
-                for ind in indicators:
-                    # 将指标名称转换为小写，以匹配指标工厂中的定义
-                    ind_type = ind.lower()
-                    indicator_configs.append({
-                        'type': ind_type,
-                        'params': {}  # 使用默认参数
-                    })
-                
-                if indicator_configs:
-                    market_data = IndicatorFactory.calculate_indicators(market_data, indicator_configs)
-                
-                # 生成分析结果
-                symbol_result = {
-                    'success': True,
-                    'ticker_info': ticker_info,
-                    'latest_price': float(market_data['close'].iloc[-1]) if not market_data.empty else None,
-                    'price_change': float(market_data['close'].iloc[-1] - market_data['close'].iloc[-2]) if len(market_data) > 1 else None,
-                    'price_change_percent': float((market_data['close'].iloc[-1] / market_data['close'].iloc[-2] - 1) * 100) if len(market_data) > 1 else None,
-                    'volume': float(market_data['volume'].iloc[-1]) if not market_data.empty else None,
-                    'indicators': {}
-                }
-                
-                # 添加指标信息
-                for ind in indicators:
-                    # 使用小写的指标名称查找指标列
-                    ind_type = ind.lower()
-                    ind_columns = [col for col in market_data.columns if col.startswith(ind_type)]
-                    if ind_columns:
-                        symbol_result['indicators'][ind] = {
-                            col: float(market_data[col].iloc[-1]) for col in ind_columns
-                        }
-                
-                results[symbol] = symbol_result
-                
-            except Exception as e:
-                logging.error(f"分析{symbol}出错: {e}")
-                results[symbol] = {
-                    'success': False,
-                    'message': f"分析出错: {str(e)}"
-                }
+        # 各股票的数据获取和指标计算相互独立，主要耗时在网络请求上，并发处理
+        with ThreadPoolExecutor(max_workers=min(self.MAX_WORKERS, len(symbols))) as executor:
+            results = dict(executor.map(
+                lambda symbol: self._analyze_symbol(symbol, timeframe, indicators, indicator_configs), symbols
+            ))
         
         return {
             'success': True,
@@ -196,6 +206,144 @@ class MCPHandler:
             'data': results
         }
     
+    def _stream_analyze(self, intent: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """处理分析请求，按完成顺序逐个返回各股票的结果
+        
+        Args:
+            intent: 解析后的意图
+            
+        Yields:
+            Dict: 单个股票的结果，最后是不含数据的汇总
+        """
+        timeframe = intent.get('timeframe', '1d')
+        indicators = intent.get('indicators', [])
+        symbols = self._analyze_symbols(intent)
+        
+        if not symbols:
+            yield {
+                'success': False,
+                'message': "未指定股票代码或无法获取市场股票列表",
+                'data': None
+            }
+            return
+        
+        indicator_configs = self._build_indicator_configs(indicators)
+        
+        executor = ThreadPoolExecutor(max_workers=min(self.MAX_WORKERS, len(symbols)))
+        try:
+            futures = [
+                executor.submit(self._analyze_symbol, symbol, timeframe, indicators, indicator_configs)
+                for symbol in symbols
+            ]
+            for future in as_completed(futures):
+                symbol, symbol_result = future.result()
+                yield {'symbol': symbol, 'result': symbol_result}
+        except GeneratorExit:
+            # 调用方提前关闭生成器（如客户端断开）时取消还未开始的任务，不等待正在执行的任务
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown(wait=True)
+        
+        yield {
+            'success': True,
+            'message': "分析完成",
+            'data': None
+        }
+    
+    def _analyze_symbols(self, intent: Dict[str, Any]) -> List[str]:
+        """获取分析请求涉及的股票代码
+        
+        Args:
+            intent: 解析后的意图
+            
+        Returns:
+            List[str]: 股票代码列表，无法确定时为空
+        """
+        symbols = intent.get('symbols', [])
+        market = intent.get('market', '')
+        
+        # 如果没有指定股票但指定了市场，获取该市场的热门股票
+        if not symbols and market:
+            try:
+                api = self.api_factory.get_api('futu', market)
+                if api:
+                    # 简化实现，获取前10个股票
+                    symbol_list = self._cached_symbols(api, market)[:10]
+                    symbols = symbol_list
+            except Exception as e:
+                logging.error(f"获取市场股票列表失败: {e}")
+        
+        return symbols
+    
+    def _analyze_symbol(self, symbol: str, timeframe: str, indicators: List[str],
+                        indicator_configs: List[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+        """获取单个股票的数据并计算指标
+        
+        Args:
+            symbol: 股票代码
+            timeframe: 时间周期
+            indicators: 指标名称列表
+            indicator_configs: 由指标名称构建的指标配置列表
+            
+        Returns:
+            Tuple[str, Dict]: 股票代码和该股票的分析结果
+        """
+        try:
+            # 获取API
+            api = self.api_factory.get_api_for_symbol(symbol)
+            if not api:
+                return symbol, {
+                    'success': False,
+                    'message': f"找不到适合{symbol}的API"
+                }
+            
+            # 获取市场数据
+            market_data = api.get_market_data(symbol, timeframe, 100)
+            if market_data.empty:
+                return symbol, {
+                    'success': False,
+                    'message': f"获取{symbol}市场数据失败"
+                }
+            
+            # 获取股票基本信息
+            ticker_info = self._cached_ticker(api, symbol)
+            
+            # 计算技术指标
+            if indicator_configs:
+                market_data = IndicatorFactory.calculate_indicators(market_data, indicator_configs)
+            
+            # 生成分析结果，直接从numpy数组取末尾的值，不经过pandas的索引器
+            closes = market_data['close'].to_numpy()
+            volumes = market_data['volume'].to_numpy()
+            symbol_result = {
+                'success': True,
+                'ticker_info': ticker_info,
+                'latest_price': float(closes[-1]) if len(closes) else None,
+                'price_change': float(closes[-1] - closes[-2]) if len(closes) > 1 else None,
+                'price_change_percent': float((closes[-1] / closes[-2] - 1) * 100) if len(closes) > 1 else None,
+                'volume': float(volumes[-1]) if len(volumes) else None,
+                'indicators': {}
+            }
+            
+            # 添加指标信息
+            for ind in indicators:
+                # 使用小写的指标名称查找指标列
+                ind_type = ind.lower()
+                ind_columns = [col for col in market_data.columns if col.startswith(ind_type)]
+                if ind_columns:
+                    symbol_result['indicators'][ind] = {
+                        col: float(market_data[col].to_numpy()[-1]) for col in ind_columns
+                    }
+            
+            return symbol, symbol_result
+            
+        except Exception as e:
+            logging.error(f"分析{symbol}出错: {e}")
+            return symbol, {
+                'success': False,
+                'message': f"分析出错: {str(e)}"
+            }
+    
     def _handle_screen(self, intent: Dict[str, Any]) -> Dict[str, Any]:
         """处理筛选请求
         
@@ -230,69 +378,36 @@ class MCPHandler:
                 }
             
             # 获取市场股票列表
-            symbol_list = api.get_symbols(market)
+            symbol_list = self._cached_symbols(api, market)
             
             # 如果股票太多，限制数量以提高性能
             max_symbols = 50
             if len(symbol_list) > max_symbols:
                 symbol_list = symbol_list[:max_symbols]
             
-            # 对每个股票进行筛选
-            screened_symbols = []
+            # 一次批量获取所有股票的市场数据
+            data_map = api.get_market_data_batch(symbol_list, timeframe, 100)
             
-            for symbol in symbol_list:
+            # 指标配置和策略实例对所有股票相同，在筛选前统一创建
+            indicator_configs = self._build_indicator_configs(indicators)
+            strategy_instances = []
+            for strategy_name in strategies:
                 try:
-                    # 获取市场数据
-                    market_data = api.get_market_data(symbol, timeframe, 100)
-                    if market_data.empty:
-                        continue
-                    
-                    # 应用技术指标
-                    indicator_configs = []
-                    for ind in indicators:
-                        # 将指标名称转换为小写，以匹配指标工厂中的定义
-                        ind_type = ind.lower()
-                        indicator_configs.append({
-                            'type': ind_type,
-                            'params': {}  # 使用默认参数
-                        })
-                    
-                    if indicator_configs:
-                        market_data = IndicatorFactory.calculate_indicators(market_data, indicator_configs)
-                    
-                    # 应用策略
-                    match_strategy = False
-                    for strategy_name in strategies:
-                        try:
-                            # 创建策略实例
-                            strategy = StrategyFactory.create_strategy(strategy_name)
-                            
-                            # 准备数据
-                            data_with_signals = strategy.prepare_data(market_data)
-                            data_with_signals = strategy.generate_signals(data_with_signals)
-                            
-                            # 检查最新信号
-                            latest_signal = data_with_signals['signal'].iloc[-1]
-                            if latest_signal == 1:  # 买入信号
-                                match_strategy = True
-                                break
-                        except Exception as e:
-                            logging.error(f"应用策略{strategy_name}到{symbol}出错: {e}")
-                    
-                    # 如果符合策略条件，添加到结果
-                    if match_strategy:
-                        ticker_info = api.get_ticker_info(symbol)
-                        screened_symbols.append({
-                            'symbol': symbol,
-                            'name': ticker_info.get('name', ''),
-                            'latest_price': float(market_data['close'].iloc[-1]),
-                            'price_change_percent': float((market_data['close'].iloc[-1] / market_data['close'].iloc[-2] - 1) * 100) if len(market_data) > 1 else None,
-                            'volume': float(market_data['volume'].iloc[-1]),
-                            'matched_strategy': strategies[0] if strategies else None
-                        })
-                
+                    strategy_instances.append((strategy_name, StrategyFactory.create_strategy(strategy_name)))
                 except Exception as e:
-                    logging.error(f"筛选{symbol}出错: {e}")
+                    logging.error(f"创建策略{strategy_name}出错: {e}")
+            
+            # 对每个股票进行筛选，各股票相互独立，并发处理
+            with ThreadPoolExecutor(max_workers=min(self.MAX_WORKERS, max(len(symbol_list), 1))) as executor:
+                screened_symbols = [
+                    item for item in executor.map(
+                        lambda symbol: self._screen_symbol(
+                            api, symbol, data_map.get(symbol), indicator_configs, strategy_instances, strategies
+                        ),
+                        symbol_list
+                    )
+                    if item is not None
+                ]
             
             return {
                 'success': True,
@@ -313,6 +428,118 @@ class MCPHandler:
                 'data': None
             }
     
+    def _screen_symbol(self, api, symbol: str, market_data: Optional[pd.DataFrame],
+                       indicator_configs: List[Dict[str, Any]], strategy_instances: List[Tuple[str, Any]],
+                       strategies: List[str]) -> Optional[Dict[str, Any]]:
+        """检查单个股票是否符合筛选条件
+        
+        Args:
+            api: 市场API实例
+            symbol: 股票代码
+            market_data: 该股票的市场数据
+            indicator_configs: 指标配置列表
+            strategy_instances: (策略名称, 策略实例)列表，各股票共享
+            strategies: 请求中的策略名称列表
+            
+        Returns:
+            Dict: 符合条件时返回股票信息，否则返回None
+        """
+        try:
+            if market_data is None or market_data.empty:
+                return None
+            
+            # 应用技术指标
+            if indicator_configs:
+                market_data = IndicatorFactory.calculate_indicators(market_data, indicator_configs)
+            
+            # 应用策略
+            match_strategy = False
+            for strategy_name, strategy in strategy_instances:
+                try:
+                    # 检查最新信号，只计算最后一根K线的信号
+                    if strategy.latest_signal(market_data) == 1:  # 买入信号
+                        match_strategy = True
+                        break
+                except Exception as e:
+                    logging.error(f"应用策略{strategy_name}到{symbol}出错: {e}")
+            
+            # 如果符合策略条件，添加到结果
+            if match_strategy:
+                ticker_info = self._cached_ticker(api, symbol)
+                closes = market_data['close'].to_numpy()
+                return {
+                    'symbol': symbol,
+                    'name': ticker_info.get('name', ''),
+                    'latest_price': float(closes[-1]),
+                    'price_change_percent': float((closes[-1] / closes[-2] - 1) * 100) if len(closes) > 1 else None,
+                    'volume': float(market_data['volume'].to_numpy()[-1]),
+                    'matched_strategy': strategies[0] if strategies else None
+                }
+        
+        except Exception as e:
+            logging.error(f"筛选{symbol}出错: {e}")
+        
+        return None
+    
+    @staticmethod
+    def _build_indicator_configs(indicators: List[str]) -> List[Dict[str, Any]]:
+        """由指标名称构建指标工厂使用的配置列表
+        
+        Args:
+            indicators: 指标名称列表
+            
+        Returns:
+            List[Dict]: 指标配置列表
+        """
+        indicator_configs = []
+        for ind in indicators:
+            # 将指标名称转换为小写，以匹配指标工厂中的定义
+            ind_type = ind.lower()
+            indicator_configs.append({
+                'type': ind_type,
+                'params': {}  # 使用默认参数
+            })
+        return indicator_configs
+    
+    def _cached_symbols(self, api, market: str) -> List[str]:
+        """获取市场股票列表，一小时内的重复查询直接返回缓存
+        
+        Args:
+            api: 市场API实例
+            market: 市场类型
+            
+        Returns:
+            List[str]: 股票代码列表
+        """
+        key = hashkey(market)
+        with self._cache_lock:
+            symbols = self._symbols_cache.get(key)
+        if symbols is None:
+            # 请求期间不持有锁，避免阻塞其他线程
+            symbols = api.get_symbols(market)
+            with self._cache_lock:
+                self._symbols_cache[key] = symbols
+        return symbols
+    
+    def _cached_ticker(self, api, symbol: str) -> Dict[str, Any]:
+        """获取股票信息，30秒内的重复查询直接返回缓存
+        
+        Args:
+            api: 市场API实例
+            symbol: 股票代码
+            
+        Returns:
+            Dict: 股票信息
+        """
+        key = hashkey(symbol)
+        with self._cache_lock:
+            info = self._ticker_cache.get(key)
+        if info is None:
+            info = api.get_ticker_info(symbol)
+            with self._cache_lock:
+                self._ticker_cache[key] = info
+        return info
+    
     def _handle_trade(self, intent: Dict[str, Any]) -> Dict[str, Any]:
         """处理交易请求
         
@@ -341,15 +568,17 @@ class MCPHandler:
             # 对每个股票执行交易决策
             trade_results = []
             
+            # 有策略时各股票使用同一个策略配置
+            if strategies:
+                strategy_name = strategies[0]
+                strategy_config = {
+                    'strategy_type': strategy_name,
+                    'strategy_params': {}  # 使用默认参数
+                }
+            
             for symbol in symbols:
                 # 对于有策略的情况，使用策略生成交易决策
                 if strategies:
-                    strategy_name = strategies[0]
-                    strategy_config = {
-                        'strategy_type': strategy_name,
-                        'strategy_params': {}  # 使用默认参数
-                    }
-                    
                     # 生成决策
                     decisions = self.trade_decision.make_decision(strategy_config, [symbol])
                     
@@ -447,32 +676,34 @@ class MCPHandler:
             days = parameters.get('days', 365)  # 默认回测一年
             initial_capital = parameters.get('amount', 10000.0)  # 初始资金
             
-            # 对每个股票执行回测
-            backtest_results = []
+            # 创建策略配置，各股票共用
+            strategy_configs = [
+                {
+                    'strategy_type': strategy_name,
+                    'strategy_params': {}  # 使用默认参数
+                }
+                for strategy_name in strategies
+            ]
             
-            for symbol in symbols:
-                for strategy_name in strategies:
-                    # 创建策略配置
-                    strategy_config = {
-                        'strategy_type': strategy_name,
-                        'strategy_params': {}  # 使用默认参数
-                    }
-                    
-                    # 执行回测
-                    result = self.trade_decision.backtest_strategy(
-                        strategy_config=strategy_config,
-                        symbol=symbol,
-                        timeframe=timeframe,
-                        initial_capital=initial_capital
-                    )
-                    
-                    backtest_results.append({
-                        'symbol': symbol,
-                        'strategy': strategy_name,
-                        'success': 'error' not in result,
-                        'message': result.get('error', '回测成功'),
-                        'result': result
-                    })
+            # 对每个股票和策略的组合执行回测，各组合在进程池中并行计算
+            results = self.trade_decision.backtest_strategies(
+                strategy_configs=strategy_configs,
+                symbols=symbols,
+                timeframe=timeframe,
+                initial_capital=initial_capital
+            )
+            
+            # 结果按股票在外、策略在内的顺序排列
+            backtest_results = []
+            tasks = [(symbol, strategy_name) for symbol in symbols for strategy_name in strategies]
+            for (symbol, strategy_name), result in zip(tasks, results):
+                backtest_results.append({
+                    'symbol': symbol,
+                    'strategy': strategy_name,
+                    'success': 'error' not in result,
+                    'message': result.get('error', '回测成功'),
+                    'result': result
+                })
             
             return {
                 'success': True,
@@ -490,6 +721,10 @@ class MCPHandler:
                 'data': None
             }
     
+    def close(self):
+        """释放处理器持有的资源，服务关闭时调用"""
+        self.trade_decision.close()
+    
     def _handle_monitor(self, intent: Dict[str, Any]) -> Dict[str, Any]:
         """处理监控请求
         
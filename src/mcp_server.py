@@ -3,34 +3,40 @@ MCP服务主入口，提供API接口
 """
 import os
 import json
+import queue
+import asyncio
 import logging
 import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
 from typing import Dict, Any, Optional
 
 import uvicorn
 from fastapi import FastAPI, HTTPException, Depends
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, Response
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 
 from src.mcp_handler import MCPHandler
 
+# 优先使用orjson序列化响应，直接支持numpy标量，未安装时退回标准库
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+    ORJSON_AVAILABLE = True
+except ImportError:
+    from fastapi.responses import JSONResponse as DefaultResponse
+    ORJSON_AVAILABLE = False
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler("autoinvest.log")
-    ]
-)
 
 # 创建FastAPI应用
 app = FastAPI(
     title="AutoInvestAI - 智能投资助手",
     description="通过自然语言处理实现智能投资分析和交易",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=DefaultResponse
 )
 
 # 添加CORS支持
@@ -42,9 +48,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 全局MCP处理器实例
+# 配置文件路径
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "config.json")
+
+# 全局MCP处理器实例，服务启动时创建
 mcp_handler = None
 
+# 处理查询的线程池，请求处理包含阻塞的网络请求和指标计算，不能在事件循环中直接执行
+QUERY_WORKERS = 16
+query_executor: Optional[ThreadPoolExecutor] = None
+
+# 日志的后台输出线程
+log_listener: Optional[QueueListener] = None
+
+# 日志线程、线程池和处理器都在服务启动时创建。回测子进程以spawn方式启动时会重新导入本模块，
+# 导入时不能有这些副作用，否则每个子进程都会再打开一份日志文件和线程池
+
 
 # 请求模型
 class MCPRequest(BaseModel):
@@ -63,23 +82,47 @@ class MCPResponse(BaseModel):
     query: str = Field(..., description="原始查询文本")
 
 
+def setup_logging():
+    """配置日志，请求线程只把日志放入队列，由后台线程写入控制台和文件"""
+    global log_listener
+    if log_listener is not None:
+        return
+    
+    log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    log_handlers = [logging.StreamHandler(), logging.FileHandler("autoinvest.log")]
+    for handler in log_handlers:
+        handler.setFormatter(log_formatter)
+    
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    log_listener = QueueListener(log_queue, *log_handlers)
+    log_listener.start()
+    
+    # 入队时只合并消息参数，时间和级别等格式由后台线程中的输出处理器添加
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+    
+    logging.basicConfig(
+        level=logging.INFO,
+        handlers=[queue_handler]
+    )
+
+
 # 初始化MCP处理器
+@app.on_event("startup")
+def init_mcp_handler():
+    """服务启动时配置日志、创建查询线程池，并读取配置创建MCP处理器，避免第一个请求承担初始化的开销"""
+    global mcp_handler, query_executor
+    setup_logging()
+    query_executor = ThreadPoolExecutor(max_workers=QUERY_WORKERS, thread_name_prefix="mcp-query")
+    mcp_handler = MCPHandler(CONFIG_PATH)
+
+
 def get_mcp_handler():
     """获取MCP处理器实例
     
     Returns:
         MCPHandler: MCP处理器实例
     """
-    global mcp_handler
-    
-    if mcp_handler is None:
-        # 获取配置路径
-        config_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config")
-        config_path = os.path.join(config_dir, "config.json")
-        
-        # 创建MCP处理器
-        mcp_handler = MCPHandler(config_path)
-    
     return mcp_handler
 
 
@@ -130,6 +173,7 @@ async def root():
                 <p>您可以通过以下API接口与系统交互：</p>
                 <ul>
                     <li><code>POST /api/query</code> - 处理投资相关查询</li>
+                    <li><code>POST /api/query/stream</code> - 处理投资相关查询，以NDJSON逐条返回结果</li>
                     <li><code>GET /api/health</code> - 服务健康检查</li>
                 </ul>
                 <p>访问 <a href="/docs">/docs</a> 查看完整的API文档。</p>
@@ -149,7 +193,25 @@ async def favicon():
     """
     return Response(content="", media_type="image/x-icon")
 
-@app.post("/api/query", response_model=MCPResponse)
+def _dump_json(content: Dict[str, Any]) -> bytes:
+    """把处理结果编码为JSON
+    
+    Args:
+        content: 处理结果
+        
+    Returns:
+        bytes: JSON
+    """
+    if ORJSON_AVAILABLE:
+        # orjson不支持的类型（如pandas时间戳）交给FastAPI的编码器转换
+        return orjson.dumps(
+            content, default=jsonable_encoder, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False).encode("utf-8")
+
+
+# 处理结果已经是MCPResponse的结构，直接编码返回，不再按模型校验；模型只用于接口文档
+@app.post("/api/query", responses={200: {"model": MCPResponse}})
 async def process_query(request: MCPRequest, handler: MCPHandler = Depends(get_mcp_handler)):
     """处理用户查询
     
@@ -158,11 +220,12 @@ async def process_query(request: MCPRequest, handler: MCPHandler = Depends(get_m
         handler: MCP处理器实例
         
     Returns:
-        MCPResponse: 处理结果
+        Response: 按MCPResponse结构编码的处理结果
     """
     try:
-        # 处理请求
-        result = handler.process_request(request.query)
+        # 在线程池中处理请求，避免阻塞事件循环
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(query_executor, handler.process_request, request.query)
 
         results = {
             "success": result.get("success", False),
@@ -171,13 +234,62 @@ async def process_query(request: MCPRequest, handler: MCPHandler = Depends(get_m
             "query": request.query
         }
 
-        logging.info(f"处理查询结果: {results}")
-        return results
+        logging.debug("处理查询结果: %s", results)
+        return Response(content=_dump_json(results), media_type="application/json")
     except Exception as e:
         logging.error(f"处理查询出错: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/query/stream")
+async def process_query_stream(request: MCPRequest, handler: MCPHandler = Depends(get_mcp_handler)):
+    """流式处理用户查询，每行一个JSON对象
+    
+    分析请求每完成一个股票就返回一行{"symbol", "result"}，最后一行是汇总；其他请求只返回一行完整结果。
+    
+    Args:
+        request: 用户请求
+        handler: MCP处理器实例
+        
+    Returns:
+        StreamingResponse: NDJSON流
+    """
+    chunks = handler.process_request_stream(request.query)
+    # 取结果和关闭生成器在不同的线程中执行，加锁避免关闭时生成器仍在执行
+    chunks_lock = threading.Lock()
+    
+    def next_chunk():
+        with chunks_lock:
+            return next(chunks, None)
+    
+    def close_chunks():
+        with chunks_lock:
+            chunks.close()
+    
+    async def generate():
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                # 生成器中的处理会阻塞，每取一条结果都放到线程池中执行
+                chunk = await loop.run_in_executor(query_executor, next_chunk)
+                if chunk is None:
+                    break
+                yield _dump_json(chunk) + b"\n"
+        finally:
+            # 客户端断开时生成器未执行完，关闭时会清理剩余的任务，同样放到线程池中执行，不阻塞事件循环
+            query_executor.submit(close_chunks)
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+@app.on_event("shutdown")
+def shutdown_executor():
+    """服务关闭时等待正在处理的查询完成并释放线程池和处理器资源，再写完队列中剩余的日志"""
+    query_executor.shutdown(wait=True)
+    mcp_handler.close()
+    log_listener.stop()
+
+
 @app.get("/api/health")
 async def health_check():
     """健康检查接口
@@ -221,5 +333,6 @@ if __name__ == "__main__":
         port = args.port
     
     # 启动服务
+    setup_logging()
     logging.info(f"启动AutoInvestAI MCP服务，地址: {host}:{port}")
     uvicorn.run(app, host=host, port=port)
\ No newline at end of file
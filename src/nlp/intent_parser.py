@@ -315,4 +315,8 @@ class IntentParser:
             "parameters": {**parameters, **llm_result.get("other_parameters", {})}
         }
         
+        # LLM请求失败或响应无法解析时结果只来自规则解析，标记出来供调用方判断
+        if not llm_result or "error" in llm_result:
+            result["llm_error"] = llm_result.get("error", "LLM响应中没有有效的结果")
+        
         return result
\ No newline at end of file
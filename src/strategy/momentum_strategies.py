@@ -4,6 +4,8 @@
 from typing import Dict, List, Any, Optional
 import pandas as pd
 
+from src.indicators.indicator_base import latest_cross, latest_level_cross
+from src.indicators.indicator_factory import IndicatorFactory
 from src.strategy.strategy_base import StrategyBase
 from config.constants import (
     INDICATOR_MA, INDICATOR_EMA, INDICATOR_MACD, INDICATOR_RSI,
@@ -61,6 +63,20 @@ class MACDCrossStrategy(StrategyBase):
         
         return data
     
+    def latest_signal(self, data: pd.DataFrame) -> int:
+        """直接在价格数组上计算MACD，只判断最后一根K线的交叉
+        
+        Args:
+            data: 原始数据DataFrame
+            
+        Returns:
+            int: 买入为1，卖出为-1，无信号为0
+        """
+        config = self.indicators[0]
+        macd = IndicatorFactory.create_indicator(config['type'], **config['params'])
+        columns = macd.calculate_arr(self._price_array(data))
+        return latest_cross(columns['macd'], columns['macd_signal'])
+    
     def get_description(self) -> str:
         """获取策略的描述
         
@@ -124,6 +140,27 @@ class MACrossStrategy(StrategyBase):
         
         return data
     
+    def latest_signal(self, data: pd.DataFrame) -> int:
+        """直接在价格数组上计算快慢均线，只判断最后一根K线的交叉
+        
+        Args:
+            data: 原始数据DataFrame
+            
+        Returns:
+            int: 买入为1，卖出为-1，无信号为0
+        """
+        config = self.indicators[0]
+        slow_ma = IndicatorFactory.create_indicator(config['type'], **config['params'])
+        fast_ma = IndicatorFactory.create_indicator(
+            config['type'], window=config['signal_params']['short_window'], price_key=slow_ma.price_key
+        )
+        
+        price = self._price_array(data)
+        return latest_cross(
+            fast_ma.calculate_arr(price)[fast_ma.column_name],
+            slow_ma.calculate_arr(price)[slow_ma.column_name]
+        )
+    
     def get_description(self) -> str:
         """获取策略的描述
         
@@ -187,6 +224,22 @@ class RSIOverboughtStrategy(StrategyBase):
         
         return data
     
+    def latest_signal(self, data: pd.DataFrame) -> int:
+        """直接在价格数组上计算RSI，只判断最后一根K线是否穿越超买超卖线
+        
+        Args:
+            data: 原始数据DataFrame
+            
+        Returns:
+            int: 买入为1，卖出为-1，无信号为0
+        """
+        config = self.indicators[0]
+        rsi = IndicatorFactory.create_indicator(config['type'], **config['params'])
+        values = rsi.calculate_arr(self._price_array(data))[rsi.column_name]
+        return latest_level_cross(
+            values, config['signal_params']['oversold'], config['signal_params']['overbought']
+        )
+    
     def get_description(self) -> str:
         """获取策略的描述
         
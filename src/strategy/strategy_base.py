@@ -6,7 +6,7 @@ from typing import Dict, List, Any, Optional, Tuple
 import pandas as pd
 import numpy as np
 
-from src.indicators.indicator_factory import IndicatorFactory
+from src.indicators.indicator_factory import LazyIndicatorPlan
 
 
 class StrategyBase(ABC):
@@ -36,6 +36,17 @@ class StrategyBase(ABC):
             'signal_params': signal_params or {}
         })
     
+    def _price_array(self, data: pd.DataFrame) -> np.ndarray:
+        """取出策略使用的价格列，转换为指标计算使用的float64数组
+        
+        Args:
+            data: 原始数据DataFrame
+            
+        Returns:
+            np.ndarray: 价格数组
+        """
+        return np.ascontiguousarray(data[self.params['price_key']].to_numpy(), dtype=np.float64)
+    
     def prepare_data(self, data: pd.DataFrame) -> pd.DataFrame:
         """准备数据，计算所需的指标
         
@@ -45,13 +56,23 @@ class StrategyBase(ABC):
         Returns:
             pd.DataFrame: 添加了指标的DataFrame
         """
-        # 使用指标工厂计算指标
-        result = IndicatorFactory.calculate_indicators(data, self.indicators)
+        # 一次性计算所有指标，再生成信号
+        return LazyIndicatorPlan.from_configs(self.indicators).execute(data)
+    
+    def latest_signal(self, data: pd.DataFrame) -> int:
+        """计算最新一根K线的策略信号，用于筛选时只需要当前信号的场景
         
-        # 计算信号
-        result = IndicatorFactory.get_indicator_signals(result, self.indicators)
+        基本实现生成完整的信号序列后取最后一个值，信号只依赖单个指标的策略可以重写为直接在numpy数组上计算。
         
-        return result
+        Args:
+            data: 原始数据DataFrame
+            
+        Returns:
+            int: 买入为1，卖出为-1，无信号为0
+        """
+        data = self.prepare_data(data)
+        data = self.generate_signals(data)
+        return int(data['signal'].to_numpy()[-1])
     
     @abstractmethod
     def generate_signals(self, data: pd.DataFrame) -> pd.DataFrame:
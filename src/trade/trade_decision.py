@@ -1,10 +1,14 @@
 """
 交易决策引擎，负责根据策略信号和风险管理生成交易指令
 """
+import os
 import time
 import json
 import logging
-from typing import Dict, List, Any, Optional, Tuple
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple, Union
 import pandas as pd
 import numpy as np
 
@@ -13,9 +17,52 @@ from src.strategy.strategy_factory import StrategyFactory
 from src.trade.trade_executor import TradeExecutor
 
 
+def _run_backtest(strategy_config: Dict[str, Any], market_data: pd.DataFrame, initial_capital: float,
+                  start_date: str = None, end_date: str = None) -> Dict[str, Any]:
+    """在已获取的市场数据上回测策略，定义在模块级以便在子进程中执行
+    
+    Args:
+        strategy_config: 策略配置
+        market_data: 市场数据
+        initial_capital: 初始资金
+        start_date: 起始日期，格式为"YYYY-MM-DD"
+        end_date: 结束日期，格式为"YYYY-MM-DD"
+        
+    Returns:
+        Dict: 回测结果，出错时包含error
+    """
+    # 创建策略实例
+    try:
+        strategy = StrategyFactory.create_strategy(
+            strategy_type=strategy_config.get('strategy_type'),
+            subtype=strategy_config.get('strategy_subtype'),
+            **strategy_config.get('strategy_params', {})
+        )
+    except Exception as e:
+        logging.error(f"创建策略失败: {e}")
+        return {'error': str(e)}
+    
+    try:
+        # 过滤日期范围
+        if start_date:
+            market_data = market_data[market_data.index >= start_date]
+        if end_date:
+            market_data = market_data[market_data.index <= end_date]
+        
+        # 执行回测
+        return strategy.backtest(market_data, initial_capital)
+    except Exception as e:
+        error_msg = f"回测失败: {e}"
+        logging.error(error_msg)
+        return {'error': error_msg}
+
+
 class TradeDecision:
     """交易决策引擎"""
     
+    # 回测进程池的进程数
+    BACKTEST_WORKERS = os.cpu_count() or 1
+    
     def __init__(self, api_factory: APIFactory, trade_executor: TradeExecutor):
         """初始化交易决策引擎
         
@@ -31,6 +78,10 @@ class TradeDecision:
             'stop_loss_pct': 0.05,     # 止损百分比
             'take_profit_pct': 0.1,    # 止盈百分比
         }
+        
+        # 回测进程池，首次批量回测时创建，多个查询线程可能同时回测，创建和关闭时加锁
+        self._backtest_pool: Optional[ProcessPoolExecutor] = None
+        self._backtest_pool_lock = threading.Lock()
     
     def _fetch_market_data(self, symbol: str, timeframe: str, limit: int = 100) -> pd.DataFrame:
         """获取市场数据
@@ -245,23 +296,70 @@ class TradeDecision:
         Returns:
             Dict: 回测结果
         """
-        # 解析策略配置
-        strategy_type = strategy_config.get('strategy_type')
-        strategy_subtype = strategy_config.get('strategy_subtype')
-        strategy_params = strategy_config.get('strategy_params', {})
+        market_data = self._fetch_backtest_data(symbol, timeframe)
+        if isinstance(market_data, dict):
+            return market_data
         
-        # 创建策略实例
-        try:
-            strategy = StrategyFactory.create_strategy(
-                strategy_type=strategy_type,
-                subtype=strategy_subtype,
-                **strategy_params
-            )
-        except Exception as e:
-            logging.error(f"创建策略失败: {e}")
-            return {'error': str(e)}
+        return _run_backtest(strategy_config, market_data, initial_capital, start_date, end_date)
+    
+    def backtest_strategies(self, strategy_configs: List[Dict[str, Any]], symbols: List[str],
+                            timeframe: str, initial_capital: float = 10000.0) -> List[Dict[str, Any]]:
+        """对多个股票和多个策略的所有组合执行回测
+        
+        每个股票的数据只获取一次，回测本身是CPU密集的计算，在进程池中并行执行。
+        
+        Args:
+            strategy_configs: 策略配置列表
+            symbols: 交易对/股票代码列表
+            timeframe: 时间周期
+            initial_capital: 初始资金
+            
+        Returns:
+            List[Dict]: 回测结果，按股票在外、策略在内的顺序排列
+        """
+        results: List[Optional[Dict[str, Any]]] = []
+        tasks = []  # (结果位置, 策略配置, 市场数据)
+        for symbol in symbols:
+            market_data = self._fetch_backtest_data(symbol, timeframe)
+            for strategy_config in strategy_configs:
+                # 获取数据失败时各策略都返回同一个错误
+                if isinstance(market_data, dict):
+                    results.append(market_data)
+                else:
+                    tasks.append((len(results), strategy_config, market_data))
+                    results.append(None)
+        
+        if len(tasks) <= 1 or self.BACKTEST_WORKERS <= 1:
+            # 只有一个回测或只有一个CPU时不值得启动子进程
+            for i, strategy_config, market_data in tasks:
+                results[i] = _run_backtest(strategy_config, market_data, initial_capital)
+            return results
+        
+        pool = self._get_backtest_pool()
+        futures = [
+            (i, pool.submit(_run_backtest, strategy_config, market_data, initial_capital))
+            for i, strategy_config, market_data in tasks
+        ]
+        for i, future in futures:
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                error_msg = f"回测失败: {e}"
+                logging.error(error_msg)
+                results[i] = {'error': error_msg}
+        
+        return results
+    
+    def _fetch_backtest_data(self, symbol: str, timeframe: str) -> Union[pd.DataFrame, Dict[str, Any]]:
+        """获取回测使用的历史数据
         
-        # 获取市场数据
+        Args:
+            symbol: 交易对/股票代码
+            timeframe: 时间周期
+            
+        Returns:
+            pd.DataFrame: 市场数据，失败时返回包含error的字典
+        """
         api = self.api_factory.get_api_for_symbol(symbol)
         if not api:
             error_msg = f"找不到适合{symbol}的API"
@@ -271,19 +369,31 @@ class TradeDecision:
         try:
             # 获取足够的历史数据
             # 注意：这里简化了实现，实际可能需要分批获取和合并数据
-            market_data = api.get_market_data(symbol, timeframe, 1000)
-            
-            # 过滤日期范围
-            if start_date:
-                market_data = market_data[market_data.index >= start_date]
-            if end_date:
-                market_data = market_data[market_data.index <= end_date]
-            
-            # 执行回测
-            backtest_result = strategy.backtest(market_data, initial_capital)
-            
-            return backtest_result
+            return api.get_market_data(symbol, timeframe, 1000)
         except Exception as e:
             error_msg = f"回测失败: {e}"
             logging.error(error_msg)
-            return {'error': error_msg}
\ No newline at end of file
+            return {'error': error_msg}
+    
+    def _get_backtest_pool(self) -> ProcessPoolExecutor:
+        """获取回测进程池
+        
+        主进程中有行情连接和日志线程，子进程用spawn方式启动，不继承这些线程持有的锁。
+        
+        Returns:
+            ProcessPoolExecutor: 进程池
+        """
+        with self._backtest_pool_lock:
+            if self._backtest_pool is None:
+                self._backtest_pool = ProcessPoolExecutor(
+                    max_workers=self.BACKTEST_WORKERS,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._backtest_pool
+    
+    def close(self):
+        """关闭回测进程池，等待正在执行的回测完成"""
+        with self._backtest_pool_lock:
+            pool, self._backtest_pool = self._backtest_pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
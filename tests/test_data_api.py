@@ -0,0 +1,277 @@
+"""
+测试数据API模块
+"""
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+import pandas as pd
+import numpy as np
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_api.binance_api import BinanceAPI
+from src.data_api.api_factory import _APICache
+from src.data_api.futu_api import _ContextPool
+
+
+class TestBinanceAPI(unittest.TestCase):
+    """测试币安API的数据转换"""
+    
+    def setUp(self):
+        """设置测试环境"""
+        self.api = BinanceAPI(api_key='test', api_secret='test')
+        
+        # 模拟币安K线接口返回的数据，价格和成交量为字符串
+        self.klines = [
+            [1700000000000, '1.0', '2.0', '0.5', '1.5', '100', 1700000059999, '150', 10, '50', '75', '0'],
+            [1700000060000, '1.5', '2.5', '1.0', '2.0', '50', 1700000119999, '100', 5, '25', '50', '0']
+        ]
+    
+    def test_klines_to_dataframe(self):
+        """测试K线数据转换为OHLCV"""
+        df = self.api._klines_to_dataframe(self.klines)
+        
+        # 验证列和类型
+        self.assertEqual(list(df.columns), ['open', 'high', 'low', 'close', 'volume'])
+        for col in df.columns:
+            self.assertEqual(df[col].dtype, np.float64)
+        
+        # 验证数值
+        self.assertEqual(df['close'].iloc[-1], 2.0)
+        self.assertEqual(df['volume'].iloc[0], 100.0)
+        
+        # 验证时间索引
+        self.assertIsInstance(df.index, pd.DatetimeIndex)
+        self.assertEqual(df.index.name, 'timestamp')
+        self.assertEqual(df.index[0], pd.to_datetime(1700000000000, unit='ms'))
+    
+    def test_parse_klines_columns_are_contiguous(self):
+        """测试按列解析的K线为连续的float64数组"""
+        ohlcv = self.api._parse_klines(self.klines)
+        
+        self.assertEqual(len(ohlcv), 2)
+        for arr in (ohlcv.open, ohlcv.high, ohlcv.low, ohlcv.close, ohlcv.volume):
+            self.assertEqual(arr.dtype, np.float64)
+            self.assertTrue(arr.flags['C_CONTIGUOUS'])
+        np.testing.assert_array_equal(ohlcv.close, [1.5, 2.0])
+        self.assertEqual(ohlcv.timestamp[1], np.datetime64(1700000060000, 'ms'))
+    
+    def test_klines_to_dataframe_empty(self):
+        """测试空K线数据"""
+        df = self.api._klines_to_dataframe([])
+        
+        self.assertTrue(df.empty)
+        self.assertEqual(list(df.columns), ['open', 'high', 'low', 'close', 'volume'])
+
+    
+    def test_get_account_info_filters_empty_balances(self):
+        """测试账户信息只保留有余额的资产"""
+        self.api.client = MagicMock()
+        self.api.client.get_account.return_value = {
+            'accountType': 'SPOT',
+            'canTrade': True,
+            'canWithdraw': False,
+            'balances': [
+                {'asset': 'BTC', 'free': '0.50000000', 'locked': '0.25000000'},
+                {'asset': 'ETH', 'free': '0.00000000', 'locked': '0.00000000'},
+                {'asset': 'BNB', 'free': '0.00000000', 'locked': '2.00000000'}
+            ]
+        }
+        
+        info = self.api.get_account_info()
+        
+        self.assertEqual(info['account_type'], 'SPOT')
+        self.assertEqual([b['asset'] for b in info['balances']], ['BTC', 'BNB'])
+        self.assertEqual(info['balances'][0]['total'], 0.75)
+        self.assertIsInstance(info['balances'][1]['locked'], float)
+
+    
+    def test_get_tickers_info_batches_requests(self):
+        """测试批量行情合并为一次请求，并复用缓存"""
+        def ticker(symbol, price):
+            return {'symbol': symbol, 'lastPrice': price, 'volume': '10', 'priceChangePercent': '1.5',
+                    'highPrice': '200', 'lowPrice': '50'}
+        
+        self.api.client = MagicMock()
+        self.api.client.get_ticker.return_value = [ticker('BTCUSDT', '100'), ticker('ETHUSDT', '80')]
+        
+        tickers = self.api.get_tickers_info(['BTCUSDT', 'ETHUSDT'])
+        
+        self.assertEqual(set(tickers), {'BTCUSDT', 'ETHUSDT'})
+        self.assertEqual(tickers['ETHUSDT']['price'], 80.0)
+        self.api.client.get_ticker.assert_called_once_with(symbols='["BTCUSDT","ETHUSDT"]')
+        
+        # 单个交易对的查询命中缓存，不再请求
+        self.assertEqual(self.api.get_ticker_info('BTCUSDT')['price'], 100.0)
+        self.assertEqual(self.api.client.get_ticker.call_count, 1)
+    
+    def test_concurrent_cached_lookups(self):
+        """测试多个线程同时读取交易对列表和行情缓存"""
+        self.api.client = MagicMock()
+        self.api.client.get_exchange_info.return_value = {'symbols': [
+            {'symbol': 'BTCUSDT', 'status': 'TRADING'},
+            {'symbol': 'ETHBTC', 'status': 'TRADING'},
+            {'symbol': 'LUNAUSDT', 'status': 'BREAK'}
+        ]}
+        self.api.client.get_ticker.side_effect = lambda symbols: [{
+            'symbol': 'BTCUSDT', 'lastPrice': '100', 'volume': '10', 'priceChangePercent': '1.5',
+            'highPrice': '200', 'lowPrice': '50'
+        }]
+        
+        errors = []
+        
+        def worker():
+            try:
+                for _ in range(50):
+                    self.assertEqual(self.api.get_symbols('USDT'), ['BTCUSDT'])
+                    self.assertEqual(self.api.get_ticker_info('BTCUSDT')['price'], 100.0)
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(errors, [])
+    
+    def test_get_market_data_batch(self):
+        """测试批量获取行情，单个交易对失败时返回空DataFrame"""
+        def get_market_data(symbol, timeframe, limit):
+            if symbol == 'BADUSDT':
+                raise ValueError('invalid symbol')
+            return self.api._klines_to_dataframe(self.klines)
+        
+        self.api.get_market_data = MagicMock(side_effect=get_market_data)
+        
+        data_map = self.api.get_market_data_batch(['BTCUSDT', 'BADUSDT', 'ETHUSDT'], '1m', 2)
+        
+        self.assertEqual(list(data_map), ['BTCUSDT', 'BADUSDT', 'ETHUSDT'])
+        self.assertEqual(len(data_map['BTCUSDT']), 2)
+        self.assertTrue(data_map['BADUSDT'].empty)
+        self.assertEqual(self.api.get_market_data.call_count, 3)
+
+
+
+class TestFutuContextPool(unittest.TestCase):
+    """测试富途连接池"""
+    
+    def test_concurrent_borrow_respects_pool_size(self):
+        """并发借出时连接数不超过上限，且同一连接不会同时被两个线程使用"""
+        created = []
+        in_use = set()
+        errors = []
+        lock = threading.Lock()
+        
+        def factory():
+            ctx = MagicMock()
+            with lock:
+                created.append(ctx)
+            return ctx
+        
+        pool = _ContextPool(('quote', 'test', 0), factory, size=2)
+        
+        def worker():
+            with pool.borrow() as ctx:
+                with lock:
+                    if id(ctx) in in_use:
+                        errors.append(ctx)
+                    in_use.add(id(ctx))
+                time.sleep(0.01)
+                with lock:
+                    in_use.discard(id(ctx))
+        
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertLessEqual(len(created), 2)
+        self.assertEqual(errors, [])
+        
+        pool.close()
+        for ctx in created:
+            ctx.close.assert_called_once()
+    
+    def test_failed_open_wakes_waiters(self):
+        """新建连接失败时让出名额，等待的线程重新尝试而不是一直阻塞"""
+        started = threading.Event()
+        
+        def factory():
+            started.wait(1)
+            time.sleep(0.05)
+            raise ConnectionError('OpenD not available')
+        
+        pool = _ContextPool(('quote', 'test', 0), factory, size=1)
+        errors = []
+        
+        def worker():
+            try:
+                with pool.borrow():
+                    pass
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=worker) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        started.set()
+        for thread in threads:
+            thread.join(5)
+        
+        self.assertFalse(any(thread.is_alive() for thread in threads))
+        self.assertEqual(len(errors), 3)
+        self.assertTrue(all(isinstance(e, ConnectionError) for e in errors))
+    
+    def test_checkout_timeout(self):
+        """连接全部借出时等待超时抛出TimeoutError"""
+        pool = _ContextPool(('quote', 'test', 0), MagicMock, size=1)
+        
+        with patch('src.data_api.futu_api._CHECKOUT_TIMEOUT', 0.05):
+            with pool.borrow():
+                with self.assertRaises(TimeoutError):
+                    with pool.borrow():
+                        pass
+            
+            # 归还后可以再次借出
+            with pool.borrow():
+                pass
+
+
+class TestAPICache(unittest.TestCase):
+    """测试API实例缓存"""
+    
+    def test_expired_api_closed_after_grace(self):
+        """过期的实例不立即关闭，超过宽限期或清空缓存时才关闭"""
+        now = [0]
+        cache = _APICache(maxsize=4, ttl=10, timer=lambda: now[0])
+        old_api = MagicMock()
+        cache['binance'] = old_api
+        
+        # 过期后写入新实例，旧实例只移入待关闭列表
+        now[0] = 20
+        new_api = MagicMock()
+        cache['binance'] = new_api
+        self.assertIs(cache['binance'], new_api)
+        
+        cache.close_retired()
+        old_api.close.assert_not_called()
+        
+        cache.close_retired(grace=0)
+        old_api.close.assert_called_once()
+        
+        # 清空缓存后关闭所有实例
+        cache.clear()
+        new_api.close.assert_not_called()
+        cache.close_retired(grace=0)
+        new_api.close.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
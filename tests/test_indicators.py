@@ -10,7 +10,10 @@ import numpy as np
 # 添加项目根目录到路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.indicators.indicator_factory import IndicatorFactory
+from src.indicators import _backend
+from src.indicators._kernels import cross_kernel
+from src.indicators.indicator_base import cross_signal, level_cross_signal, divergence_signal
+from src.indicators.indicator_factory import IndicatorFactory, LazyIndicatorPlan
 from src.indicators.moving_averages import SimpleMovingAverage, ExponentialMovingAverage, MACD, BollingerBands
 from src.indicators.oscillators import RSI, KDJ, VolumeProfile
 from config.constants import (
@@ -79,6 +82,56 @@ class TestIndicators(unittest.TestCase):
         self.assertIn('ema_20', result.columns)
         self.assertEqual(len(result), len(self.data))
     
+    def test_moving_average_cross_signal(self):
+        """测试均线交叉信号"""
+        sma = SimpleMovingAverage(window=20)
+        
+        result = sma.get_signal(self.data, signal_type='cross', short_window=5)
+        
+        # 与逐行比较前后两根K线的结果一致
+        short, long_ = result['ma_5'], result['ma_20']
+        expected = np.where((short > long_) & (short.shift(1) <= long_.shift(1)), 1,
+                            np.where((short < long_) & (short.shift(1) >= long_.shift(1)), -1, 0))
+        np.testing.assert_array_equal(result['ma_signal'].to_numpy(), expected)
+    
+    def test_cross_signal(self):
+        """测试交叉信号计算"""
+        fast = np.array([1.0, 2.0, 3.0, 2.0, 1.0, np.nan, 3.0])
+        slow = np.array([2.0, 2.0, 2.0, 2.0, 2.0, 2.0, 2.0])
+        
+        signal = cross_signal(fast, slow)
+        
+        self.assertEqual(signal.dtype, np.int8)
+        self.assertEqual(signal.tolist(), [0, 0, 1, 0, -1, 0, 0])
+        
+        # 编译内核与NumPy实现结果一致
+        out = np.empty(len(fast), dtype=np.int8)
+        cross_kernel(fast, slow, out)
+        np.testing.assert_array_equal(out, signal)
+    
+    def test_level_cross_signal(self):
+        """测试穿越买入线、卖出线的信号"""
+        values = np.array([20.0, 35.0, 75.0, 65.0, 25.0])
+        
+        signal = level_cross_signal(values, 30, 70)
+        
+        np.testing.assert_array_equal(signal, [0, 1, 0, -1, 0])
+        self.assertEqual(signal.dtype, np.int8)
+    
+    def test_divergence_signal(self):
+        """测试背离信号"""
+        price = np.array([1.0, 2.0, 3.0, 2.0, 1.0, 0.5, 1.0, 2.0])
+        oscillator = np.array([5.0, 6.0, 4.0, 2.5, 2.0, 3.0, 2.0, 1.0])
+        
+        signal = divergence_signal(price, oscillator, margin=2, lookback=2)
+        
+        # 位置2价格为局部高点而指标低于两期前：顶背离；位置5价格为局部低点而指标高于两期前：底背离
+        np.testing.assert_array_equal(signal, [0, 0, -1, 0, 0, 1, 0, 0])
+        self.assertEqual(signal.dtype, np.int8)
+        
+        # 数据不足时不产生信号
+        self.assertFalse(divergence_signal(price[:4], oscillator[:4], margin=2, lookback=2).any())
+    
     def test_macd(self):
         """测试MACD"""
         # 创建MACD实例
@@ -110,6 +163,15 @@ class TestIndicators(unittest.TestCase):
         valid_rsi = result['rsi_14'].dropna()
         self.assertTrue((valid_rsi >= 0).all() and (valid_rsi <= 100).all())
     
+    def test_rsi_wilder_smoothing(self):
+        """测试RSI采用Wilder平滑"""
+        data = pd.DataFrame({'close': [1.0, 2.0, 1.0, 2.0, 3.0]})
+        
+        result = RSI(window=2).calculate(data)
+        
+        # 前两个变化的简单平均作为初始值，之后按 avg = (avg * (w - 1) + cur) / w 递推
+        np.testing.assert_allclose(result['rsi_2'], [np.nan, np.nan, 50.0, 75.0, 87.5])
+    
     def test_bollinger_bands(self):
         """测试布林带"""
         # 创建布林带实例
@@ -127,6 +189,85 @@ class TestIndicators(unittest.TestCase):
         self.assertTrue((valid_data['bollinger_upper'] > valid_data['bollinger_ma']).all())
         self.assertTrue((valid_data['bollinger_ma'] > valid_data['bollinger_lower']).all())
     
+    def test_flat_price_range(self):
+        """测试价格没有波动时KDJ不产生inf，带宽和百分比B不产生inf/NaN"""
+        data = pd.DataFrame({'high': [10.0] * 6, 'low': [10.0] * 6, 'close': [10.0] * 6})
+        
+        kdj = KDJ(k_window=3).calculate(data)
+        bollinger = BollingerBands(window=3).calculate(data)
+        
+        # 从未出现价格波动时没有有效的RSV，K值保持NaN
+        self.assertTrue(kdj['kdj_k'].isna().all())
+        
+        # 窗口不足的位置仍为NaN，之后均为0
+        np.testing.assert_array_equal(bollinger['bollinger_b'], [np.nan, np.nan, 0.0, 0.0, 0.0, 0.0])
+        np.testing.assert_array_equal(bollinger['bollinger_bandwidth'], [np.nan, np.nan, 0.0, 0.0, 0.0, 0.0])
+    
+    def test_kdj_signal_after_flat_stretch(self):
+        """测试横盘期间K值保持不变，D值只向K值靠拢，不产生交叉和超买超卖信号"""
+        close = np.array([10.0, 11.0, 10.5, 12.0, 11.0, 13.0] + [13.0] * 10 + [13.5])
+        data = pd.DataFrame({'high': close, 'low': close, 'close': close})
+        
+        kdj = KDJ(k_window=3)
+        result = kdj.get_signal(kdj.calculate(data), signal_type='cross')
+        
+        # 横盘开始两个周期后窗口内价格完全相同，K值沿用横盘前的值
+        flat = slice(7, 16)
+        self.assertTrue(np.all(result['kdj_k'].iloc[flat] == result['kdj_k'].iloc[6]))
+        side = np.sign(result['kdj_k'] - result['kdj_d'])
+        self.assertTrue((side.iloc[flat] == side.iloc[6]).all())
+        self.assertTrue((result['kdj_cross_signal'].iloc[flat] == 0).all())
+        
+        level = kdj.get_signal(kdj.calculate(data), signal_type='level')
+        self.assertTrue((level['kdj_level_signal'].iloc[flat] == 0).all())
+    
+    def test_volume_signals(self):
+        """测试成交量突增和价量背离信号"""
+        data = pd.DataFrame({
+            'open': [10.0, 10.0, 10.0, 10.0, 11.0, 12.0, 11.0],
+            'close': [10.0, 10.0, 10.0, 11.0, 12.0, 11.0, 10.0],
+            'volume': [100.0, 100.0, 100.0, 500.0, 400.0, 300.0, 200.0]
+        })
+        volume = VolumeProfile(window=3)
+        
+        surge = volume.get_signal(volume.calculate(data), signal_type='surge', volume_surge=1.5)
+        np.testing.assert_array_equal(surge['volume_surge_signal'], [0, 0, 0, 1, 0, 0, 0])
+        
+        divergence = volume.get_signal(volume.calculate(data), signal_type='divergence')
+        np.testing.assert_array_equal(divergence['volume_divergence_signal'], [0, 0, 0, 0, 0, 1, 1])
+    
+    def test_calculate_arr(self):
+        """测试基于数组计算的结果与calculate添加的列一致"""
+        for indicator in [MACD(), KDJ(), VolumeProfile(window=5)]:
+            arrays = [self.data[col].to_numpy(dtype=np.float64) for col in indicator.input_columns]
+            columns = indicator.calculate_arr(*arrays)
+            result = indicator.calculate(self.data)
+    
+            self.assertEqual(list(result.columns), list(self.data.columns) + list(columns))
+            for col, values in columns.items():
+                np.testing.assert_array_equal(result[col].to_numpy(), values)
+    
+    def test_calculate_panel(self):
+        """测试按标的批量计算的结果与逐个标的计算一致"""
+        close = self.data['close'].to_numpy()
+        panel = np.vstack([close, close * 1.5, close[::-1]])
+        
+        for indicator in [SimpleMovingAverage(window=10), ExponentialMovingAverage(window=10), MACD(), RSI()]:
+            columns = indicator.calculate_panel(panel)
+            for s in range(panel.shape[0]):
+                for col, values in indicator.calculate_arr(panel[s]).items():
+                    np.testing.assert_array_equal(columns[col][s], values)
+    
+    def test_set_backend(self):
+        """测试切换滚动窗口计算后端"""
+        with self.assertRaises(ValueError):
+            _backend.set_backend('polars')
+        
+        if not _backend.CUDF_AVAILABLE:
+            with self.assertRaises(ImportError):
+                _backend.set_backend('cudf')
+        self.assertEqual(_backend.get_backend(), 'pandas')
+    
     def test_indicator_factory(self):
         """测试指标工厂"""
         # 测试创建不同类型的指标
@@ -147,6 +288,101 @@ class TestIndicators(unittest.TestCase):
         self.assertIn('macd', result.columns)
         self.assertIn('rsi_14', result.columns)
         self.assertIn('bollinger_upper', result.columns)
+    
+    def test_fused_indicators_match_individual(self):
+        """测试合并计算MACD、RSI、布林带与逐个计算的结果一致"""
+        indicators = [
+            {'type': INDICATOR_MACD, 'params': {}},
+            {'type': INDICATOR_MA, 'params': {'window': 10}},
+            {'type': INDICATOR_RSI, 'params': {'window': 14}},
+            {'type': INDICATOR_BOLLINGER, 'params': {'window': 20}}
+        ]
+        
+        result = IndicatorFactory.calculate_indicators(self.data, indicators)
+        
+        expected = self.data
+        for config in indicators:
+            expected = IndicatorFactory.create_indicator(config['type'], **config['params']).calculate(expected)
+        pd.testing.assert_frame_equal(result, expected, check_exact=False, rtol=1e-9)
+    
+    def test_indicator_signals_track_computed_indicators(self):
+        """测试获取信号时按窗口区分已计算的指标"""
+        indicators = [
+            {'type': INDICATOR_MA, 'params': {'window': 5}},
+            {'type': INDICATOR_MA, 'params': {'window': 20}, 'signal_params': {'signal_type': 'trend'}}
+        ]
+        
+        result = IndicatorFactory.get_indicator_signals(self.data, indicators)
+        
+        self.assertIn('ma_5', result.columns)
+        self.assertIn('ma_20', result.columns)
+        self.assertEqual(result.attrs[IndicatorFactory.COMPUTED_ATTR], {'ma_5', 'ma_20'})
+        self.assertNotIn(IndicatorFactory.COMPUTED_ATTR, self.data.attrs)
+    
+    def test_stream_indicators(self):
+        """测试分块计算指标与整体计算一致"""
+        indicators = [
+            {'type': INDICATOR_MA, 'params': {'window': 20}},
+            {'type': INDICATOR_BOLLINGER, 'params': {'window': 20}}
+        ]
+        chunks = [self.data.iloc[i:i + 30] for i in range(0, len(self.data), 30)]
+        results = []
+        
+        total = IndicatorFactory.stream_indicators(chunks, indicators, results.append, warmup=20)
+        
+        self.assertEqual(total, len(self.data))
+        expected = IndicatorFactory.calculate_indicators(self.data, indicators)
+        pd.testing.assert_frame_equal(pd.concat(results), expected)
+    
+    def test_lazy_indicator_plan(self):
+        """测试延迟指标计划与逐个计算的结果一致"""
+        indicators = [
+            {'type': INDICATOR_MA, 'params': {'window': 20}, 'signal_params': {'signal_type': 'cross', 'short_window': 5}},
+            {'type': INDICATOR_MACD, 'params': {}, 'signal_params': {'signal_type': 'cross'}},
+            {'type': INDICATOR_BOLLINGER, 'params': {'window': 20}, 'signal_params': {}}
+        ]
+        
+        result = LazyIndicatorPlan.from_configs(indicators).execute(self.data)
+        
+        expected = IndicatorFactory.calculate_indicators(self.data, indicators)
+        expected = IndicatorFactory.get_indicator_signals(expected, indicators)
+        pd.testing.assert_frame_equal(result[expected.columns], expected, check_dtype=False)
+        
+        # 原始数据不被修改
+        self.assertEqual(list(self.data.columns), ['open', 'high', 'low', 'close', 'volume'])
+    
+    def test_lazy_indicator_plan_all_indicators(self):
+        """测试延迟指标计划一次计算多个指标与逐个计算的结果一致"""
+        plan = (LazyIndicatorPlan()
+                .add(INDICATOR_MA, window=5)
+                .add(INDICATOR_EMA, window=10)
+                .add(INDICATOR_MACD)
+                .add(INDICATOR_BOLLINGER)
+                .add(INDICATOR_RSI)
+                .add(INDICATOR_KDJ)
+                .add(INDICATOR_VOLUME))
+        
+        result = plan.execute(self.data)
+        
+        expected = self.data
+        for indicator in [SimpleMovingAverage(window=5), ExponentialMovingAverage(window=10), MACD(),
+                          BollingerBands(), RSI(), KDJ(), VolumeProfile()]:
+            expected = indicator.calculate(expected)
+        pd.testing.assert_frame_equal(result, expected)
+        self.assertEqual(list(self.data.columns), ['open', 'high', 'low', 'close', 'volume'])
+    
+    def test_lazy_indicator_plan_overwrites_existing_columns(self):
+        """测试数据中已有同名指标列时，计划用新参数的计算结果覆盖"""
+        precomputed = BollingerBands().calculate(self.data)
+        
+        plan = LazyIndicatorPlan().add(INDICATOR_BOLLINGER, window=5, std_dev=1)
+        result = plan.execute(precomputed)
+        
+        expected = BollingerBands(window=5, std_dev=1).calculate(self.data)
+        pd.testing.assert_frame_equal(result, expected)
+        
+        # 预先计算的数据不被修改
+        pd.testing.assert_frame_equal(precomputed, BollingerBands().calculate(self.data))
 
 
 if __name__ == '__main__':
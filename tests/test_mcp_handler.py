@@ -3,10 +3,14 @@
 """
 import os
 import sys
+import time
 import unittest
 import json
 from unittest.mock import patch, MagicMock
 
+import numpy as np
+import pandas as pd
+
 # 添加项目根目录到路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -114,6 +118,213 @@ class TestMCPHandler(unittest.TestCase):
         self.assertIn('message', result)
         self.assertIn('data', result)
 
+    
+    @patch('src.mcp_handler.IntentParser')
+    @patch('src.mcp_handler.APIFactory')
+    def test_analyze_multiple_symbols(self, mock_api_factory, mock_intent_parser):
+        """测试并发分析多个股票时每个股票得到各自的结果"""
+        symbols = ['AAPL', 'MSFT', 'GOOGL', 'TSLA']
+        mock_parser = MagicMock()
+        mock_parser.parse.return_value = {
+            'command_type': CMD_ANALYZE,
+            'symbols': symbols,
+            'timeframe': '1d',
+            'indicators': ['rsi']
+        }
+        mock_intent_parser.return_value = mock_parser
+        
+        # 每个股票的收盘价不同，便于核对结果
+        def get_market_data(symbol, timeframe, limit):
+            close = np.linspace(100, 120, 30) + symbols.index(symbol)
+            return pd.DataFrame({'close': close, 'volume': np.full(30, 1000.0)})
+        
+        mock_api = MagicMock()
+        mock_api.get_market_data.side_effect = get_market_data
+        mock_api.get_ticker_info.side_effect = lambda symbol: {'symbol': symbol}
+        mock_api_factory.return_value.get_api_for_symbol.return_value = mock_api
+        
+        handler = MCPHandler(self.config_path)
+        result = handler.process_request("分析几只美股")
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(list(result['data']), symbols)
+        for i, symbol in enumerate(symbols):
+            self.assertEqual(result['data'][symbol]['ticker_info'], {'symbol': symbol})
+            self.assertEqual(result['data'][symbol]['latest_price'], 120.0 + i)
+            self.assertIn('rsi_14', result['data'][symbol]['indicators']['rsi'])
+        
+        # 再次分析时股票信息直接取自缓存
+        handler.process_request("分析几只美股")
+        self.assertEqual(mock_api.get_ticker_info.call_count, len(symbols))
+    
+    @patch('src.mcp_handler.IntentParser')
+    @patch('src.mcp_handler.APIFactory')
+    def test_process_request_stream(self, mock_api_factory, mock_intent_parser):
+        """测试流式处理分析请求时逐个返回股票结果，最后返回汇总"""
+        symbols = ['AAPL', 'MSFT', 'GOOGL']
+        mock_parser = MagicMock()
+        mock_parser.parse.return_value = {
+            'command_type': CMD_ANALYZE,
+            'symbols': symbols,
+            'timeframe': '1d',
+            'indicators': ['rsi']
+        }
+        mock_intent_parser.return_value = mock_parser
+        
+        close = np.linspace(100, 120, 30)
+        mock_api = MagicMock()
+        mock_api.get_market_data.return_value = pd.DataFrame({'close': close, 'volume': np.full(30, 1000.0)})
+        mock_api.get_ticker_info.side_effect = lambda symbol: {'symbol': symbol}
+        mock_api_factory.return_value.get_api_for_symbol.return_value = mock_api
+        
+        handler = MCPHandler(self.config_path)
+        chunks = list(handler.process_request_stream("分析几只美股"))
+        
+        # 每个股票一条结果，顺序取决于完成先后
+        self.assertEqual(len(chunks), len(symbols) + 1)
+        self.assertEqual(sorted(chunk['symbol'] for chunk in chunks[:-1]), sorted(symbols))
+        for chunk in chunks[:-1]:
+            self.assertTrue(chunk['result']['success'])
+            self.assertEqual(chunk['result']['ticker_info'], {'symbol': chunk['symbol']})
+        self.assertTrue(chunks[-1]['success'])
+        
+        # 其他命令只返回一条完整结果
+        mock_parser.parse.return_value = {'command_type': CMD_MONITOR}
+        chunks = list(handler.process_request_stream("监控"))
+        self.assertEqual(len(chunks), 1)
+        self.assertTrue(chunks[0]['success'])
+    
+    @patch('src.mcp_handler.MCPHandler.MAX_WORKERS', 1)
+    @patch('src.mcp_handler.IntentParser')
+    @patch('src.mcp_handler.APIFactory')
+    def test_process_request_stream_close(self, mock_api_factory, mock_intent_parser):
+        """测试提前关闭流式结果时取消未开始的任务，不等待剩余的股票处理完成"""
+        symbols = ['AAPL', 'MSFT', 'GOOGL', 'AMZN']
+        mock_parser = MagicMock()
+        mock_parser.parse.return_value = {
+            'command_type': CMD_ANALYZE,
+            'symbols': symbols,
+            'timeframe': '1d',
+            'indicators': ['rsi']
+        }
+        mock_intent_parser.return_value = mock_parser
+        
+        close = np.linspace(100, 120, 30)
+        
+        def get_market_data(symbol, timeframe, limit=100):
+            time.sleep(0.2)
+            return pd.DataFrame({'close': close, 'volume': np.full(30, 1000.0)})
+        
+        mock_api = MagicMock()
+        mock_api.get_market_data.side_effect = get_market_data
+        mock_api_factory.return_value.get_api_for_symbol.return_value = mock_api
+        
+        handler = MCPHandler(self.config_path)
+        chunks = handler.process_request_stream("分析几只美股")
+        self.assertIn('symbol', next(chunks))
+        
+        start = time.monotonic()
+        chunks.close()
+        self.assertLess(time.monotonic() - start, 0.1)
+        
+        # 关闭时正在执行的任务完成后，其余的任务不再执行
+        time.sleep(0.5)
+        self.assertLessEqual(mock_api.get_market_data.call_count, 2)
+    
+    @patch('src.trade.trade_decision.TradeDecision.BACKTEST_WORKERS', 2)
+    @patch('src.mcp_handler.IntentParser')
+    @patch('src.mcp_handler.APIFactory')
+    def test_process_backtest_request(self, mock_api_factory, mock_intent_parser):
+        """测试多个股票和策略的回测在进程池中执行，结果与逐个回测一致"""
+        symbols = ['AAPL', 'MSFT']
+        strategies = ['macd_cross', 'rsi_overbought']
+        mock_parser = MagicMock()
+        mock_parser.parse.return_value = {
+            'command_type': CMD_BACKTEST,
+            'symbols': symbols,
+            'strategies': strategies,
+            'timeframe': '1d',
+            'parameters': {}
+        }
+        mock_intent_parser.return_value = mock_parser
+        
+        def get_market_data(symbol, timeframe, limit):
+            close = 100 + np.cumsum(np.random.default_rng(symbols.index(symbol)).normal(0, 1, 300))
+            return pd.DataFrame({
+                'open': close, 'high': close + 1, 'low': close - 1, 'close': close, 'volume': np.full(300, 1000.0)
+            }, index=pd.date_range('2023-01-01', periods=300))
+        
+        mock_api = MagicMock()
+        mock_api.get_market_data.side_effect = get_market_data
+        mock_api_factory.return_value.get_api_for_symbol.return_value = mock_api
+        
+        handler = MCPHandler(self.config_path)
+        result = handler.process_request("回测苹果和微软的MACD和RSI策略")
+        
+        self.assertTrue(result['success'])
+        backtest_results = result['data']['backtest_results']
+        self.assertEqual(
+            [(r['symbol'], r['strategy']) for r in backtest_results],
+            [(symbol, strategy) for symbol in symbols for strategy in strategies]
+        )
+        
+        # 每个股票的数据只获取一次
+        self.assertEqual(mock_api.get_market_data.call_count, len(symbols))
+        
+        for r in backtest_results:
+            self.assertTrue(r['success'])
+            expected = handler.trade_decision.backtest_strategy(
+                {'strategy_type': r['strategy'], 'strategy_params': {}}, r['symbol'], '1d'
+            )
+            self.assertEqual(r['result']['final_equity'], expected['final_equity'])
+            self.assertEqual(r['result']['total_trades'], expected['total_trades'])
+    
+    @patch('src.mcp_handler.IntentParser')
+    @patch('src.mcp_handler.APIFactory')
+    def test_process_request_returns_handler_result(self, mock_api_factory, mock_intent_parser):
+        """测试返回各命令处理方法的结果，而不是解析出的意图"""
+        mock_parser = MagicMock()
+        mock_intent_parser.return_value = mock_parser
+        handler = MCPHandler(self.config_path)
+        
+        # 监控请求返回监控处理方法的说明
+        mock_parser.parse.return_value = {'command_type': CMD_MONITOR, 'symbols': ['AAPL']}
+        result = handler.process_request("监控苹果公司股票")
+        self.assertTrue(result['success'])
+        self.assertEqual(result['data'], {'request': mock_parser.parse.return_value})
+        
+        # 不支持的命令类型返回失败
+        mock_parser.parse.return_value = {'command_type': 'unknown'}
+        result = handler.process_request("你好")
+        self.assertFalse(result['success'])
+        self.assertIsNone(result['data'])
+    
+    @patch('src.mcp_handler.IntentParser')
+    @patch('src.mcp_handler.APIFactory')
+    def test_parse_intent_cached(self, mock_api_factory, mock_intent_parser):
+        """测试相同的查询只解析一次，修改返回的意图不影响缓存"""
+        mock_parser = MagicMock()
+        mock_parser.parse.side_effect = lambda text: {'command_type': CMD_MONITOR, 'symbols': ['AAPL']}
+        mock_intent_parser.return_value = mock_parser
+        handler = MCPHandler(self.config_path)
+        
+        intent = handler._parse_intent("监控苹果公司股票")
+        intent['symbols'].append('MSFT')
+        self.assertEqual(handler._parse_intent("监控苹果公司股票")['symbols'], ['AAPL'])
+        self.assertEqual(mock_parser.parse.call_count, 1)
+        
+        # 过长的查询不缓存
+        long_query = "监控" * handler.MAX_CACHED_QUERY_LEN
+        handler._parse_intent(long_query)
+        handler._parse_intent(long_query)
+        self.assertEqual(mock_parser.parse.call_count, 3)
+        
+        # LLM出错时的解析结果不缓存
+        mock_parser.parse.side_effect = lambda text: {'command_type': CMD_MONITOR, 'llm_error': 'timeout'}
+        handler._parse_intent("监控微软股票")
+        handler._parse_intent("监控微软股票")
+        self.assertEqual(mock_parser.parse.call_count, 5)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
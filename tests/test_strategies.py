@@ -179,6 +179,28 @@ class TestStrategies(unittest.TestCase):
             elif strategy_type == STRATEGY_GRID and subtype == 'fixed':
                 self.assertIsInstance(strategy, GridStrategy)
 
+    
+    def test_latest_signal(self):
+        """测试只计算最新信号的结果与完整信号序列的最后一个值一致"""
+        strategies = [
+            MACDCrossStrategy(),
+            MACrossStrategy(fast_period=3, slow_period=10),
+            RSIOverboughtStrategy(rsi_period=5, overbought=60, oversold=40),
+            BollingerBreakoutStrategy(window=20)
+        ]
+        
+        for strategy in strategies:
+            signals = strategy.generate_signals(strategy.prepare_data(self.data))['signal'].to_numpy()
+            
+            # 截取不同长度的数据，覆盖买入、卖出和无信号的情况
+            for end in range(2, len(self.data) + 1):
+                self.assertEqual(
+                    strategy.latest_signal(self.data.iloc[:end]),
+                    strategy.generate_signals(strategy.prepare_data(self.data.iloc[:end]))['signal'].to_numpy()[-1],
+                    f"{strategy.get_description()} 在第{end}根K线处不一致"
+                )
+            self.assertIn(1, signals)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file